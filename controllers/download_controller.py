@@ -2,22 +2,152 @@
 Download controller for managing gallery-dl downloads.
 """
 import threading
-import queue
+import subprocess
 import time
-from typing import Callable, Optional, List
+import itertools
+import math
+import heapq
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, List, Dict, Iterable, Tuple
 from models.settings import AppState
-from utils.gallery_dl_service import GalleryDLService
+from models.job import DownloadJob, JobState, JobPriority, QueuePolicy
+from models.job_journal import JobJournal
+from models.url_test_cache import UrlTestCache
+from controllers.messages import (
+    Message, MessageBus, StatusMessage, JobUpdateMessage, QueueChangedMessage, AdaptiveLimitsMessage,
+    InstallationMessage, JobFinishedMessage, TestFinishedMessage, TestResultMessage, BatchTestFinishedMessage,
+    ImportChunkMessage, ImportFinishedMessage)
+from utils.gallery_dl_service import GalleryDLService, UrlTestResult
+from utils.inprocess_engine import InProcessEngine
+from utils.launcher import GalleryDLLauncher
+from utils.worker_pool import WorkerPool
+from utils.rate_limiter import HostLimit, HostLimiter
+from utils.bandwidth import BandwidthGovernor
+from utils.output_parser import OutputParser, OutputEvent, EventKind
+from utils.output_drain import OutputDrain
+from utils.output_log import JobOutputLog
+from utils.session_log import SessionLog
+from utils.error_classifier import ErrorClassifier, SEVERITIES
+from utils.url_import import UrlImporter, ImportStats
 from utils.file_utils import FileUtils
 
 
 class DownloadController:
-    """Controller for managing downloads."""
+    """Controller for managing downloads.
+    
+    Downloads are queued as DownloadJob objects and run by a bounded pool of
+    worker threads, each driving its own gallery-dl process. Queued jobs are
+    kept in one heap per host, ordered by the queue policy, so per-site
+    concurrency and start-rate limits can be applied without scanning the
+    whole queue. Heap entries are invalidated lazily when a job leaves the
+    queue or changes priority.
+    """
+    
+    PROGRESS_INTERVAL = 0.5  # Seconds between progress refreshes of running jobs
+    STOP_TIMEOUT = 5  # Seconds a stopped job gets to exit before it is killed
+    IMPORT_CHUNK_SIZE = 500  # URLs added to the queue per UI update during imports
+    IMPORT_CHUNKS_IN_FLIGHT = 2  # Chunks handed to the UI thread but not yet added
+    LOG_BATCH_LINES = 2000  # Log lines handed to the UI at a time
     
     def __init__(self, app_state: AppState, message_callback: Callable[[str, str], None]):
         self.app_state = app_state
         self.message_callback = message_callback  # Callback to send messages to UI
-        self.message_queue = queue.Queue()
+        self.message_bus = MessageBus()  # on_post is set by the UI to wake its event loop
+        self._message_handlers: Dict[type, Callable[[Message], None]] = {
+            StatusMessage: lambda m: self.message_callback("status", m.text),
+            JobUpdateMessage: lambda m: self.message_callback("job_update", m.job),
+            AdaptiveLimitsMessage: lambda m: self.message_callback("adaptive_limits", m.limits),
+            InstallationMessage: lambda m: self.message_callback("installation", (m.found, m.text)),
+            JobFinishedMessage: lambda m: self._finish_job(m.job),
+            TestFinishedMessage: lambda m: self._finish_test(),
+            TestResultMessage: lambda m: self.message_callback("test_result", m.result),
+            BatchTestFinishedMessage: lambda m: self._finish_batch_test(m.source, m.stats, m.error),
+            ImportChunkMessage: lambda m: self._add_import_chunk(m.jobs),
+            ImportFinishedMessage: lambda m: self._finish_import(m.source, m.stats, m.error),
+            QueueChangedMessage: lambda m: self._queue_changed(),
+        }
+        
+        # Job queue state (guarded by _lock, shared with worker threads)
+        self.jobs: Dict[int, DownloadJob] = {}
+        self._job_order: List[int] = []  # Job IDs in queue view order
+        self._pending: Dict[str, List[Tuple[tuple, int, DownloadJob]]] = {}  # host -> heap
+        self._delayed: List[Tuple[float, int, DownloadJob]] = []  # Failed jobs waiting to retry
+        self._entry_seq: Dict[int, int] = {}  # queued job ID -> sequence number of its heap entry
+        self._entry_counter = itertools.count()
+        self._pending_count = 0
+        self.queue_policy = app_state.queue_policy_var.get()
+        self.preempt = app_state.preempt_var.get()
+        self._running: Dict[int, DownloadJob] = {}
+        self.host_limiter = HostLimiter()
+        self.bandwidth = BandwidthGovernor(app_state.get_bandwidth_limit())
+        self._limit_keys: Dict[int, str] = {}  # running job ID -> host limiter key
+        self._wakeup_timer: Optional[threading.Timer] = None
+        self._wakeup_at = 0.0
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count(1)
+        self._queue_active = False  # Only touched from the Tk thread
+        self._batch_size = 0  # Jobs queued since the queue was last idle
+        self._batch_finished = 0
+        self._batch_files = [0, 0, 0]  # Downloaded, skipped, failed files of finished jobs
+        self._batch_started = 0.0
+        self._last_progress = 0.0
+        
+        # Bulk URL import (one at a time)
+        self._import_cancel: Optional[threading.Event] = None
+        self._import_slots = threading.Semaphore(self.IMPORT_CHUNKS_IN_FLIGHT)
+        self._shutting_down = False
+        
+        # Batch URL test (one at a time)
+        self._batch_test_cancel: Optional[threading.Event] = None
         
+        # Crash-safe record of all jobs, used to resume unfinished work
+        try:
+            self.journal: Optional[JobJournal] = JobJournal()
+            self.journal.prune()
+            self._job_ids = itertools.count(self.journal.next_id())
+        except sqlite3.Error as e:
+            print(f"Failed to open job journal: {e}")
+            self.journal = None
+        JobOutputLog.prune()
+        SessionLog.prune()
+        
+        # Results of earlier URL tests
+        try:
+            self.test_cache: Optional[UrlTestCache] = UrlTestCache()
+            self.test_cache.prune(app_state.get_test_cache_ttl())
+        except sqlite3.Error as e:
+            print(f"Failed to open URL test cache: {e}")
+            self.test_cache = None
+        
+        # Run times of earlier jobs, for shortest-estimated-first ordering
+        self._durations: Dict[str, float] = {}  # URL -> run time of its latest completed job
+        self._host_durations: Dict[str, List[float]] = {}  # host -> [total run time, job count]
+        if self.journal:
+            try:
+                self._durations = self.journal.load_durations()
+            except sqlite3.Error as e:
+                print(f"Failed to read job journal: {e}")
+        
+        self.retry_policy = app_state.get_retry_policy()
+        for var in (app_state.retry_attempts_var, app_state.retry_delay_var, app_state.retry_minutes_var):
+            var.trace_add("write", self._on_retry_policy_changed)
+        app_state.bandwidth_limit_var.trace_add("write", self._on_bandwidth_limit_changed)
+        app_state.queue_policy_var.trace_add("write", self._on_queue_policy_changed)
+        app_state.preempt_var.trace_add("write", self._on_preempt_changed)
+        self.max_workers = app_state.get_max_workers()
+        app_state.max_workers_var.trace_add("write", self._on_max_workers_changed)
+        app_state.default_host_max_var.trace_add("write", lambda *args: self.apply_host_limits())
+        app_state.default_host_rate_var.trace_add("write", lambda *args: self.apply_host_limits())
+        app_state.adaptive_limits_var.trace_add("write", lambda *args: self.apply_host_limits())
+        self.apply_host_limits()
+        
+        self.worker_pool: Optional[WorkerPool] = None
+        self.engine = app_state.engine_var.get()
+        app_state.engine_var.trace_add("write", self._on_engine_changed)
+        app_state.worker_recycle_var.trace_add("write", self._on_worker_recycle_changed)
+        self._prepare_engine()
+    
     def test_url(self) -> bool:
         """Test URL without downloading."""
         if self.app_state.is_testing:
@@ -27,43 +157,172 @@ class DownloadController:
         if not url:
             self.message_callback("error", "Please enter a URL")
             return False
+        engine = self.engine
+        options = self.app_state.get_auth_options()
+        options_key = self.app_state.get_test_options_key()
+        probe_items = GalleryDLService.PROBE_ITEMS if self.app_state.test_probe_var.get() else 0
         
         # Start testing state
         self.app_state.is_testing = True
         self.message_callback("status", "Testing URL...")
         self.message_callback("log", f"Testing URL: {url}")
+        ttl = self.app_state.get_test_cache_ttl()
         
         def test_worker():
             try:
-                success, message, output_lines = GalleryDLService.test_url(url)
-                
-                self.message_queue.put(("log", message))
-                
-                if success and output_lines:
-                    self.message_queue.put(("log", "Sample output:"))
-                    # Show first few lines of output
-                    for line in output_lines[:5]:
-                        self.message_queue.put(("log", f"  {line}"))
-                    if len(output_lines) > 5:
-                        self.message_queue.put(("log", f"  ... and {len(output_lines) - 5} more lines"))
-                
-                status = "URL test successful" if success else "URL test failed"
-                self.message_queue.put(("status", status))
-                
+                cache_key = GalleryDLService.test_cache_key(options_key)
+                result = self._get_cached_test(url, cache_key, ttl)
+                if result is None:
+                    result = GalleryDLService.test_url(url, engine, self.worker_pool, options, probe_items)
+                    self._store_test(result, cache_key)
+                self._report_test(result)
             except Exception as e:
-                self.message_queue.put(("log", f"✗ Test error: {str(e)}"))
-                self.message_queue.put(("status", "URL test error"))
+                self.message_bus.log(f"✗ Test error: {str(e)}")
+                self.message_bus.post(StatusMessage("URL test error"))
             finally:
-                self.message_queue.put(("test_finished", None))
+                self.message_bus.post(TestFinishedMessage())
         
         threading.Thread(target=test_worker, daemon=True).start()
         return True
     
-    def start_download(self) -> bool:
-        """Start download in separate thread."""
-        if self.app_state.is_downloading:
+    def check_installation(self, recheck: bool = False):
+        """Look for gallery-dl in the background; the result is posted as an "installation" message.
+        
+        Applies the pinned gallery-dl path; ``recheck`` runs the version
+        check even if the installation did not change.
+        """
+        GalleryDLLauncher.configure(self.app_state.gallery_dl_path_var.get())
+        
+        def check_worker():
+            self.message_bus.post(InstallationMessage(*GalleryDLService.check_installation(recheck)))
+        
+        threading.Thread(target=check_worker, daemon=True).start()
+    
+    def _report_test(self, result: UrlTestResult):
+        """Log the verdict and sample output of a URL test."""
+        self.message_bus.log(result.message)
+        if result.cached:
+            tested_at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(result.tested_at))
+            self.message_bus.log(f"  (cached result of the test at {tested_at}; "
+                                 f"use Advanced > URL Tests to test again)")
+        
+        if result.success and result.output:
+            self.message_bus.log("Sample output:")
+            # Show first few lines of output
+            for line in result.output[:5]:
+                self.message_bus.log(f"  {line}")
+            if len(result.output) > 5 and not result.cached:
+                self.message_bus.log(f"  ... and {len(result.output) - 5} more lines")
+        
+        status = "URL test successful" if result.success else "URL test failed"
+        self.message_bus.post(StatusMessage(status))
+    
+    def _get_cached_test(self, url: str, options_key: str, ttl: float) -> Optional[UrlTestResult]:
+        """Get a result of an earlier test of a URL with the same options, at most ``ttl`` seconds old."""
+        if not self.test_cache or ttl <= 0:
+            return None
+        try:
+            return self.test_cache.get(url, options_key, ttl)
+        except sqlite3.Error as e:
+            print(f"Failed to read URL test cache: {e}")
+            return None
+    
+    def _store_test(self, result: UrlTestResult, options_key: str):
+        """Cache a test result unless it may change on its own (timeouts, network errors)."""
+        if not self.test_cache or not GalleryDLService.is_conclusive(result):
+            return
+        try:
+            self.test_cache.put(result, options_key)
+        except sqlite3.Error as e:
+            print(f"Failed to write URL test cache: {e}")
+    
+    def test_urls(self, lines: Callable[[], Iterable[str]], source: str) -> bool:
+        """Test every URL of a list, several at a time.
+        
+        ``lines`` is called on a worker thread, like for ``import_urls``.
+        URLs are normalized and de-duplicated, then tested by a bounded pool
+        of probes (cached results are reused); each result is posted as a
+        "test_result" message as soon as it is known.
+        """
+        if self._batch_test_cancel is not None:
+            self.message_callback("error", "Another URL list is still being tested")
             return False
         
+        # Options are read from Tk variables here, not in the worker threads
+        engine = self.engine
+        options = self.app_state.get_auth_options()
+        options_key = self.app_state.get_test_options_key()
+        ttl = self.app_state.get_test_cache_ttl()
+        workers = self.app_state.get_test_workers()
+        probe_items = GalleryDLService.PROBE_ITEMS if self.app_state.test_probe_var.get() else 0
+        cancel = self._batch_test_cancel = threading.Event()
+        self.message_callback("log", f"Testing URLs from {source} ({workers} at a time)...")
+        self.message_callback("batch_test_started", source)
+        
+        def probe(url: str, cache_key: str):
+            if cancel.is_set():
+                return
+            result = self._get_cached_test(url, cache_key, ttl)
+            if result is None:
+                result = GalleryDLService.test_url(url, engine, self.worker_pool, options, probe_items)
+                self._store_test(result, cache_key)
+            self.message_bus.post(TestResultMessage(result))
+        
+        def batch_worker():
+            stats = ImportStats()
+            error = None
+            # Only a few more URLs than probes are handed to the pool at a
+            # time, so lists of any size are read lazily
+            slots = threading.Semaphore(workers * 2)
+            try:
+                cache_key = GalleryDLService.test_cache_key(options_key)
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    for url in UrlImporter.iter_urls(lines(), stats):
+                        while not slots.acquire(timeout=0.5):
+                            if cancel.is_set():
+                                break
+                        if cancel.is_set():
+                            break
+                        pool.submit(probe, url, cache_key).add_done_callback(lambda future: slots.release())
+            except (OSError, UnicodeError) as e:
+                error = str(e)
+            finally:
+                self.message_bus.post(BatchTestFinishedMessage(source, stats, error))
+        
+        threading.Thread(target=batch_worker, daemon=True).start()
+        return True
+    
+    def is_batch_testing(self) -> bool:
+        """Check whether a list of URLs is being tested."""
+        return self._batch_test_cancel is not None
+    
+    def cancel_batch_test(self):
+        """Stop a batch URL test; tests already running are finished."""
+        if self._batch_test_cancel is not None:
+            self._batch_test_cancel.set()
+    
+    def _finish_batch_test(self, source: str, stats: ImportStats, error: Optional[str]):
+        """Report the end of a batch URL test (Tk thread)."""
+        cancelled = self._batch_test_cancel is not None and self._batch_test_cancel.is_set()
+        self._batch_test_cancel = None
+        if error:
+            self.message_callback("log", f"✗ Reading {source} failed: {error}")
+        summary = f"{stats.added} URL(s), {stats.duplicates} duplicate(s), {stats.invalid} invalid"
+        self.message_callback("log", f"Test of {source} {'stopped' if cancelled else 'finished'}: {summary}")
+        self.message_callback("batch_test_finished", source)
+    
+    def invalidate_test_cache(self, url: Optional[str] = None) -> int:
+        """Forget cached test results of a URL, or all of them. Returns the number removed."""
+        if not self.test_cache:
+            return 0
+        try:
+            return self.test_cache.invalidate(url)
+        except sqlite3.Error as e:
+            print(f"Failed to write URL test cache: {e}")
+            return 0
+    
+    def start_download(self) -> bool:
+        """Queue a download for the URL in the URL entry."""
         cmd = self.app_state.build_gallery_dl_command()
         if not cmd:
             self.message_callback("error", "Please enter a URL")
@@ -79,99 +338,873 @@ class DownloadController:
             self.message_callback("error", f"Cannot create download directory: {download_path}")
             return False
         
-        self.app_state.is_downloading = True
-        self.message_callback("status", "Downloading...")
-        self.message_callback("download_started", None)
+        self.enqueue_job(url, cmd, self.app_state.get_priority())
+        return True
+    
+    def import_urls(self, lines: Callable[[], Iterable[str]], source: str) -> bool:
+        """Queue every URL of a list in the background.
         
-        # Start download thread
-        download_thread = threading.Thread(target=self._download_worker, args=(cmd,))
-        download_thread.daemon = True
-        download_thread.start()
+        ``lines`` is called on a worker thread and returns the lines to
+        import, so large files are read there as well. URLs are validated,
+        normalized and de-duplicated (also against queued and running jobs)
+        off the Tk thread and handed to the queue in chunks.
+        """
+        if self._import_cancel is not None:
+            self.message_callback("error", "Another URL list is still being imported")
+            return False
+        
+        # Options are read from Tk variables here, not in the worker thread
+        base_cmd = self.app_state.build_gallery_dl_command("-")[:-1]
+        priority = self.app_state.get_priority()
+        download_path = self.app_state.download_path.get()
+        if not FileUtils.ensure_directory_exists(download_path):
+            self.message_callback("error", f"Cannot create download directory: {download_path}")
+            return False
+        
+        with self._lock:
+            seen = {job.url for job in self.jobs.values() if not job.is_finished}
+        cancel = self._import_cancel = threading.Event()
+        self.message_callback("log", f"Importing URLs from {source}...")
+        self.message_callback("status", "Importing URLs...")
+        
+        def import_worker():
+            stats = ImportStats()
+            error = None
+            try:
+                urls = UrlImporter.iter_urls(lines(), stats, seen)
+                for chunk in UrlImporter.chunks(urls, self.IMPORT_CHUNK_SIZE):
+                    # Wait for the UI thread to catch up, so the message
+                    # queue never holds more than a few chunks
+                    while not self._import_slots.acquire(timeout=0.5):
+                        if cancel.is_set():
+                            break
+                    if cancel.is_set():
+                        break
+                    jobs = [DownloadJob(id=0, url=url, cmd=base_cmd + [url], priority=priority,
+                                        host=GalleryDLService.get_host_key(url)) for url in chunk]
+                    self._assign_ids(jobs)
+                    self.message_bus.post(ImportChunkMessage(jobs))
+            except (OSError, UnicodeError) as e:
+                error = str(e)
+            finally:
+                self.message_bus.post(ImportFinishedMessage(source, stats, error))
+        
+        threading.Thread(target=import_worker, daemon=True).start()
         return True
     
-    def _download_worker(self, cmd: List[str]):
-        """Download worker thread."""
-        output_lines = []
+    def is_importing(self) -> bool:
+        """Check whether a URL list is being imported."""
+        return self._import_cancel is not None
+    
+    def cancel_import(self):
+        """Stop a running URL import; chunks not yet queued are dropped."""
+        if self._import_cancel is not None:
+            self._import_cancel.set()
+    
+    def enqueue_job(self, url: str, cmd: List[str], priority: int = JobPriority.NORMAL) -> DownloadJob:
+        """Add a job to the download queue and start it if a worker is free."""
+        job = DownloadJob(id=0, url=url, cmd=cmd, host=GalleryDLService.get_host_key(url),
+                          priority=priority)
+        self._assign_ids([job])
+        self._add_jobs([job])
+        self.message_callback("log", f"[#{job.id}] Queued: {url}")
+        return job
+    
+    def resume_jobs(self) -> int:
+        """Queue the unfinished jobs recorded in the journal by a previous session.
+        
+        Returns the number of resumed jobs.
+        """
+        if not self.journal:
+            return 0
         try:
-            self.message_queue.put(("log", f"Starting download: {' '.join(cmd)}"))
+            jobs = self.journal.load_unfinished(self.app_state.password_var.get())
+        except sqlite3.Error as e:
+            self.message_callback("log", f"⚠ Could not read job journal: {e}")
+            return 0
+        if jobs:
+            for job in jobs:
+                if job.password_dropped:
+                    self.message_callback("log", f"[#{job.id}] ⚠ Resumed without its password (passwords are "
+                                                 f"not stored; re-add the URL to use one): {job.url}")
+            self._add_jobs(jobs)
+            self.message_callback("log", f"Resumed {len(jobs)} unfinished job(s) from the last session")
+        return len(jobs)
+    
+    def _assign_ids(self, jobs: List[DownloadJob]):
+        """Give new jobs their IDs and record them in the journal (written in the background)."""
+        for job in jobs:
+            job.id = next(self._job_ids)
+        if self.journal:
+            self.journal.add_many(jobs)
+    
+    def _add_jobs(self, jobs: List[DownloadJob]):
+        """Put jobs with assigned IDs into the queue and start what can start."""
+        with self._lock:
+            for job in jobs:
+                self.jobs[job.id] = job
+                self._job_order.append(job.id)
+                job.estimate = self._estimate(job)
+                self._push_pending(job)
+        
+        if not self._queue_active:
+            self._queue_active = True
+            self._batch_size = self._batch_finished = 0
+            self._batch_files = [0, 0, 0]
+            self._batch_started = time.time()
+            self.message_callback("download_started", None)
+        self._batch_size += len(jobs)
+        
+        self._schedule()
+        # The view, progress and status are refreshed once for all the
+        # chunks of an import that arrive before the UI gets to it
+        self.message_bus.post(QueueChangedMessage())
+    
+    def _queue_changed(self):
+        """Refresh the queue view, progress and status after jobs were added or removed (Tk thread)."""
+        self.message_callback("queue_changed", None)
+        if self._queue_active:
+            self.message_callback("progress", self.get_progress())
+            self._post_queue_status()
+    
+    def job_count(self) -> int:
+        """Get the number of jobs in the queue view."""
+        return len(self._job_order)
+    
+    def jobs_in_view(self, start: int, count: int) -> List[DownloadJob]:
+        """Get up to ``count`` jobs in queue view order, starting at position ``start``."""
+        start = max(0, start)
+        with self._lock:
+            return [self.jobs[job_id] for job_id in self._job_order[start:start + count]]
+    
+    def _journal_update(self, job: DownloadJob):
+        """Record a job's state change (written in the background). Safe to call from any thread."""
+        if self.journal and not self._shutting_down:
+            self.journal.update(job)
+    
+    def has_active_jobs(self) -> bool:
+        """Check whether any job is queued or running."""
+        with self._lock:
+            return bool(self._pending_count or self._running)
+    
+    def get_queue_counts(self) -> Dict[str, int]:
+        """Get the number of jobs in each state."""
+        with self._lock:
+            counts = {state: 0 for state in (JobState.QUEUED, JobState.RUNNING) + JobState.FINISHED}
+            for job in self.jobs.values():
+                counts[job.state] += 1
+            return counts
+    
+    def get_progress(self) -> Dict[str, float]:
+        """Get progress and file counters of the jobs queued since the queue was last idle.
+        
+        Each job counts as one unit of progress; running jobs contribute
+        the share of their files processed when the total is known.
+        """
+        progress = float(self._batch_finished)
+        files, skipped, failed = self._batch_files
+        with self._lock:
+            running = list(self._running.values())
+        for job in running:
+            progress += job.fraction_done or 0.0
+            files += job.files_done
+            skipped += job.files_skipped
+            failed += job.files_failed
+        
+        elapsed = time.time() - self._batch_started if self._batch_size else 0.0
+        return {
+            "jobs": self._batch_size,
+            "progress": progress,
+            "files": files,
+            "skipped": skipped,
+            "failed": failed,
+            "files_per_second": (files + skipped) / elapsed if elapsed > 0 else 0.0,
+        }
+    
+    def _on_max_workers_changed(self, *args):
+        """Pick up a new worker limit from the settings variable."""
+        self.max_workers = self.app_state.get_max_workers()
+        if self.worker_pool:
+            self.worker_pool.resize(self.max_workers)
+        with self._lock:
+            self.host_limiter.set_adaptive(self.host_limiter.adaptive, self.max_workers)
+        self._schedule()
+    
+    def _on_engine_changed(self, *args):
+        """Pick up a new execution engine for jobs started from now on."""
+        self.engine = self.app_state.engine_var.get()
+        self._prepare_engine()
+    
+    def _on_worker_recycle_changed(self, *args):
+        """Pick up a new recycle limit for pooled workers."""
+        if self.worker_pool:
+            self.worker_pool.resize(self.max_workers, self.app_state.get_worker_recycle_jobs())
+    
+    def _prepare_engine(self):
+        """Warm up the selected engine so the first job starts quickly.
+        
+        gallery_dl is looked for (and for the in-process engine imported) in
+        the background; a warning is logged if it is missing.
+        """
+        if self.engine != GalleryDLService.ENGINE_SUBPROCESS:
+            InProcessEngine.warm_up(self._engine_unavailable,
+                                    import_modules=self.engine == GalleryDLService.ENGINE_INPROCESS)
+        if self.engine == GalleryDLService.ENGINE_POOL:
+            if self.worker_pool is None:
+                self.worker_pool = WorkerPool(self.max_workers, self.app_state.get_worker_recycle_jobs())
+            self.worker_pool.warm_up()
+        elif self.worker_pool:
+            self.worker_pool.shutdown()
+            self.worker_pool = None
+    
+    def _engine_unavailable(self):
+        """Warn that jobs run as subprocesses; called from the warm-up thread."""
+        self.message_bus.log("⚠ gallery_dl module not importable - using subprocess engine")
+    
+    def apply_host_limits(self):
+        """Load per-site limits from the application state."""
+        limits = {
+            site: HostLimit(int(values.get("max_concurrent", 0)), float(values.get("starts_per_minute", 0)))
+            for site, values in self.app_state.host_limits.items()
+        }
+        default = HostLimit(*self.app_state.get_default_host_limit())
+        with self._lock:
+            self.host_limiter.update(limits, default)
+            self.host_limiter.set_adaptive(self.app_state.adaptive_limits_var.get(), self.max_workers)
+            adaptive = self.host_limiter.adaptive_limits()
+        self.message_bus.post(AdaptiveLimitsMessage(adaptive))
+        self._schedule()
+    
+    def _adapt_limit(self, job: DownloadJob, throttle_reason: Optional[str] = None):
+        """Feed a job outcome to the adaptive per-site limit. Safe to call from any thread.
+        
+        Without a throttle reason the job counts as a success.
+        """
+        now = time.time()
+        with self._lock:
+            key = self._limit_keys.get(job.id)
+            if key is None or not self.host_limiter.adaptive:
+                return
+            if throttle_reason:
+                reason = f"#{job.id}: {throttle_reason}"
+                change = self.host_limiter.on_throttled(key, reason, now)
+            else:
+                reason = f"#{job.id} succeeded"
+                change = self.host_limiter.on_success(key, reason, now, job.started_at or 0.0)
+            if change is None:
+                return
+            adaptive = self.host_limiter.adaptive_limits()
+        
+        old, new = change
+        self.message_bus.log(f"[{key}] Parallel jobs {old} → {new} ({reason})")
+        self.message_bus.post(AdaptiveLimitsMessage(adaptive))
+    
+    def set_priority(self, job_id: int, priority: int):
+        """Change the priority of a queued or running job."""
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.is_finished:
+                return
+            job.priority = JobPriority.clamp(priority)
+            if job.state == JobState.QUEUED and job.retry_at is None:
+                self._pop_pending(job)
+                self._push_pending(job)
+        self._journal_update(job)
+        self.message_callback("job_update", job)
+        self._schedule()
+    
+    def _on_queue_policy_changed(self, *args):
+        """Reorder the queue for a new queue policy."""
+        with self._lock:
+            self.queue_policy = self.app_state.queue_policy_var.get()
+            queued = [job for job in self._queued_jobs() if job.retry_at is None]
+            for job in queued:
+                self._pop_pending(job)
+            self._pending.clear()
+            for job in queued:
+                self._push_pending(job)
+        self._schedule()
+    
+    def _on_bandwidth_limit_changed(self, *args):
+        """Apply a new total bandwidth budget to jobs started from now on."""
+        with self._lock:
+            self.bandwidth.budget = self.app_state.get_bandwidth_limit()
+            if not self.bandwidth.enabled:
+                self.bandwidth.allocations.clear()
+        self._schedule()
+    
+    def _on_retry_policy_changed(self, *args):
+        self.retry_policy = self.app_state.get_retry_policy()
+    
+    def _on_preempt_changed(self, *args):
+        self.preempt = self.app_state.preempt_var.get()
+        self._schedule()
+    
+    def _estimate(self, job: DownloadJob) -> Optional[float]:
+        """Guess a job's run time from earlier runs of its URL or host. Called with _lock held."""
+        if job.url in self._durations:
+            return self._durations[job.url]
+        total = self._host_durations.get(job.host)
+        return total[0] / total[1] if total else None
+    
+    def _record_duration(self, job: DownloadJob):
+        """Remember the run time of a completed job. Called with _lock held."""
+        duration = job.duration
+        if duration is None:
+            return
+        self._durations[job.url] = duration
+        total = self._host_durations.setdefault(job.host, [0.0, 0])
+        total[0] += duration
+        total[1] += 1
+    
+    def _sort_key(self, job: DownloadJob) -> tuple:
+        """Get the position of a job in the queue under the current policy."""
+        if self.queue_policy == QueuePolicy.FIFO:
+            return (job.id,)
+        if self.queue_policy == QueuePolicy.SHORTEST_FIRST:
+            estimate = job.estimate if job.estimate is not None else math.inf
+            return (-job.priority, estimate, job.id)
+        return (-job.priority, job.id)
+    
+    def _push_pending(self, job: DownloadJob):
+        """Add a job to its host's queue. Called with _lock held."""
+        seq = next(self._entry_counter)
+        self._entry_seq[job.id] = seq
+        heapq.heappush(self._pending.setdefault(job.host, []), (self._sort_key(job), seq, job))
+        self._pending_count += 1
+    
+    def _delay_pending(self, job: DownloadJob, delay: float):
+        """Queue a job that may only start after ``delay`` seconds. Called with _lock held."""
+        seq = next(self._entry_counter)
+        self._entry_seq[job.id] = seq
+        job.retry_at = time.time() + delay
+        heapq.heappush(self._delayed, (time.monotonic() + delay, seq, job))
+        self._pending_count += 1
+    
+    def _release_delayed(self, now: float) -> Optional[float]:
+        """Move delayed jobs that are due into the queue. Called with _lock held.
+        
+        Returns the seconds until the next delayed job is due, if any.
+        """
+        while self._delayed:
+            ready_at, seq, job = self._delayed[0]
+            if self._entry_seq.get(job.id) != seq:
+                heapq.heappop(self._delayed)
+            elif ready_at <= now:
+                heapq.heappop(self._delayed)
+                self._pop_pending(job)
+                job.retry_at = None
+                self._push_pending(job)
+            else:
+                return ready_at - now
+        return None
+    
+    def _pop_pending(self, job: DownloadJob):
+        """Remove a job from the queue. Called with _lock held."""
+        if self._entry_seq.pop(job.id, None) is None:
+            return
+        self._pending_count -= 1
+        self._head(job.host)
+    
+    def _head(self, host: str) -> Optional[DownloadJob]:
+        """Get the first queued job of a host, dropping stale heap entries. Called with _lock held."""
+        heap = self._pending.get(host)
+        while heap and self._entry_seq.get(heap[0][2].id) != heap[0][1]:
+            heapq.heappop(heap)
+        if not heap:
+            self._pending.pop(host, None)
+            return None
+        return heap[0][2]
+    
+    def _queued_jobs(self) -> List[DownloadJob]:
+        """Get all queued jobs in queue order. Called with _lock held."""
+        entries = [entry for heap in self._pending.values() for entry in heap
+                   if self._entry_seq.get(entry[2].id) == entry[1]]
+        delayed = [job for _, seq, job in sorted(self._delayed, key=lambda entry: entry[:2])
+                   if self._entry_seq.get(job.id) == seq]
+        return [job for _, _, job in sorted(entries, key=lambda entry: entry[:2])] + delayed
+    
+    def _next_startable_job(self, now: float):
+        """Find the first queued job, by queue policy, whose host may start a job now.
+        
+        Returns (job, None), or (None, seconds until a rate limit allows a
+        start) when every queued host is blocked. Called with _lock held.
+        """
+        best = None
+        best_key = None
+        wait = math.inf
+        for host in list(self._pending):
+            job = self._head(host)
+            if job is None:
+                continue
+            host_wait = self.host_limiter.check(host, now)
+            if host_wait > 0:
+                wait = min(wait, host_wait)
+                continue
+            key = self._pending[host][0][:2]
+            if best is None or key < best_key:
+                best, best_key = job, key
+        return (best, None) if best else (None, wait)
+    
+    def _preempting(self) -> bool:
+        """Check whether a running job is already being preempted. Called with _lock held."""
+        return any(job.preempt_requested for job in self._running.values())
+    
+    def _preempt(self, victim: DownloadJob, reason: str):
+        """Stop a running job and put it back in the queue. Called with _lock held.
+        
+        gallery-dl resumes partial files and the download archive skips
+        finished ones, so the job continues where it left off when it is
+        started again.
+        """
+        victim.preempt_requested = True
+        self.message_bus.log(f"[#{victim.id}] {reason}")
+        self._stop_process(victim)
+    
+    @staticmethod
+    def _stop_process(job: DownloadJob):
+        """Terminate a job's process and stop reading its output right away."""
+        if job.drain is not None:
+            job.drain.cancel()
+        if job.process is not None:
+            try:
+                job.process.terminate()
+            except Exception:
+                pass
+    
+    def _preempt_for(self, job: DownloadJob) -> bool:
+        """Stop a lower-priority running job to free a slot for ``job``.
+        
+        Only one job is preempted at a time. Called with _lock held.
+        """
+        if self._preempting():
+            return False
+        victims = [other for other in self._running.values()
+                   if other.priority < job.priority and not other.cancel_requested]
+        if not victims:
+            return False
+        # Lowest priority first, then the job that started last (least work lost)
+        victim = min(victims, key=lambda other: (other.priority, -(other.started_at or 0)))
+        self._preempt(victim, f"Pausing for higher-priority job #{job.id}")
+        return True
+    
+    def _bandwidth_slots(self) -> int:
+        """Get the number of jobs the bandwidth budget is split between. Called with _lock held.
+        
+        The in-process engine shares one gallery-dl config between jobs, so
+        all of them get the same fixed share.
+        """
+        if self.engine == GalleryDLService.ENGINE_INPROCESS:
+            return self.max_workers
+        return max(1, min(self.max_workers, len(self._running) + self._pending_count))
+    
+    def _schedule(self):
+        """Start queued jobs while worker slots are free and host limits allow.
+        
+        Safe to call from any thread.
+        """
+        to_start = []
+        wait = None
+        bandwidth_blocked = False
+        with self._lock:
+            now = time.monotonic()
+            retry_wait = self._release_delayed(now)
+            while self._pending_count and len(self._running) < self.max_workers:
+                job, wait = self._next_startable_job(now)
+                if job is None:
+                    break
+                slots = self._bandwidth_slots()
+                if not self.bandwidth.can_start(slots):
+                    bandwidth_blocked = True
+                    break
+                self._pop_pending(job)
+                job.rate_limit = self.bandwidth.allocate(job.id, slots)
+                self._limit_keys[job.id] = self.host_limiter.acquire(job.host, now)
+                job.state = JobState.RUNNING
+                job.attempts += 1
+                job.reset_progress()
+                job.started_at = time.time()
+                if job.first_started_at is None:
+                    job.first_started_at = job.started_at
+                job.finished_at = None
+                job.exit_code = None
+                job.error = ""
+                self._running[job.id] = job
+                to_start.append(job)
+            
+            # All slots busy: make room for a higher-priority job
+            if (self.preempt and self.queue_policy != QueuePolicy.FIFO
+                    and self._pending_count and len(self._running) >= self.max_workers):
+                job, _ = self._next_startable_job(now)
+                if job is not None:
+                    self._preempt_for(job)
+            
+            # Bandwidth used up by jobs that started with a larger share:
+            # restart the biggest one with the current share
+            if bandwidth_blocked and not self._preempting():
+                victim = self._running.get(self.bandwidth.rebalance_candidate(self._bandwidth_slots()))
+                if victim is not None and not victim.cancel_requested:
+                    self._preempt(victim, "Restarting with a smaller share of the bandwidth limit")
+        
+        if retry_wait is not None and (wait is None or retry_wait < wait):
+            wait = retry_wait
+        if wait is not None and wait != math.inf:
+            self._schedule_wakeup(wait)
+        
+        for job in to_start:
+            self._journal_update(job)
+            self.message_bus.post(JobUpdateMessage(job))
+            worker = threading.Thread(target=self._download_worker, args=(job,))
+            worker.daemon = True
+            worker.start()
+    
+    def _schedule_wakeup(self, delay: float):
+        """Run the scheduler again once a rate-limited host can start a job."""
+        with self._lock:
+            wakeup_at = time.monotonic() + delay
+            if self._wakeup_timer is not None:
+                if self._wakeup_at <= wakeup_at:
+                    return
+                self._wakeup_timer.cancel()
+            self._wakeup_at = wakeup_at
+            self._wakeup_timer = threading.Timer(delay, self._on_wakeup)
+            self._wakeup_timer.daemon = True
+            self._wakeup_timer.start()
+    
+    def _on_wakeup(self):
+        """Timer callback for rate-limited hosts."""
+        with self._lock:
+            self._wakeup_timer = None
+        self._schedule()
+    
+    def _download_worker(self, job: DownloadJob):
+        """Download worker thread for a single job."""
+        if job.output is not None:
+            job.output.remove()
+        output = job.output = JobOutputLog(job.id)
+        classifier = ErrorClassifier()
+        prefix = f"[#{job.id}]"
+        throttled = False
+        retry_delay = None
+        try:
+            cmd = list(job.cmd)
+            if job.rate_limit:
+                # The URL is always the last argument
+                cmd[-1:-1] = ["--limit-rate", str(int(job.rate_limit))]
+            self.message_bus.log(f"{prefix} Starting download: {' '.join(cmd)}")
             
             # Create download process
-            self.app_state.download_process = GalleryDLService.create_download_process(cmd)
+            process = GalleryDLService.create_download_process(cmd, self.engine, self.worker_pool)
+            job.drain = OutputDrain(process.stdout)
+            job.process = process
+            if job.cancel_requested or job.preempt_requested:
+                self._stop_process(job)
             
-            # Read output and store for analysis
-            for line in iter(self.app_state.download_process.stdout.readline, ''):
-                if not self.app_state.is_downloading:
-                    break
-                line_stripped = line.strip()
-                if line_stripped:
-                    output_lines.append(line_stripped)
-                    self.message_queue.put(("log", line_stripped))
+            # Read output, update file counters and store for analysis
+            for lines in job.drain.batches():
+                now = time.time()
+                for line in lines:
+                    line_stripped = line.strip()
+                    if not line_stripped:
+                        continue
+                    job.last_output_at = now
+                    event = OutputParser.parse(line_stripped)
+                    if event.kind == EventKind.FILE_STARTED:
+                        continue
+                    self._count_event(job, event)
+                    output.append(line_stripped, event.kind)
+                    self.message_bus.log(f"{prefix} {line_stripped}")
+                    
+                    rule = classifier.feed(line_stripped, event.kind)
+                    if rule is not None and rule.rank >= SEVERITIES.index("error"):
+                        # Show the likely failure reason of an error or warning
+                        # line while the job still runs
+                        job.error = rule.hint
+                        self.message_bus.log(f"{prefix} Detected {rule.category} error: {rule.hint}")
+                        self.message_bus.post(JobUpdateMessage(job))
+                    if classifier.throttle_reason and not throttled:
+                        # Back off as soon as the site pushes back, even if
+                        # gallery-dl's own retries later succeed
+                        throttled = True
+                        self._adapt_limit(job, classifier.throttle_reason)
             
-            self.app_state.download_process.wait()
+            if job.cancel_requested or job.preempt_requested:
+                try:
+                    process.wait(self.STOP_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    try:
+                        process.wait(self.STOP_TIMEOUT)
+                    except subprocess.TimeoutExpired:
+                        # In-process jobs only stop between files; let them finish unattended
+                        pass
+            else:
+                process.wait()
+            job.exit_code = process.returncode
             
-            if self.app_state.download_process.returncode == 0:
-                self.message_queue.put(("status", "Download completed successfully"))
-                self.message_queue.put(("log", "✓ Download completed"))
+            if job.cancel_requested:
+                job.state = JobState.CANCELLED
+                self.message_bus.log(f"{prefix} Download stopped by user")
+            elif job.preempt_requested:
+                self.message_bus.log(f"{prefix} Stopped by the scheduler, back in queue")
+            elif job.exit_code == 0:
+                job.state = JobState.COMPLETED
+                self.message_bus.log(f"{prefix} ✓ Download completed")
+                if not throttled:
+                    self._adapt_limit(job)
             else:
-                exit_code = self.app_state.download_process.returncode
-                error_desc = GalleryDLService.get_error_description(exit_code)
+                job.state = JobState.FAILED
+                if job.exit_code == 4 and not throttled:
+                    self._adapt_limit(job, "network error (exit code 4)")
+                job.error = GalleryDLService.get_error_description(job.exit_code)
                 
-                # Analyze output for more specific error context
-                error_context = GalleryDLService.analyze_error_output(output_lines, exit_code)
+                # More specific error context, classified while the output arrived
+                rule = classifier.result(job.exit_code)
+                error_context = rule.hint if rule else None
                 
-                self.message_queue.put(("status", "Download failed"))
-                self.message_queue.put(("log", f"✗ Download failed (exit code: {exit_code})"))
-                self.message_queue.put(("log", f"  Reason: {error_desc}"))
+                self.message_bus.log(f"{prefix} ✗ Download failed (exit code: {job.exit_code})")
+                self.message_bus.log(f"  Reason: {job.error}")
                 if error_context:
-                    self.message_queue.put(("log", f"  Context: {error_context}"))
+                    job.error = error_context
+                    self.message_bus.log(f"  Context: {error_context}")
+                
+                output.close()  # Writes the output held in memory to the spill file
+                if output.lines > JobOutputLog.TAIL_LINES and output.spill_path is not None:
+                    self.message_bus.log(f"  Output: {output.lines} lines, {output.errors} error(s), "
+                                         f"{output.warnings} warning(s), saved to {output.spill_path}")
                 
+                if GalleryDLService.is_retryable(job.exit_code, classifier):
+                    policy = self.retry_policy
+                    retry_delay = policy.next_delay(job.attempts, job.first_started_at or job.started_at,
+                                                    time.time())
+                    if retry_delay is not None:
+                        self.message_bus.log(f"  Retrying in {retry_delay:.0f}s "
+                                             f"(attempt {job.attempts + 1} of {policy.max_attempts})")
+                    elif policy.max_attempts > 1:
+                        self.message_bus.log(f"  Giving up after {job.attempts} attempt(s)")
+        
         except Exception as e:
-            self.message_queue.put(("status", "Download error"))
-            self.message_queue.put(("log", f"✗ Error: {str(e)}"))
+            job.state = JobState.FAILED
+            job.error = str(e)
+            self.message_bus.log(f"{prefix} ✗ Error: {str(e)}")
         finally:
-            self.message_queue.put(("finished", None))
+            if job.drain is not None:
+                job.drain.cancel()  # Keep draining the pipe if reading stopped early
+            job.process = None
+            job.drain = None
+            output.close()
+            with self._lock:
+                self._running.pop(job.id, None)
+                self.host_limiter.release(self._limit_keys.pop(job.id))
+                self.bandwidth.release(job.id)
+                preempted = job.preempt_requested and job.state == JobState.RUNNING
+                job.preempt_requested = False
+                if preempted and job.cancel_requested:
+                    job.state = JobState.CANCELLED
+                    preempted = False
+                retry = retry_delay is not None and job.state == JobState.FAILED and not job.cancel_requested
+                requeued = preempted or retry
+                if preempted:
+                    # A run stopped by the scheduler does not count against the retry budget
+                    job.attempts -= 1
+                    job.state = JobState.QUEUED
+                    self._push_pending(job)
+                elif retry:
+                    job.state = JobState.QUEUED
+                    self._delay_pending(job, retry_delay)
+                else:
+                    job.finished_at = time.time()
+                    if job.state == JobState.COMPLETED:
+                        self._record_duration(job)
+            self._journal_update(job)
+            self.message_bus.post(JobUpdateMessage(job) if requeued else JobFinishedMessage(job))
+            self._schedule()
     
-    def stop_download(self):
-        """Stop current download."""
-        if self.app_state.download_process and self.app_state.is_downloading:
-            self.app_state.is_downloading = False
+    @staticmethod
+    def _count_event(job: DownloadJob, event: OutputEvent):
+        """Update a job's file counters from an output event."""
+        if event.kind == EventKind.FILE_DONE:
+            job.files_done += 1
+        elif event.kind == EventKind.FILE_SKIPPED:
+            job.files_skipped += 1
+        elif event.kind == EventKind.ERROR:
+            job.files_failed += 1
+        if "total" in event.data:
             try:
-                self.app_state.download_process.terminate()
-                self.message_callback("log", "Download stopped by user")
-            except:
+                job.files_total = int(event.data["total"])
+            except (TypeError, ValueError):
                 pass
     
-    def process_messages(self) -> bool:
-        """Process messages from download thread. Returns True if messages were processed."""
-        messages_processed = False
-        try:
-            while True:
-                message_type, message = self.message_queue.get_nowait()
-                messages_processed = True
+    def stop_download(self, job_id: Optional[int] = None):
+        """Stop one job, or every queued and running job if no ID is given."""
+        with self._lock:
+            if job_id is None:
+                targets = self._queued_jobs()
+                targets += list(self._running.values())
+            else:
+                job = self.jobs.get(job_id)
+                targets = [job] if job and not job.is_finished else []
+            
+            cancelled = []
+            for job in targets:
+                job.cancel_requested = True
+                if job.state == JobState.QUEUED:
+                    self._pop_pending(job)
+                    job.state = JobState.CANCELLED
+                    job.finished_at = time.time()
+                    cancelled.append(job)
+                else:
+                    self._stop_process(job)
+        
+        if job_id is None:
+            self.cancel_import()
+        for job in cancelled:
+            self._journal_update(job)
+            if job_id is not None:
+                self.message_callback("log", f"[#{job.id}] Removed from queue")
+            self.message_bus.post(JobFinishedMessage(job))
+        if job_id is None and cancelled:
+            self.message_callback("log", f"Removed {len(cancelled)} job(s) from queue")
+    
+    def shutdown(self):
+        """Stop all jobs and release worker processes.
+        
+        Queued and running jobs stay unfinished in the journal, so they are
+        resumed on the next start.
+        """
+        self._shutting_down = True
+        self.message_bus.close()
+        self.cancel_batch_test()
+        self.stop_download()
+        if self.worker_pool:
+            self.worker_pool.shutdown()
+        if self.journal:
+            self.journal.close()
+        if self.test_cache:
+            self.test_cache.close()
+    
+    def clear_finished(self) -> List[int]:
+        """Forget finished jobs. Returns the IDs that were removed."""
+        with self._lock:
+            finished = [job_id for job_id, job in self.jobs.items() if job.is_finished]
+            for job_id in finished:
+                job = self.jobs.pop(job_id)
+                if job.output is not None:
+                    job.output.remove()
+            self._job_order = [job_id for job_id in self._job_order if job_id in self.jobs]
+        if self.journal:
+            self.journal.delete(finished)
+        self.message_bus.post(QueueChangedMessage())
+        return finished
+    
+    def process_messages(self, budget: float = 0.05) -> bool:
+        """Process messages from background threads.
+        
+        Coalesced state changes are handled first, then events, then log
+        lines, which are handed to the UI in "log_lines" batches. Stops
+        after ``budget`` seconds so a flood of messages cannot freeze the
+        window; returns True if messages are still waiting.
+        """
+        deadline = time.monotonic() + budget
+        for message in self.message_bus.take_latest():
+            self._message_handlers[type(message)](message)
+                
+        while time.monotonic() < deadline:
+            message = self.message_bus.take_event()
+            if message is None:
+                break
+            self._message_handlers[type(message)](message)
                 
-                if message_type == "log":
-                    self.message_callback("log", message)
-                elif message_type == "status":
-                    self.message_callback("status", message)
-                elif message_type == "finished":
-                    self._finish_download()
-                elif message_type == "test_finished":
-                    self._finish_test()
+        while time.monotonic() < deadline:
+            lines, dropped = self.message_bus.take_logs(self.LOG_BATCH_LINES)
+            if dropped:
+                self.message_callback("log", f"... {dropped} log line(s) dropped while the window was busy")
+            if not lines:
+                break
+            self.message_callback("log_lines", lines)
                     
-        except queue.Empty:
-            pass
-        
-        return messages_processed
+        self._refresh_progress()
+        return self.message_bus.pending()
+    
+    def next_refresh(self) -> Optional[float]:
+        """Get the seconds until running jobs need a progress refresh, or None if no queue runs."""
+        if not self._queue_active:
+            return None
+        return max(0.0, self.PROGRESS_INTERVAL - (time.monotonic() - self._last_progress))
+    
+    def _refresh_progress(self):
+        """Periodically update counters of running jobs and overall progress."""
+        now = time.monotonic()
+        if not self._queue_active or now - self._last_progress < self.PROGRESS_INTERVAL:
+            return
+        self._last_progress = now
+        with self._lock:
+            running = list(self._running.values())
+        for job in running:
+            self.message_callback("job_update", job)
+        self.message_callback("progress", self.get_progress())
     
-    def _finish_download(self):
-        """Clean up after download."""
-        self.app_state.is_downloading = False
-        self.app_state.download_process = None
+    def _post_queue_status(self):
+        """Show a queue summary in the status bar."""
+        with self._lock:
+            running, queued = len(self._running), self._pending_count
+        if running or queued:
+            self.message_callback("status", f"Downloading... ({running} running, {queued} queued)")
+    
+    def _finish_job(self, job: DownloadJob):
+        """Update the UI after a job has finished."""
+        self.message_callback("job_update", job)
+        self._batch_finished += 1
+        self._batch_files[0] += job.files_done
+        self._batch_files[1] += job.files_skipped
+        self._batch_files[2] += job.files_failed
+        self.message_callback("progress", self.get_progress())
+        
+        if self.has_active_jobs():
+            self._post_queue_status()
+            return
+        if not self._queue_active:
+            return
+        self._queue_active = False
+        
+        counts = self.get_queue_counts()
+        if counts[JobState.FAILED]:
+            self.message_callback("status", f"Queue finished with {counts[JobState.FAILED]} failed job(s)")
+        elif counts[JobState.COMPLETED]:
+            self.message_callback("status", "Download completed successfully")
+        else:
+            self.message_callback("status", "Download stopped")
         self.message_callback("download_finished", None)
     
+    def _add_import_chunk(self, jobs: List[DownloadJob]):
+        """Queue a chunk of imported jobs (Tk thread)."""
+        self._import_slots.release()
+        if self._import_cancel is None or self._import_cancel.is_set() or self._shutting_down:
+            # Import was stopped after this chunk was written to the journal
+            if self.journal and not self._shutting_down:
+                self.journal.delete([job.id for job in jobs])
+            return
+        self._add_jobs(jobs)
+    
+    def _finish_import(self, source: str, stats: ImportStats, error: Optional[str]):
+        """Report the result of a URL import (Tk thread)."""
+        cancelled = self._import_cancel is not None and self._import_cancel.is_set()
+        self._import_cancel = None
+        if error:
+            self.message_callback("log", f"✗ Import from {source} failed: {error}")
+        summary = (f"{stats.added} URL(s) queued, {stats.duplicates} duplicate(s), "
+                   f"{stats.invalid} invalid")
+        if stats.options:
+            summary += f", {stats.options} option line(s) ignored"
+        self.message_callback("log", f"Import from {source} {'stopped' if cancelled else 'finished'}: {summary}")
+        if self.has_active_jobs():
+            self._post_queue_status()
+        else:
+            self.message_callback("status", "Ready")
+    
     def _finish_test(self):
         """Clean up after URL test."""
         self.app_state.is_testing = False
-        if not self.app_state.is_downloading:
+        if not self.has_active_jobs():
             self.message_callback("status", "Ready")
         self.message_callback("test_finished", None)
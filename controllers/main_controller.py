@@ -1,15 +1,19 @@
 """
 Main application controller for Gallery-DL GUI.
 """
+import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+from typing import List, Optional
 from models.settings import AppState
 from controllers.download_controller import DownloadController
 from views.download_tab import DownloadTab
 from views.advanced_tab import AdvancedTab
+from views.test_tab import UrlTestTab
 from views.about_tab import AboutTab
-from utils.gallery_dl_service import GalleryDLService
 from utils.file_utils import FileUtils
+from utils.url_import import UrlImporter
+from utils.ui_wakeup import UiWakeup
 
 
 class MainController:
@@ -28,7 +32,8 @@ class MainController:
         # Setup UI
         self._setup_window()
         self._create_views()
-        self._check_gallery_dl()
+        self.download_controller.check_installation()
+        self.download_controller.resume_jobs()
         self._start_message_processing()
     
     def _setup_window(self):
@@ -67,47 +72,77 @@ class MainController:
             'test_url': self._test_url,
             'browse_folder': self._browse_folder,
             'start_download': self._start_download,
+            'import_file': self._import_file,
+            'import_text': self._import_text,
             'stop_download': self._stop_download,
+            'cancel_job': self._cancel_job,
+            'show_job_log': self._show_job_log,
+            'change_priority': self._change_priority,
+            'queue_size': self.download_controller.job_count,
+            'queue_jobs': self.download_controller.jobs_in_view,
+            'clear_finished': self._clear_finished,
+            'host_limits_changed': self._host_limits_changed,
+            'clear_test_cache': self._clear_test_cache,
+            'gallery_dl_path_changed': self._gallery_dl_path_changed,
+            'test_history': self._test_history,
+            'test_list': self._test_list,
+            'stop_batch_test': self._stop_batch_test,
+            'download_urls': self._download_urls,
             'save_settings': self._save_settings,
             'reset_settings': self._reset_settings
         }
         
         # Create tabs
         self.download_tab = DownloadTab(self.notebook, self.app_state, callbacks)
+        self.test_tab = UrlTestTab(self.notebook, self.app_state, callbacks)
         self.advanced_tab = AdvancedTab(self.notebook, self.app_state, callbacks)
         self.about_tab = AboutTab(self.notebook, self.app_state)
         
         # Initialize URL history
         self.download_tab.update_url_history()
     
-    def _check_gallery_dl(self):
-        """Check if gallery-dl is installed."""
-        success, message = GalleryDLService.check_installation()
-        
+    def _show_installation(self, success: bool, message: str):
+        """Report whether gallery-dl is installed."""
         if success:
             self.download_tab.log_message(f"✓ {message}")
         else:
             self.download_tab.log_message(f"⚠ {message}")
     
     def _start_message_processing(self):
-        """Start processing messages from background threads."""
-        self._process_messages()
+        """Start processing messages from background threads as they are posted."""
+        self.wakeup = UiWakeup(self.root, self._process_messages)
+        self.download_controller.message_bus.on_post = self.wakeup.wake
+        self.wakeup.start()
     
     def _process_messages(self):
-        """Process messages from download controller."""
-        self.download_controller.process_messages()
+        """Process messages from download controller.
         
-        # Schedule next check
-        self.root.after(100, self._process_messages)
+        Returns the seconds until it has to run again without new messages:
+        at once if messages are left over, else when progress is due.
+        """
+        backlog = self.download_controller.process_messages(self.app_state.get_frame_budget())
+        if backlog:
+            return 0
+        return self.download_controller.next_refresh()
     
     def _handle_message(self, message_type: str, message: str):
         """Handle messages from controllers."""
         if message_type == "log":
             self.download_tab.log_message(message)
+        elif message_type == "log_lines":
+            self.download_tab.log_messages(message)
         elif message_type == "status":
             self.app_state.status_var.set(message)
         elif message_type == "error":
             messagebox.showerror("Error", message)
+        elif message_type == "job_update":
+            self.download_tab.update_job(message)
+        elif message_type == "queue_changed":
+            self.download_tab.refresh_queue()
+        elif message_type == "progress":
+            self.download_tab.update_progress(message)
+        elif message_type == "adaptive_limits":
+            self.advanced_tab.update_adaptive_limits(message)
         elif message_type == "download_started":
             self.download_tab.set_download_state(True)
         elif message_type == "download_finished":
@@ -115,6 +150,14 @@ class MainController:
             self.download_tab.update_url_history()
         elif message_type == "test_finished":
             self.download_tab.set_test_state(False)
+        elif message_type == "installation":
+            self._show_installation(*message)
+        elif message_type == "test_result":
+            self.test_tab.add_result(message)
+        elif message_type == "batch_test_started":
+            self.test_tab.set_running(True)
+        elif message_type == "batch_test_finished":
+            self.test_tab.set_running(False)
     
     def _test_url(self):
         """Test URL without downloading."""
@@ -131,10 +174,87 @@ class MainController:
         """Start download process."""
         self.download_controller.start_download()
     
+    def _import_file(self):
+        """Queue all URLs of a text file or gallery-dl input file."""
+        path = filedialog.askopenfilename(
+            title="Import URL List",
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if path:
+            self.download_controller.import_urls(lambda: UrlImporter.read_file(path),
+                                                 os.path.basename(path))
+    
+    def _import_text(self, text: str):
+        """Queue all URLs of a pasted block of text."""
+        self.download_controller.import_urls(lambda: UrlImporter.read_text(text), "clipboard")
+    
+    def _test_history(self):
+        """Test every URL of the URL history."""
+        history = list(self.app_state.url_history)
+        if not history:
+            messagebox.showinfo("Test URL History", "The URL history is empty")
+            return
+        self.download_controller.test_urls(lambda: history, "URL history")
+    
+    def _test_list(self):
+        """Test every URL of a text file or gallery-dl input file."""
+        path = filedialog.askopenfilename(
+            title="Test URL List",
+            filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if path:
+            self.download_controller.test_urls(lambda: UrlImporter.read_file(path),
+                                               os.path.basename(path))
+    
+    def _stop_batch_test(self):
+        """Stop testing a URL list."""
+        self.download_controller.cancel_batch_test()
+    
+    def _download_urls(self, urls: List[str]):
+        """Queue a list of URLs, e.g. the ones that passed a test."""
+        self.download_controller.import_urls(lambda: urls, "test results")
+    
     def _stop_download(self):
-        """Stop current download."""
+        """Stop all queued and running downloads."""
         self.download_controller.stop_download()
     
+    def _cancel_job(self, job_id: int):
+        """Cancel a single queued or running download."""
+        self.download_controller.stop_download(job_id)
+    
+    def _show_job_log(self, job_id: int):
+        """Open the output of a job."""
+        job = self.download_controller.jobs.get(job_id)
+        if job is None:
+            return
+        if job.output is None:
+            self.download_tab.log_message(f"[#{job_id}] No output yet")
+            return
+        self.download_tab.show_job_log(job)
+    
+    def _change_priority(self, job_id: int, delta: int):
+        """Raise or lower the priority of a queued or running download."""
+        job = self.download_controller.jobs.get(job_id)
+        if job:
+            self.download_controller.set_priority(job_id, job.priority + delta)
+    
+    def _clear_finished(self):
+        """Remove finished jobs from the queue view."""
+        self.download_controller.clear_finished()
+    
+    def _host_limits_changed(self):
+        """Apply edited per-site limits to the download queue."""
+        self.download_controller.apply_host_limits()
+    
+    def _gallery_dl_path_changed(self):
+        """Look for gallery-dl again after the pinned path was changed."""
+        self.download_tab.log_message("Checking gallery-dl installation...")
+        self.download_controller.check_installation(recheck=True)
+    
+    def _clear_test_cache(self, url: Optional[str]):
+        """Forget cached URL test results of one URL, or all of them."""
+        removed = self.download_controller.invalidate_test_cache(url)
+        target = url if url else "all URLs"
+        self.download_tab.log_message(f"Forgot {removed} cached test result(s) for {target}")
+    
     def _save_settings(self):
         """Save current settings."""
         success = self.app_state.save_settings()
@@ -150,6 +270,9 @@ class MainController:
                               "Are you sure you want to reset all settings to defaults?"):
             self.app_state.reset_to_defaults()
             self.download_tab.update_url_history()
+            self.advanced_tab.update_host_limits()
+            self.download_controller.apply_host_limits()
+            self.download_controller.check_installation()
             self.download_tab.log_message("Settings reset to defaults")
     
     def _on_closing(self):
@@ -158,10 +281,14 @@ class MainController:
             # Cleanup CEF resources if available
             if hasattr(self, 'about_tab') and hasattr(self.about_tab, 'cleanup'):
                 self.about_tab.cleanup()
+            if hasattr(self, 'download_tab'):
+                self.download_tab.cleanup()
+            if hasattr(self, 'wakeup'):
+                self.wakeup.close()
             
             # Stop any running downloads
             if hasattr(self, 'download_controller') and self.download_controller:
-                self.download_controller.stop_download()
+                self.download_controller.shutdown()
             
         except Exception as e:
             print(f"Error during cleanup: {e}")
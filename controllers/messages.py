@@ -0,0 +1,191 @@
+"""
+Typed messages from background threads to the UI thread, and the bounded bus that carries them.
+"""
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from models.job import DownloadJob
+from utils.gallery_dl_service import UrlTestResult
+from utils.rate_limiter import AdaptiveLimit
+from utils.url_import import ImportStats
+
+
+@dataclass
+class Message:
+    """Base class of all messages posted to the UI thread."""
+    
+    def coalesce_key(self) -> Optional[Hashable]:
+        """Messages with the same key replace each other while they wait; None keeps every message."""
+        return None
+
+
+@dataclass
+class LogMessage(Message):
+    text: str
+
+
+@dataclass
+class StatusMessage(Message):
+    text: str
+    
+    def coalesce_key(self) -> Optional[Hashable]:
+        return "status"
+
+
+@dataclass
+class JobUpdateMessage(Message):
+    """A job changed state or counters; only the latest update per job is delivered."""
+    job: DownloadJob
+    
+    def coalesce_key(self) -> Optional[Hashable]:
+        return ("job", self.job.id)
+
+
+@dataclass
+class QueueChangedMessage(Message):
+    """Jobs were added to or removed from the queue view."""
+    
+    def coalesce_key(self) -> Optional[Hashable]:
+        return "queue"
+
+
+@dataclass
+class AdaptiveLimitsMessage(Message):
+    limits: Dict[str, AdaptiveLimit]
+    
+    def coalesce_key(self) -> Optional[Hashable]:
+        return "adaptive_limits"
+
+
+@dataclass
+class InstallationMessage(Message):
+    found: bool
+    text: str
+    
+    def coalesce_key(self) -> Optional[Hashable]:
+        return "installation"
+
+
+@dataclass
+class JobFinishedMessage(Message):
+    job: DownloadJob
+
+
+@dataclass
+class TestFinishedMessage(Message):
+    pass
+
+
+@dataclass
+class TestResultMessage(Message):
+    result: UrlTestResult
+
+
+@dataclass
+class BatchTestFinishedMessage(Message):
+    source: str
+    stats: ImportStats
+    error: Optional[str] = None
+
+
+@dataclass
+class ImportChunkMessage(Message):
+    jobs: List[DownloadJob]
+
+
+@dataclass
+class ImportFinishedMessage(Message):
+    source: str
+    stats: ImportStats
+    error: Optional[str] = None
+
+
+class MessageBus:
+    """Bounded channel of messages from background threads to the UI thread.
+    
+    Messages wait in three lanes, which the UI drains in this order, so
+    state changes never wait behind output:
+    
+    - coalesced messages (status, job updates, ...): only the latest one
+      per key is kept, so their number is bounded by the number of jobs;
+    - events (finished jobs, test results, import chunks, ...): kept in
+      order; while ``max_events`` are waiting, background threads block
+      until the UI catches up (the UI thread itself never blocks);
+    - log lines: at most ``max_logs`` are kept; when more arrive, the
+      oldest are dropped and counted.
+    
+    ``on_post`` is called after every post, e.g. to wake the UI thread.
+    """
+    
+    MAX_LOGS = 20000
+    MAX_EVENTS = 1000
+    WAIT_TIMEOUT = 0.5  # Seconds between checks for close() while blocked
+    
+    def __init__(self, max_logs: int = MAX_LOGS, max_events: int = MAX_EVENTS):
+        self.max_events = max_events
+        self.on_post: Optional[Callable[[], None]] = None
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)  # Notified when events are taken
+        self._latest: Dict[Hashable, Message] = {}
+        self._events = deque()
+        self._logs = deque(maxlen=max_logs)
+        self._dropped_logs = 0
+        self._closed = False
+    
+    def post(self, message: Message):
+        """Post a message; safe to call from any thread."""
+        key = message.coalesce_key()
+        with self._lock:
+            if isinstance(message, LogMessage):
+                if len(self._logs) == self._logs.maxlen:
+                    self._dropped_logs += 1
+                self._logs.append(message.text)
+            elif key is not None:
+                self._latest[key] = message
+            else:
+                if threading.current_thread() is not threading.main_thread():
+                    while len(self._events) >= self.max_events and not self._closed:
+                        self._space.wait(self.WAIT_TIMEOUT)
+                self._events.append(message)
+        if self.on_post:
+            self.on_post()
+    
+    def log(self, text: str):
+        """Post a log line."""
+        self.post(LogMessage(text))
+    
+    def take_latest(self) -> List[Message]:
+        """Take all coalesced messages, in the order their keys were first posted."""
+        with self._lock:
+            messages = list(self._latest.values())
+            self._latest.clear()
+        return messages
+    
+    def take_event(self) -> Optional[Message]:
+        """Take the oldest event, or None if there is none."""
+        with self._lock:
+            if not self._events:
+                return None
+            message = self._events.popleft()
+            self._space.notify()
+        return message
+    
+    def take_logs(self, limit: int) -> Tuple[List[str], int]:
+        """Take up to ``limit`` log lines; also returns the number of lines dropped since the last call."""
+        with self._lock:
+            count = min(limit, len(self._logs))
+            lines = [self._logs.popleft() for _ in range(count)]
+            dropped, self._dropped_logs = self._dropped_logs, 0
+        return lines, dropped
+    
+    def pending(self) -> bool:
+        """Check whether any message is waiting."""
+        with self._lock:
+            return bool(self._latest or self._events or self._logs)
+    
+    def close(self):
+        """Stop blocking posters; messages can still be posted but nothing waits for space."""
+        with self._lock:
+            self._closed = True
+            self._space.notify_all()
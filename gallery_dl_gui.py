@@ -6,7 +6,11 @@ The application follows the Model-View-Controller (MVC) pattern for better
 code organization and maintainability.
 """
 
+import multiprocessing
+
 from controllers.main_controller import main
 
 if __name__ == "__main__":
+    # Needed for the worker process pool in frozen executables
+    multiprocessing.freeze_support()
     main()
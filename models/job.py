@@ -0,0 +1,117 @@
+"""
+Download job model for Gallery-DL GUI.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+
+class JobState:
+    """Lifecycle states of a download job."""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    
+    FINISHED = (COMPLETED, FAILED, CANCELLED)
+
+
+class JobPriority:
+    """Priorities of download jobs; higher values start first."""
+    LOW = -1
+    NORMAL = 0
+    HIGH = 1
+    
+    NAMES = {HIGH: "High", NORMAL: "Normal", LOW: "Low"}
+    
+    @classmethod
+    def from_name(cls, name: str) -> int:
+        """Get the priority for a display name, defaulting to normal."""
+        for priority, priority_name in cls.NAMES.items():
+            if priority_name.lower() == name.strip().lower():
+                return priority
+        return cls.NORMAL
+    
+    @classmethod
+    def clamp(cls, priority: int) -> int:
+        return max(cls.LOW, min(cls.HIGH, priority))
+
+
+class QueuePolicy:
+    """Orders in which queued jobs are started."""
+    FIFO = "fifo"                 # Queue order, priorities are ignored
+    PRIORITY = "priority"         # Highest priority first, then queue order
+    SHORTEST_FIRST = "shortest"   # Highest priority first, then shortest estimated run time
+    
+    NAMES = {
+        FIFO: "First in, first out",
+        PRIORITY: "Highest priority first",
+        SHORTEST_FIRST: "Shortest estimated first",
+    }
+
+
+@dataclass
+class DownloadJob:
+    """State of a single queued or running gallery-dl download."""
+    id: int
+    url: str
+    cmd: List[str]
+    host: str = ""
+    state: str = JobState.QUEUED
+    priority: int = JobPriority.NORMAL
+    estimate: Optional[float] = None  # Expected run time in seconds, from earlier runs
+    rate_limit: Optional[float] = None  # Share of the bandwidth budget in bytes/s while running
+    attempts: int = 0
+    exit_code: Optional[int] = None
+    error: str = ""
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    first_started_at: Optional[float] = None
+    retry_at: Optional[float] = None  # When a failed job waiting for its retry starts again
+    finished_at: Optional[float] = None
+    cancel_requested: bool = False
+    preempt_requested: bool = False
+    files_done: int = 0
+    files_skipped: int = 0
+    files_failed: int = 0
+    files_total: Optional[int] = None  # Only known when reported by a post-processor
+    last_output_at: Optional[float] = None
+    password_dropped: bool = False  # Resumed without the password its command was queued with
+    process: Any = field(default=None, repr=False, compare=False)
+    drain: Any = field(default=None, repr=False, compare=False)  # OutputDrain of the running process
+    output: Any = field(default=None, repr=False, compare=False)  # JobOutputLog of the latest attempt
+    
+    @property
+    def is_finished(self) -> bool:
+        """Check whether the job has reached a final state."""
+        return self.state in JobState.FINISHED
+    
+    @property
+    def duration(self) -> Optional[float]:
+        """Get elapsed run time in seconds, if the job has started."""
+        if self.started_at is None:
+            return None
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return end - self.started_at
+
+    @property
+    def files_per_second(self) -> float:
+        """Get the number of downloaded and skipped files per second of run time."""
+        duration = self.duration
+        if not duration:
+            return 0.0
+        return (self.files_done + self.files_skipped) / duration
+    
+    @property
+    def fraction_done(self) -> Optional[float]:
+        """Get the share of files processed, if the total number is known."""
+        if not self.files_total:
+            return None
+        return min(1.0, (self.files_done + self.files_skipped + self.files_failed) / self.files_total)
+    
+    def reset_progress(self):
+        """Clear file counters before a new attempt."""
+        self.files_done = self.files_skipped = self.files_failed = 0
+        self.files_total = None
+        self.last_output_at = None
@@ -0,0 +1,214 @@
+"""
+Persistent SQLite journal of download jobs.
+
+Every queued job and each of its state changes is written to a local
+database in WAL mode, so unfinished jobs survive crashes, reboots and
+closing the window, and can be resumed on the next start.
+"""
+import json
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+from models.job import DownloadJob, JobState
+
+
+# Command-line options whose value is not written to disk
+SECRET_OPTIONS = ("-p", "--password")
+SECRET_PLACEHOLDER = "<password>"
+
+
+class JobJournal:
+    """Write-behind store for DownloadJob state.
+    
+    Writes are queued and done in order by a background thread, so callers
+    on the UI thread never wait for SQLite; errors are printed there. Job
+    IDs are assigned by the caller, starting at ``next_id()``. Reads see
+    every write queued before them.
+    """
+    
+    DEFAULT_PATH = Path.home() / ".gallery-dl-gui-jobs.db"
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            url         TEXT NOT NULL,
+            host        TEXT NOT NULL DEFAULT '',
+            argv        TEXT NOT NULL,
+            state       TEXT NOT NULL,
+            attempts    INTEGER NOT NULL DEFAULT 0,
+            exit_code   INTEGER,
+            error       TEXT NOT NULL DEFAULT '',
+            created_at  REAL NOT NULL,
+            started_at  REAL,
+            finished_at REAL,
+            priority    INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+    """
+    
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or self.DEFAULT_PATH)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.SCHEMA)
+        self._migrate()
+        self._writes: "queue.Queue[Optional[Callable[[], None]]]" = queue.Queue()
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+    
+    def _migrate(self):
+        """Add columns missing from journals written by older versions."""
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+        if "priority" not in columns:
+            self._db.execute("ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+    
+    @staticmethod
+    def _redact(argv: List[str]) -> List[str]:
+        """Replace password values so they are never stored."""
+        redacted = list(argv)
+        for i, arg in enumerate(redacted[:-1]):
+            if arg in SECRET_OPTIONS:
+                redacted[i + 1] = SECRET_PLACEHOLDER
+        return redacted
+    
+    @staticmethod
+    def _restore(argv: List[str], password: str) -> List[str]:
+        """Put the current password back into a stored command, or drop the option."""
+        restored = []
+        skip = False
+        for i, arg in enumerate(argv):
+            if skip:
+                skip = False
+                continue
+            if arg in SECRET_OPTIONS and i + 1 < len(argv) and argv[i + 1] == SECRET_PLACEHOLDER:
+                if password:
+                    restored.extend([arg, password])
+                skip = True
+                continue
+            restored.append(arg)
+        return restored
+    
+    def next_id(self) -> int:
+        """Get the first free job ID; IDs of deleted jobs are not reused."""
+        self.flush()
+        with self._lock:
+            row = self._db.execute("SELECT seq FROM sqlite_sequence WHERE name = 'jobs'").fetchone()
+        return (row[0] if row else 0) + 1
+    
+    def add(self, job: DownloadJob):
+        """Store a new job under its ID."""
+        self.add_many([job])
+    
+    def add_many(self, jobs: Iterable[DownloadJob]):
+        """Store several new jobs under their IDs in one transaction."""
+        rows = [(job.id, job.url, job.host, json.dumps(self._redact(job.cmd)),
+                 job.state, job.attempts, job.created_at, job.priority) for job in jobs]
+        
+        def write():
+            self._db.execute("BEGIN")
+            try:
+                self._db.executemany(
+                    "INSERT INTO jobs (id, url, host, argv, state, attempts, created_at, priority) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        
+        self._queue_write(write)
+    
+    def update(self, job: DownloadJob):
+        """Write the current state of a job."""
+        row = (job.state, job.attempts, job.exit_code, job.error,
+               job.started_at, job.finished_at, job.priority, job.id)
+        self._queue_write(lambda: self._db.execute(
+            "UPDATE jobs SET state = ?, attempts = ?, exit_code = ?, error = ?, "
+            "started_at = ?, finished_at = ?, priority = ? WHERE id = ?", row))
+    
+    def delete(self, job_ids: Iterable[int]):
+        """Remove jobs from the journal."""
+        rows = [(job_id,) for job_id in job_ids]
+        self._queue_write(lambda: self._db.executemany("DELETE FROM jobs WHERE id = ?", rows))
+    
+    def flush(self):
+        """Wait until all queued writes are done."""
+        if not self._closed:
+            self._writes.join()
+    
+    def _queue_write(self, write: Callable[[], None]):
+        if not self._closed:
+            self._writes.put(write)
+    
+    def _write_loop(self):
+        """Writer thread: run queued writes in order until the journal is closed."""
+        while True:
+            write = self._writes.get()
+            try:
+                if write is None:
+                    return
+                with self._lock:
+                    write()
+            except Exception as e:  # Keep writing; flush() waits for this thread
+                print(f"Failed to write job journal: {e}")
+            finally:
+                self._writes.task_done()
+    
+    def prune(self, max_age_days: float = 30):
+        """Remove finished jobs older than ``max_age_days``."""
+        cutoff = time.time() - max_age_days * 86400
+        placeholders = ",".join("?" * len(JobState.FINISHED))
+        self.flush()
+        with self._lock:
+            self._db.execute(
+                f"DELETE FROM jobs WHERE state IN ({placeholders}) AND finished_at < ?",
+                (*JobState.FINISHED, cutoff))
+    
+    def load_unfinished(self, password: str = "") -> List[DownloadJob]:
+        """Load queued and interrupted jobs in queue order.
+        
+        Jobs that were running when the application stopped come back as
+        queued so they are started again. Passwords are never stored, so
+        without ``password`` the option is removed and the job is marked
+        with ``password_dropped``.
+        """
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, url, host, argv, attempts, created_at, priority FROM jobs "
+                "WHERE state IN (?, ?) ORDER BY id",
+                (JobState.QUEUED, JobState.RUNNING)).fetchall()
+        
+        jobs = []
+        for job_id, url, host, argv, attempts, created_at, priority in rows:
+            stored = json.loads(argv)
+            jobs.append(DownloadJob(id=job_id, url=url, host=host,
+                                    cmd=self._restore(stored, password),
+                                    attempts=attempts, created_at=created_at, priority=priority,
+                                    password_dropped=not password and SECRET_PLACEHOLDER in stored))
+        return jobs
+    
+    def load_durations(self) -> Dict[str, float]:
+        """Get the run time in seconds of the latest completed job for each URL."""
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url, finished_at - started_at FROM jobs "
+                "WHERE state = ? AND started_at IS NOT NULL AND finished_at IS NOT NULL ORDER BY id",
+                (JobState.COMPLETED,)).fetchall()
+        return {url: duration for url, duration in rows}
+    
+    def close(self):
+        """Finish the queued writes and close the database."""
+        if self._closed:
+            return
+        self._closed = True
+        self._writes.put(None)
+        self._writer.join()
+        with self._lock:
+            self._db.close()
@@ -1,11 +1,15 @@
 """
 Configuration and settings management for Gallery-DL GUI.
 """
+import hashlib
 import json
+import os
 import tkinter as tk
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass, asdict
+from models.job import JobPriority
+from utils.retry_policy import RetryPolicy
 
 
 @dataclass
@@ -20,10 +24,32 @@ class GalleryDLSettings:
     no_download: bool = False
     write_info: bool = False
     write_metadata: bool = False
+    max_concurrent_downloads: int = 2
+    execution_engine: str = "subprocess"
+    gallery_dl_path: str = ""
+    worker_recycle_jobs: int = 50
+    host_limits: Dict[str, Dict[str, float]] = None
+    default_host_max_concurrent: int = 0
+    default_host_starts_per_minute: float = 0.0
+    archive_mode: str = "folder"
+    queue_policy: str = "priority"
+    preempt_jobs: bool = True
+    adaptive_concurrency: bool = False
+    retry_max_attempts: int = 3
+    retry_base_delay: int = 30
+    retry_max_minutes: int = 60
+    bandwidth_limit_kb: int = 0
+    test_cache_minutes: int = 60
+    test_workers: int = 4
+    test_probe: bool = True
+    frame_budget_ms: int = 50
+    log_view_lines: int = 5000
     
     def __post_init__(self):
         if self.url_history is None:
             self.url_history = []
+        if self.host_limits is None:
+            self.host_limits = {}
         if not self.download_path:
             self.download_path = str(Path.home() / "Downloads" / "gallery-dl")
 
@@ -33,6 +59,10 @@ class SettingsManager:
     
     SETTINGS_FILE = Path.home() / ".gallery-dl-gui-settings.json"
     
+    # Download archives managed by the GUI
+    ARCHIVE_FILENAME = ".gallery-dl-archive.sqlite3"
+    GLOBAL_ARCHIVE_FILE = Path.home() / ".gallery-dl-gui-archive.sqlite3"
+    
     @classmethod
     def save_settings(cls, settings: GalleryDLSettings) -> bool:
         """Save settings to file."""
@@ -81,15 +111,50 @@ class AppState:
         self.write_info_var = tk.BooleanVar()
         self.write_metadata_var = tk.BooleanVar()
         
+        # Queue options
+        self.max_workers_var = tk.IntVar(value=2)
+        self.engine_var = tk.StringVar(value="subprocess")
+        # Pinned Python interpreter, virtualenv or gallery-dl executable ("" = automatic)
+        self.gallery_dl_path_var = tk.StringVar()
+        self.worker_recycle_var = tk.IntVar(value=50)
+        self.queue_policy_var = tk.StringVar(value="priority")
+        self.preempt_var = tk.BooleanVar(value=True)
+        self.priority_var = tk.StringVar(value="Normal")  # Priority of newly queued jobs
+        self.bandwidth_limit_var = tk.IntVar(value=0)  # Total KB/s of all jobs, 0 = unlimited
+        
+        # Per-site limits; site -> {"max_concurrent": int, "starts_per_minute": float}
+        self.host_limits: Dict[str, Dict[str, float]] = {}
+        self.default_host_max_var = tk.IntVar(value=0)
+        self.default_host_rate_var = tk.DoubleVar(value=0.0)
+        self.adaptive_limits_var = tk.BooleanVar(value=False)
+        
+        # Automatic retries of failed jobs
+        self.retry_attempts_var = tk.IntVar(value=3)
+        self.retry_delay_var = tk.IntVar(value=30)
+        self.retry_minutes_var = tk.IntVar(value=60)
+        
+        # Minutes a URL test result is reused (0 = always run the test)
+        self.test_cache_minutes_var = tk.IntVar(value=60)
+        # Parallel probes when testing a list of URLs
+        self.test_workers_var = tk.IntVar(value=4)
+        # Quick probe: URL tests stop after the first few items
+        self.test_probe_var = tk.BooleanVar(value=True)
+        
+        # Milliseconds per UI update spent on messages from background threads
+        self.frame_budget_var = tk.IntVar(value=50)
+        # Lines kept in the on-screen log; the full log is in the session log file
+        self.log_view_lines_var = tk.IntVar(value=5000)
+        
+        # Download archive: "folder" (one per download path), "global" or "off"
+        self.archive_mode_var = tk.StringVar(value="folder")
+        
         # Search variables for sites list
         self.search_var = tk.StringVar()
         self.category_var = tk.StringVar(value="All")
         
         # Application state
         self.url_history: List[str] = []
-        self.is_downloading = False
         self.is_testing = False
-        self.download_process = None
         
         # Load settings
         self.load_settings()
@@ -108,9 +173,30 @@ class AppState:
         self.no_download_var.set(settings.no_download)
         self.write_info_var.set(settings.write_info)
         self.write_metadata_var.set(settings.write_metadata)
+        self.max_workers_var.set(settings.max_concurrent_downloads)
+        self.engine_var.set(settings.execution_engine)
+        self.gallery_dl_path_var.set(settings.gallery_dl_path)
+        self.worker_recycle_var.set(settings.worker_recycle_jobs)
+        self.host_limits = settings.host_limits
+        self.default_host_max_var.set(settings.default_host_max_concurrent)
+        self.default_host_rate_var.set(settings.default_host_starts_per_minute)
+        self.adaptive_limits_var.set(settings.adaptive_concurrency)
+        self.retry_attempts_var.set(settings.retry_max_attempts)
+        self.retry_delay_var.set(settings.retry_base_delay)
+        self.retry_minutes_var.set(settings.retry_max_minutes)
+        self.archive_mode_var.set(settings.archive_mode)
+        self.queue_policy_var.set(settings.queue_policy)
+        self.preempt_var.set(settings.preempt_jobs)
+        self.bandwidth_limit_var.set(settings.bandwidth_limit_kb)
+        self.test_cache_minutes_var.set(settings.test_cache_minutes)
+        self.test_workers_var.set(settings.test_workers)
+        self.test_probe_var.set(settings.test_probe)
+        self.frame_budget_var.set(settings.frame_budget_ms)
+        self.log_view_lines_var.set(settings.log_view_lines)
     
     def save_settings(self) -> bool:
         """Save current state to settings."""
+        retry_policy = self.get_retry_policy()
         settings = GalleryDLSettings(
             download_path=self.download_path.get(),
             username=self.username_var.get(),
@@ -120,7 +206,27 @@ class AppState:
             extract_links=self.extract_links_var.get(),
             no_download=self.no_download_var.get(),
             write_info=self.write_info_var.get(),
-            write_metadata=self.write_metadata_var.get()
+            write_metadata=self.write_metadata_var.get(),
+            max_concurrent_downloads=self.get_max_workers(),
+            execution_engine=self.engine_var.get(),
+            gallery_dl_path=self.gallery_dl_path_var.get().strip(),
+            worker_recycle_jobs=self.get_worker_recycle_jobs(),
+            host_limits=self.host_limits,
+            default_host_max_concurrent=self.get_default_host_limit()[0],
+            default_host_starts_per_minute=self.get_default_host_limit()[1],
+            adaptive_concurrency=self.adaptive_limits_var.get(),
+            retry_max_attempts=retry_policy.max_attempts,
+            retry_base_delay=int(retry_policy.base_delay),
+            retry_max_minutes=int(retry_policy.max_total_time // 60),
+            archive_mode=self.archive_mode_var.get(),
+            queue_policy=self.queue_policy_var.get(),
+            preempt_jobs=self.preempt_var.get(),
+            bandwidth_limit_kb=int(self.get_bandwidth_limit() // 1024),
+            test_cache_minutes=int(self.get_test_cache_ttl() // 60),
+            test_workers=self.get_test_workers(),
+            test_probe=self.test_probe_var.get(),
+            frame_budget_ms=int(self.get_frame_budget() * 1000),
+            log_view_lines=self.get_log_view_lines()
         )
         
         return SettingsManager.save_settings(settings)
@@ -141,28 +247,176 @@ class AppState:
         self.no_download_var.set(False)
         self.write_info_var.set(False)
         self.write_metadata_var.set(False)
+        self.max_workers_var.set(settings.max_concurrent_downloads)
+        self.engine_var.set(settings.execution_engine)
+        self.gallery_dl_path_var.set(settings.gallery_dl_path)
+        self.worker_recycle_var.set(settings.worker_recycle_jobs)
+        self.host_limits = {}
+        self.default_host_max_var.set(settings.default_host_max_concurrent)
+        self.default_host_rate_var.set(settings.default_host_starts_per_minute)
+        self.adaptive_limits_var.set(settings.adaptive_concurrency)
+        self.retry_attempts_var.set(settings.retry_max_attempts)
+        self.retry_delay_var.set(settings.retry_base_delay)
+        self.retry_minutes_var.set(settings.retry_max_minutes)
+        self.archive_mode_var.set(settings.archive_mode)
+        self.queue_policy_var.set(settings.queue_policy)
+        self.preempt_var.set(settings.preempt_jobs)
+        self.bandwidth_limit_var.set(settings.bandwidth_limit_kb)
+        self.test_cache_minutes_var.set(settings.test_cache_minutes)
+        self.test_workers_var.set(settings.test_workers)
+        self.test_probe_var.set(settings.test_probe)
+        self.frame_budget_var.set(settings.frame_budget_ms)
+        self.log_view_lines_var.set(settings.log_view_lines)
+        self.priority_var.set("Normal")
+    
+    def get_max_workers(self) -> int:
+        """Get the configured number of parallel downloads (at least 1)."""
+        try:
+            return max(1, int(self.max_workers_var.get()))
+        except (tk.TclError, ValueError):
+            return GalleryDLSettings.max_concurrent_downloads
+    
+    def get_worker_recycle_jobs(self) -> int:
+        """Get the number of jobs after which a pooled worker is replaced."""
+        try:
+            return max(1, int(self.worker_recycle_var.get()))
+        except (tk.TclError, ValueError):
+            return GalleryDLSettings.worker_recycle_jobs
+    
+    def get_default_host_limit(self) -> Tuple[int, float]:
+        """Get (max concurrent, starts per minute) for sites without their own limit."""
+        try:
+            max_concurrent = max(0, int(self.default_host_max_var.get()))
+        except (tk.TclError, ValueError):
+            max_concurrent = GalleryDLSettings.default_host_max_concurrent
+        try:
+            starts_per_minute = max(0.0, float(self.default_host_rate_var.get()))
+        except (tk.TclError, ValueError):
+            starts_per_minute = GalleryDLSettings.default_host_starts_per_minute
+        return max_concurrent, starts_per_minute
+    
+    def get_bandwidth_limit(self) -> float:
+        """Get the total download rate of all jobs in bytes per second (0 = unlimited)."""
+        try:
+            return max(0, int(self.bandwidth_limit_var.get())) * 1024.0
+        except (tk.TclError, ValueError):
+            return 0.0
+    
+    def get_retry_policy(self) -> RetryPolicy:
+        """Get the retry policy for failed jobs."""
+        defaults = GalleryDLSettings()
+        try:
+            attempts = max(1, int(self.retry_attempts_var.get()))
+        except (tk.TclError, ValueError):
+            attempts = defaults.retry_max_attempts
+        try:
+            delay = max(1, int(self.retry_delay_var.get()))
+        except (tk.TclError, ValueError):
+            delay = defaults.retry_base_delay
+        try:
+            minutes = max(1, int(self.retry_minutes_var.get()))
+        except (tk.TclError, ValueError):
+            minutes = defaults.retry_max_minutes
+        return RetryPolicy(max_attempts=attempts, base_delay=float(delay),
+                           max_total_time=minutes * 60.0)
+    
+    def get_test_cache_ttl(self) -> float:
+        """Get the number of seconds URL test results are reused (0 = not at all)."""
+        try:
+            return max(0, int(self.test_cache_minutes_var.get())) * 60.0
+        except (tk.TclError, ValueError):
+            return GalleryDLSettings.test_cache_minutes * 60.0
+    
+    def get_test_workers(self) -> int:
+        """Get the number of URLs tested at the same time when testing a list."""
+        try:
+            return max(1, int(self.test_workers_var.get()))
+        except (tk.TclError, ValueError):
+            return GalleryDLSettings.test_workers
+    
+    def get_frame_budget(self) -> float:
+        """Get the seconds per UI update spent on background messages (at least 5 ms)."""
+        try:
+            return max(5, int(self.frame_budget_var.get())) / 1000
+        except (tk.TclError, ValueError):
+            return GalleryDLSettings.frame_budget_ms / 1000
+    
+    def get_log_view_lines(self) -> int:
+        """Get the number of lines kept in the on-screen log (at least 100)."""
+        try:
+            return max(100, int(self.log_view_lines_var.get()))
+        except (tk.TclError, ValueError):
+            return GalleryDLSettings.log_view_lines
+    
+    def get_auth_options(self) -> List[str]:
+        """Get the authentication, cookies and config file options of gallery-dl."""
+        options = []
+        if self.username_var.get():
+            options.extend(["-u", self.username_var.get()])
+        if self.password_var.get():
+            options.extend(["-p", self.password_var.get()])
+        if self.cookies_file_var.get():
+            options.extend(["--cookies", self.cookies_file_var.get()])
+        if self.config_file_var.get():
+            options.extend(["--config", self.config_file_var.get()])
+        return options
     
-    def build_gallery_dl_command(self) -> Optional[List[str]]:
-        """Build gallery-dl command based on current settings."""
-        url = self.url_var.get().strip()
+    def get_test_options_key(self) -> str:
+        """Get a hash of the test settings besides the URL that can change a test result.
+        
+        Covers the config and cookies files (path and modification time),
+        the username and whether a password is set, and the quick-probe
+        mode; the password itself is not part of the key. The gallery-dl
+        installation is added by ``GalleryDLService.test_cache_key``.
+        """
+        def file_state(path: str) -> List[Any]:
+            if not path:
+                return []
+            try:
+                stat = os.stat(path)
+                return [path, stat.st_mtime_ns, stat.st_size]
+            except OSError:
+                return [path, None]
+        
+        state = {
+            "config": file_state(self.config_file_var.get()),
+            "cookies": file_state(self.cookies_file_var.get()),
+            "username": self.username_var.get(),
+            "password": bool(self.password_var.get()),
+            "probe": self.test_probe_var.get(),
+        }
+        return hashlib.sha256(json.dumps(state, sort_keys=True).encode()).hexdigest()[:16]
+    
+    def get_priority(self) -> int:
+        """Get the priority for newly queued jobs."""
+        return JobPriority.from_name(self.priority_var.get())
+    
+    def get_archive_path(self) -> Optional[str]:
+        """Get the download archive used for new jobs, or None if disabled."""
+        mode = self.archive_mode_var.get()
+        if mode == "global":
+            return str(SettingsManager.GLOBAL_ARCHIVE_FILE)
+        if mode == "folder":
+            download_path = self.download_path.get().strip()
+            if download_path:
+                return str(Path(download_path) / SettingsManager.ARCHIVE_FILENAME)
+        return None
+    
+    def build_gallery_dl_command(self, url: Optional[str] = None) -> Optional[List[str]]:
+        """Build gallery-dl command based on current settings.
+        
+        Uses the URL entry when no URL is given.
+        """
+        if url is None:
+            url = self.url_var.get()
+        url = url.strip()
         if not url:
             return None
         
         cmd = ["gallery-dl"]
         
-        # Add authentication
-        if self.username_var.get():
-            cmd.extend(["-u", self.username_var.get()])
-        if self.password_var.get():
-            cmd.extend(["-p", self.password_var.get()])
-        
-        # Add cookies
-        if self.cookies_file_var.get():
-            cmd.extend(["--cookies", self.cookies_file_var.get()])
-        
-        # Add config
-        if self.config_file_var.get():
-            cmd.extend(["--config", self.config_file_var.get()])
+        # Add authentication, cookies and config
+        cmd.extend(self.get_auth_options())
         
         # Add options
         if self.extract_links_var.get():
@@ -174,6 +428,12 @@ class AppState:
         if self.write_metadata_var.get():
             cmd.append("--write-metadata")
         
+        # Add download archive (only for real downloads, so files that were
+        # merely listed or simulated are not marked as done)
+        archive_path = self.get_archive_path()
+        if archive_path and not self.extract_links_var.get() and not self.no_download_var.get():
+            cmd.extend(["--download-archive", archive_path])
+        
         # Add download path
         download_path = self.download_path.get().strip()
         if download_path:
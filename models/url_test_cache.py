@@ -0,0 +1,91 @@
+"""
+Persistent cache of URL test results.
+
+Test verdicts are stored per URL and per set of test options (see
+``AppState.get_test_options_key``), so testing the same URL again within
+the cache lifetime returns at once instead of running gallery-dl.
+"""
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+from utils.gallery_dl_service import UrlTestResult
+
+
+class UrlTestCache:
+    """SQLite store of URL test results with a maximum age."""
+    
+    DEFAULT_PATH = Path.home() / ".gallery-dl-gui-tests.db"
+    SAMPLE_LINES = 20  # Output lines kept per result
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tests (
+            url         TEXT NOT NULL,
+            options     TEXT NOT NULL,
+            success     INTEGER NOT NULL,
+            message     TEXT NOT NULL,
+            output      TEXT NOT NULL,
+            exit_code   INTEGER,
+            reason      TEXT NOT NULL DEFAULT '',
+            duration    REAL NOT NULL,
+            tested_at   REAL NOT NULL,
+            PRIMARY KEY (url, options)
+        );
+    """
+    
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or self.DEFAULT_PATH)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.SCHEMA)
+    
+    def get(self, url: str, options: str, max_age: float) -> Optional[UrlTestResult]:
+        """Get the result of an earlier test no older than ``max_age`` seconds."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT success, message, output, exit_code, reason, duration, tested_at FROM tests "
+                "WHERE url = ? AND options = ? AND tested_at >= ?",
+                (url, options, time.time() - max_age)).fetchone()
+        if row is None:
+            return None
+        success, message, output, exit_code, reason, duration, tested_at = row
+        return UrlTestResult(url, bool(success), message, json.loads(output), exit_code, reason,
+                             duration, tested_at, cached=True)
+    
+    def put(self, result: UrlTestResult, options: str):
+        """Store a test result, replacing an earlier one for the same URL and options."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tests "
+                "(url, options, success, message, output, exit_code, reason, duration, tested_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (result.url, options, int(result.success), result.message,
+                 json.dumps(result.output[:self.SAMPLE_LINES]), result.exit_code, result.reason,
+                 result.duration, result.tested_at))
+    
+    def invalidate(self, url: Optional[str] = None) -> int:
+        """Forget the results for a URL (with any options), or all results. Returns the number removed."""
+        with self._lock:
+            if url is None:
+                cursor = self._db.execute("DELETE FROM tests")
+            else:
+                cursor = self._db.execute("DELETE FROM tests WHERE url = ?", (url,))
+        return cursor.rowcount
+    
+    def prune(self, max_age: float):
+        """Remove results older than ``max_age`` seconds."""
+        with self._lock:
+            self._db.execute("DELETE FROM tests WHERE tested_at < ?", (time.time() - max_age,))
+    
+    def count(self) -> int:
+        """Get the number of stored results."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM tests").fetchone()[0]
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,40 @@
+"""
+Tests for the shared bandwidth budget.
+"""
+from utils.bandwidth import BandwidthGovernor
+
+
+def test_disabled_without_budget():
+    governor = BandwidthGovernor()
+    assert not governor.enabled
+    assert governor.can_start(4)
+    assert governor.allocate(1, 4) is None
+    assert governor.rebalance_candidate(4) is None
+
+
+def test_allocations_split_the_budget():
+    governor = BandwidthGovernor(1000)
+    assert governor.allocate(1, 4) == 250
+    assert governor.allocate(2, 4) == 250
+    assert governor.free == 500
+    governor.release(1)
+    governor.release(1)
+    assert governor.free == 750
+
+
+def test_start_needs_half_a_share_free():
+    governor = BandwidthGovernor(1000)
+    governor.allocations = {1: 900}
+    assert not governor.can_start(4)
+    governor.allocations = {1: 850}
+    assert governor.can_start(4)
+    assert governor.allocate(2, 4) == 150
+
+
+def test_rebalance_picks_jobs_far_above_the_fair_share():
+    governor = BandwidthGovernor(1000)
+    assert governor.allocate(1, 1) == 1000
+    governor.release(1)
+    governor.allocations = {1: 600, 2: 200}
+    assert governor.rebalance_candidate(2) is None
+    assert governor.rebalance_candidate(4) == 1
@@ -0,0 +1,61 @@
+"""
+Tests for download archive maintenance.
+"""
+import sqlite3
+import pytest
+from utils.download_archive import DownloadArchive
+
+
+@pytest.fixture
+def archive(tmp_path):
+    path = str(tmp_path / "archive.sqlite3")
+    db = sqlite3.connect(path)
+    # Same table as gallery-dl's archive
+    db.execute("CREATE TABLE archive (entry TEXT PRIMARY KEY) WITHOUT ROWID")
+    db.executemany("INSERT INTO archive VALUES (?)", [
+        ("twitter1",), ("twitter2",), ("twitterx",), ("twitteR3",),
+        ("pixiv1",), ("tumblr1",), ("twitte",),
+    ])
+    db.commit()
+    db.close()
+    return path
+
+
+def _entries(path):
+    db = sqlite3.connect(path)
+    try:
+        return sorted(row[0] for row in db.execute("SELECT entry FROM archive"))
+    finally:
+        db.close()
+
+
+def test_prune_removes_entries_with_the_prefix(archive):
+    assert DownloadArchive.prune(archive, "twitter") == 3
+    assert _entries(archive) == ["pixiv1", "tumblr1", "twitte", "twitteR3"]
+
+
+def test_prune_is_case_sensitive_and_literal(archive):
+    assert DownloadArchive.prune(archive, "twitte_") == 0
+    assert DownloadArchive.prune(archive, "twitteR") == 1
+    assert "twitteR3" not in _entries(archive)
+
+
+def test_prune_without_prefix_or_archive_does_nothing(archive, tmp_path):
+    assert DownloadArchive.prune(archive, "") == 0
+    assert DownloadArchive.prune(str(tmp_path / "missing.sqlite3"), "twitter") == 0
+    assert len(_entries(archive)) == 7
+
+
+def test_prune_of_a_database_without_archive_table(tmp_path):
+    path = str(tmp_path / "empty.sqlite3")
+    sqlite3.connect(path).close()
+    assert DownloadArchive.prune(path, "twitter") == 0
+    assert DownloadArchive.get_stats(path)[0] == 0
+
+
+def test_stats_clear_and_compact(archive):
+    count, size = DownloadArchive.get_stats(archive)
+    assert count == 7 and size > 0
+    assert DownloadArchive.clear(archive) == 7
+    assert DownloadArchive.get_stats(archive)[0] == 0
+    assert DownloadArchive.compact(archive) >= 0
@@ -0,0 +1,220 @@
+"""
+Tests for the download queue scheduler, driven with fake gallery-dl processes.
+"""
+import subprocess
+import threading
+import time
+import tkinter
+
+import pytest
+
+from controllers.download_controller import DownloadController
+from models.job import JobPriority, JobState, QueuePolicy
+from models.job_journal import JobJournal
+from models.settings import AppState
+from models.url_test_cache import UrlTestCache
+from utils.gallery_dl_service import GalleryDLService
+from utils.inprocess_engine import LineReader
+from utils.output_log import JobOutputLog
+from utils.retry_policy import RetryPolicy
+from utils.session_log import SessionLog
+
+
+class FakeProcess:
+    """Popen-like stand-in for gallery-dl that runs until the test ends it."""
+    
+    def __init__(self, cmd):
+        self.args = cmd
+        self.returncode = None
+        self.stdout = LineReader()
+        self.terminated = False
+        self._done = threading.Event()
+    
+    def finish(self, returncode=0):
+        if self._done.is_set():
+            return
+        self.returncode = returncode
+        self.stdout.close()
+        self._done.set()
+    
+    def poll(self):
+        return self.returncode
+    
+    def wait(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+    
+    def terminate(self):
+        self.terminated = True
+        self.finish(-15)
+    
+    kill = terminate
+
+
+class Harness:
+    """A controller whose jobs start FakeProcess objects, listed per URL in start order."""
+    
+    def __init__(self, controller):
+        self.controller = controller
+        self.started = []  # URLs in start order
+        self.processes = {}  # URL -> processes of its attempts
+        self._lock = threading.Lock()
+    
+    def create(self, cmd, engine=None, worker_pool=None):
+        process = FakeProcess(cmd)
+        with self._lock:
+            self.started.append(cmd[-1])
+            self.processes.setdefault(cmd[-1], []).append(process)
+        return process
+    
+    def add(self, url, priority=JobPriority.NORMAL):
+        return self.controller.enqueue_job(url, ["gallery-dl", url], priority)
+    
+    def process(self, url, attempt=1):
+        wait_for(lambda: len(self.processes.get(url, ())) >= attempt)
+        return self.processes[url][attempt - 1]
+    
+    def finish(self, job, returncode=0):
+        """End the latest run of a job and wait until the controller let go of it."""
+        self.process(job.url)
+        self.processes[job.url][-1].finish(returncode)
+        wait_for(lambda: job.id not in self.controller._running)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def harness(tmp_path, monkeypatch):
+    monkeypatch.setattr(tkinter, "_default_root", tkinter.Tcl())
+    monkeypatch.setattr(JobJournal, "DEFAULT_PATH", tmp_path / "jobs.db")
+    monkeypatch.setattr(UrlTestCache, "DEFAULT_PATH", tmp_path / "tests.db")
+    monkeypatch.setattr(JobOutputLog, "SPILL_DIR", tmp_path / "logs")
+    monkeypatch.setattr(SessionLog, "LOG_DIR", tmp_path / "logs")
+    app_state = AppState()
+    app_state.max_workers_var.set(1)
+    app_state.preempt_var.set(False)
+    controller = DownloadController(app_state, lambda kind, value: None)
+    harness = Harness(controller)
+    monkeypatch.setattr(GalleryDLService, "create_download_process", harness.create)
+    yield harness
+    controller.shutdown()
+
+
+def test_jobs_start_by_priority_across_hosts(harness):
+    blocker = harness.add("https://a.example/0")
+    harness.add("https://b.example/low", JobPriority.LOW)
+    harness.add("https://a.example/normal")
+    harness.add("https://c.example/high", JobPriority.HIGH)
+    assert harness.controller._pending_count == 3
+    assert sorted(harness.controller._pending) == ["a.example", "b.example", "c.example"]
+    
+    job = blocker
+    for count in (2, 3, 4):
+        harness.finish(job)
+        wait_for(lambda: len(harness.started) == count)
+        job = next(iter(harness.controller._running.values()))
+    harness.finish(job)
+    assert harness.started == ["https://a.example/0", "https://c.example/high",
+                               "https://a.example/normal", "https://b.example/low"]
+
+
+def test_changed_priority_leaves_a_stale_entry_that_is_skipped(harness):
+    blocker = harness.add("https://a.example/0")
+    first = harness.add("https://a.example/1")
+    second = harness.add("https://a.example/2")
+    harness.controller.set_priority(second.id, JobPriority.HIGH)
+    heap = harness.controller._pending["a.example"]
+    assert len(heap) == 3  # The old entry of the second job is only dropped when it surfaces
+    assert harness.controller._pending_count == 2
+    
+    harness.finish(blocker)
+    wait_for(lambda: second.state == JobState.RUNNING)
+    harness.finish(second)
+    wait_for(lambda: first.state == JobState.RUNNING)
+    harness.finish(first)
+    assert harness.started == ["https://a.example/0", "https://a.example/2", "https://a.example/1"]
+    assert second.attempts == 1
+    assert harness.controller._pending_count == 0
+    assert "a.example" not in harness.controller._pending
+
+
+def test_failed_job_frees_its_slot_until_the_retry_is_due(harness):
+    harness.controller.retry_policy = RetryPolicy(max_attempts=2, base_delay=0.4)
+    failing = harness.add("https://a.example/flaky")
+    harness.finish(failing, 4)
+    assert failing.state == JobState.QUEUED
+    assert failing.retry_at is not None
+    
+    other = harness.add("https://b.example/next")
+    wait_for(lambda: other.state == JobState.RUNNING)
+    assert failing.state == JobState.QUEUED
+    harness.finish(other)
+    
+    harness.process(failing.url, attempt=2)
+    wait_for(lambda: failing.state == JobState.RUNNING)
+    assert failing.attempts == 2
+    assert failing.retry_at is None
+    harness.finish(failing, 4)
+    assert failing.state == JobState.FAILED  # Out of attempts
+
+
+def test_preempted_job_is_requeued_without_using_an_attempt(harness):
+    harness.controller.app_state.preempt_var.set(True)
+    low = harness.add("https://a.example/low", JobPriority.LOW)
+    wait_for(lambda: low.state == JobState.RUNNING)
+    assert low.attempts == 1
+    
+    high = harness.add("https://b.example/high", JobPriority.HIGH)
+    wait_for(lambda: high.state == JobState.RUNNING)
+    assert harness.process(low.url).terminated
+    assert low.state == JobState.QUEUED
+    assert low.attempts == 0
+    assert not low.preempt_requested
+    
+    harness.finish(high)
+    harness.process(low.url, attempt=2)
+    wait_for(lambda: low.state == JobState.RUNNING)
+    assert low.attempts == 1
+    harness.finish(low)
+    assert low.state == JobState.COMPLETED
+
+
+def test_no_preemption_for_equal_priority_or_fifo(harness):
+    controller = harness.controller
+    controller.app_state.preempt_var.set(True)
+    running = harness.add("https://a.example/running")
+    harness.add("https://b.example/same")
+    controller.app_state.queue_policy_var.set(QueuePolicy.FIFO)
+    harness.add("https://c.example/high", JobPriority.HIGH)
+    time.sleep(0.1)
+    assert not harness.process(running.url).terminated
+    assert list(controller._running) == [running.id]
+
+
+def test_queue_policy_change_rebuilds_the_heaps(harness):
+    controller = harness.controller
+    controller.retry_policy = RetryPolicy(max_attempts=2, base_delay=60)
+    delayed = harness.add("https://d.example/retry")
+    harness.finish(delayed, 4)
+    blocker = harness.add("https://a.example/0")
+    low = harness.add("https://a.example/low", JobPriority.LOW)
+    high = harness.add("https://b.example/high", JobPriority.HIGH)
+    with controller._lock:
+        assert controller._queued_jobs() == [high, low, delayed]
+    
+    controller.app_state.queue_policy_var.set(QueuePolicy.FIFO)
+    with controller._lock:
+        assert controller._queued_jobs() == [low, high, delayed]
+        assert sum(len(heap) for heap in controller._pending.values()) == 2
+    assert controller._pending_count == 3
+    assert delayed.retry_at is not None
+    
+    harness.finish(blocker)
+    wait_for(lambda: low.state == JobState.RUNNING)
+    assert high.state == JobState.QUEUED
@@ -0,0 +1,87 @@
+"""
+Tests for the error rule table and the streaming classifier.
+"""
+import json
+
+from utils.error_classifier import ErrorClassifier, ErrorRule, ErrorRules
+from utils.output_parser import EventKind
+
+
+RULES = ErrorRules([
+    ErrorRule("auth", "Login", "error", r"\b401\b|login required", "Log in", retryable=False),
+    ErrorRule("rate", "Rate limit", "warning", r"\b429\b", "Slow down", retryable=True, throttle="rate limit"),
+    ErrorRule("notfound", "Missing", "error", r"\b404\b", "Check the URL"),
+    ErrorRule("nofiles", "Empty", "info", r"no results", "Nothing found", exit_codes=(0,)),
+])
+
+
+def test_rules_match_in_order_of_appearance():
+    assert [rule.id for rule in RULES.match("HTTP 429 then 401")] == ["rate", "auth"]
+    assert RULES.match("all fine") == []
+
+
+def test_invalid_patterns_are_skipped(capsys):
+    rules = ErrorRules([ErrorRule("bad", "", "error", "(", ""), ErrorRule("ok", "", "error", "ok", "")])
+    assert [rule.id for rule in rules.rules] == ["ok"]
+    assert "bad" in capsys.readouterr().out
+
+
+def test_only_errors_and_warnings_change_current():
+    classifier = ErrorClassifier(RULES)
+    assert classifier.feed("[info] see docs on login required sites") is None
+    assert classifier.current is None
+    assert classifier.feed("[warning] 429 Too Many Requests", EventKind.WARNING).id == "rate"
+    assert classifier.throttle_reason == "rate limit"
+    assert classifier.feed("[error] 401 Unauthorized", EventKind.ERROR).id == "auth"
+    assert classifier.feed("[warning] 429 again", EventKind.WARNING) is None
+    assert classifier.current.id == "auth"
+    assert classifier.matches == {"auth": 2, "rate": 2}
+
+
+def test_file_paths_are_not_scanned():
+    classifier = ErrorClassifier(RULES)
+    classifier.feed("/downloads/401/image.jpg", EventKind.FILE_DONE)
+    assert classifier.matches == {}
+    assert classifier.result(1) is None
+
+
+def test_result_prefers_severity_then_rule_order():
+    classifier = ErrorClassifier(RULES)
+    classifier.feed_lines(["got 404", "got 401", "got 429"])
+    assert classifier.result(1).id == "auth"
+
+
+def test_result_respects_exit_codes():
+    classifier = ErrorClassifier(RULES)
+    classifier.feed("no results for this query")
+    assert classifier.result(0).id == "nofiles"
+    assert classifier.result(1) is None
+
+
+def test_retryable_false_wins():
+    classifier = ErrorClassifier(RULES)
+    classifier.feed("429")
+    assert classifier.retryable() is True
+    classifier.feed("401")
+    assert classifier.retryable() is False
+    assert ErrorClassifier(RULES).retryable() is None
+
+
+def test_user_rules_override_defaults(tmp_path, capsys):
+    default = tmp_path / "default.json"
+    user = tmp_path / "user.json"
+    default.write_text(json.dumps({"rules": [
+        {"id": "a", "pattern": "alpha", "hint": "default"},
+        {"id": "b", "pattern": "beta", "severity": "warning"},
+    ]}), encoding="utf-8")
+    user.write_text(json.dumps({"rules": [{"id": "a", "pattern": "alpha", "hint": "user"}]}), encoding="utf-8")
+    rules = ErrorRules.load([user, tmp_path / "missing.json", default])
+    assert [(rule.id, rule.hint) for rule in rules.rules] == [("a", "user"), ("b", "")]
+    assert rules.rules[1].severity == "warning"
+    assert capsys.readouterr().out == ""
+
+
+def test_default_rule_file_loads(capsys):
+    rules = ErrorRules.load([ErrorRules.DEFAULT_FILE])
+    assert rules.rules
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,36 @@
+"""
+Tests for the in-process engine's handling of command lines.
+"""
+import argparse
+import types
+
+from utils.inprocess_engine import USAGE_EXIT_CODE, InProcessEngine
+
+
+def fake_modules():
+    def build_parser():
+        parser = argparse.ArgumentParser(prog="gallery-dl")
+        parser.add_argument("-u", "--username")
+        parser.add_argument("urls", nargs="*")
+        return parser
+    return {"option": types.SimpleNamespace(build_parser=build_parser)}
+
+
+def test_rejected_arguments_fail_the_job(monkeypatch):
+    monkeypatch.setattr(InProcessEngine, "_load", classmethod(lambda cls: fake_modules()))
+    handle = InProcessEngine.start(["gallery-dl", "-u", "-name", "https://example.com/"])
+    assert handle.wait(1) == USAGE_EXIT_CODE
+    assert "Invalid command line arguments" in handle.stdout.readline()
+    assert handle.stdout.readline() == ""
+
+
+def test_supports_does_not_import(monkeypatch):
+    def fail(cls):
+        raise AssertionError("imported gallery_dl")
+    monkeypatch.setattr(InProcessEngine, "_load", classmethod(fail))
+    monkeypatch.setattr(InProcessEngine, "_available", None)
+    monkeypatch.setattr(InProcessEngine, "_found", True)
+    assert InProcessEngine.supports(["gallery-dl", "https://example.com/"])
+    assert not InProcessEngine.supports(["gallery-dl", "-g", "https://example.com/"])
+    monkeypatch.setattr(InProcessEngine, "_available", False)
+    assert not InProcessEngine.supports(["gallery-dl", "https://example.com/"])
@@ -0,0 +1,78 @@
+"""
+Tests for gallery-dl detection and its cache across application starts.
+"""
+import os
+import stat
+import sys
+
+import pytest
+
+from utils.installation import InstallationDetector
+
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="uses shell scripts as executables")
+
+
+@pytest.fixture
+def probes(tmp_path, monkeypatch):
+    """Record the commands whose version is checked."""
+    monkeypatch.setattr(InstallationDetector, "CACHE_FILE", tmp_path / "install.json")
+    calls = []
+    probe = InstallationDetector._probe.__func__
+    
+    def recording_probe(cls, command):
+        calls.append(command)
+        return probe(cls, command)
+    
+    monkeypatch.setattr(InstallationDetector, "_probe", classmethod(recording_probe))
+    return calls
+
+
+def fake_gallery_dl(path, version="1.26.0"):
+    path.write_text(f"#!/bin/sh\necho {version}\n")
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+def test_pinned_executable_is_probed_once(tmp_path, probes):
+    executable = fake_gallery_dl(tmp_path / "gallery-dl")
+    installation = InstallationDetector.detect(executable)
+    assert installation.command == [executable]
+    assert installation.version == "1.26.0"
+    assert not installation.module
+    assert InstallationDetector.detect(executable) == installation
+    assert len(probes) == 1
+
+
+def test_changed_executable_is_probed_again(tmp_path, probes):
+    executable = fake_gallery_dl(tmp_path / "gallery-dl")
+    InstallationDetector.detect(executable)
+    fake_gallery_dl(tmp_path / "gallery-dl", "1.27.0")
+    mtime = os.stat(executable).st_mtime_ns + 10 ** 9
+    os.utime(executable, ns=(mtime, mtime))
+    assert InstallationDetector.detect(executable).version == "1.27.0"
+    assert len(probes) == 2
+
+
+def test_other_path_is_probed_and_recheck_skips_the_cache(tmp_path, probes):
+    first = fake_gallery_dl(tmp_path / "first")
+    second = fake_gallery_dl(tmp_path / "second", "1.25.0")
+    InstallationDetector.detect(first)
+    assert InstallationDetector.detect(second).version == "1.25.0"
+    assert InstallationDetector.detect(second, use_cache=False).version == "1.25.0"
+    assert probes == [[first], [second], [second]]
+
+
+def test_broken_or_missing_installation(tmp_path, probes):
+    broken = tmp_path / "broken"
+    broken.write_text("#!/bin/sh\nexit 1\n")
+    broken.chmod(broken.stat().st_mode | stat.S_IXUSR)
+    assert InstallationDetector.detect(str(broken)) is None
+    assert InstallationDetector.detect(str(tmp_path / "missing")) is None
+    assert probes == [[str(broken)]]
+
+
+def test_virtualenv_folder(tmp_path, probes):
+    (tmp_path / "venv" / "bin").mkdir(parents=True)
+    executable = fake_gallery_dl(tmp_path / "venv" / "bin" / "gallery-dl")
+    assert InstallationDetector.detect(str(tmp_path / "venv")).command == [executable]
@@ -0,0 +1,121 @@
+"""
+Tests for the SQLite job journal.
+"""
+import json
+import sqlite3
+import pytest
+from models.job import DownloadJob, JobState
+from models.job_journal import JobJournal, SECRET_PLACEHOLDER
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = JobJournal(tmp_path / "jobs.db")
+    yield journal
+    journal.close()
+
+
+def _job(journal: JobJournal, url: str, cmd=None) -> DownloadJob:
+    job = DownloadJob(id=journal.next_id(), url=url, cmd=cmd or ["gallery-dl", url])
+    journal.add(job)
+    return job
+
+
+def test_ids_continue_after_deleted_jobs(journal):
+    first = _job(journal, "https://a/1")
+    second = _job(journal, "https://a/2")
+    assert (first.id, second.id) == (1, 2)
+    journal.delete([second.id])
+    assert journal.next_id() == 3
+
+
+def test_passwords_are_never_stored(journal):
+    _job(journal, "https://a/1", ["gallery-dl", "-u", "me", "-p", "secret", "https://a/1"])
+    journal.flush()
+    stored = journal._db.execute("SELECT argv FROM jobs").fetchone()[0]
+    assert "secret" not in stored
+    assert json.loads(stored) == ["gallery-dl", "-u", "me", "-p", SECRET_PLACEHOLDER, "https://a/1"]
+
+
+def test_resumed_jobs_get_the_current_password(journal):
+    _job(journal, "https://a/1", ["gallery-dl", "--password", "secret", "https://a/1"])
+    job, = journal.load_unfinished("new")
+    assert job.cmd == ["gallery-dl", "--password", "new", "https://a/1"]
+    assert not job.password_dropped
+
+
+def test_resumed_jobs_without_password_are_marked(journal):
+    _job(journal, "https://a/1", ["gallery-dl", "-p", "secret", "https://a/1"])
+    _job(journal, "https://a/2")
+    with_password, without = journal.load_unfinished("")
+    assert with_password.cmd == ["gallery-dl", "https://a/1"]
+    assert with_password.password_dropped
+    assert not without.password_dropped
+
+
+def test_running_jobs_resume_as_queued_and_finished_ones_do_not(journal):
+    running = _job(journal, "https://a/1")
+    running.state = JobState.RUNNING
+    running.attempts = 1
+    journal.update(running)
+    done = _job(journal, "https://a/2")
+    done.state = JobState.COMPLETED
+    journal.update(done)
+    
+    job, = journal.load_unfinished()
+    assert (job.id, job.state, job.attempts) == (running.id, JobState.QUEUED, 1)
+
+
+def test_update_stores_the_state_at_call_time(journal):
+    job = _job(journal, "https://a/1")
+    job.state = JobState.FAILED
+    journal.update(job)
+    job.state = JobState.RUNNING  # Changed again before the writer ran
+    journal.flush()
+    assert journal._db.execute("SELECT state FROM jobs").fetchone()[0] == JobState.FAILED
+
+
+def test_prune_removes_old_finished_jobs_only(journal):
+    old = _job(journal, "https://a/1")
+    old.state, old.finished_at = JobState.COMPLETED, 0.0
+    journal.update(old)
+    queued = _job(journal, "https://a/2")
+    journal.prune(max_age_days=1)
+    assert [job.id for job in journal.load_unfinished()] == [queued.id]
+    assert journal._db.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 1
+
+
+def test_load_durations_uses_completed_jobs(journal):
+    job = _job(journal, "https://a/1")
+    job.state, job.started_at, job.finished_at = JobState.COMPLETED, 10.0, 25.0
+    journal.update(job)
+    assert journal.load_durations() == {"https://a/1": 15.0}
+
+
+def test_old_journals_get_the_priority_column(tmp_path):
+    path = tmp_path / "old.db"
+    db = sqlite3.connect(str(path))
+    db.execute("CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, "
+               "host TEXT NOT NULL DEFAULT '', argv TEXT NOT NULL, state TEXT NOT NULL, "
+               "attempts INTEGER NOT NULL DEFAULT 0, exit_code INTEGER, error TEXT NOT NULL DEFAULT '', "
+               "created_at REAL NOT NULL, started_at REAL, finished_at REAL)")
+    db.execute("INSERT INTO jobs (url, argv, state, created_at) VALUES (?, ?, ?, ?)",
+               ("https://a/1", json.dumps(["gallery-dl", "https://a/1"]), JobState.QUEUED, 0.0))
+    db.commit()
+    db.close()
+    
+    journal = JobJournal(path)
+    try:
+        job, = journal.load_unfinished()
+        assert (job.url, job.priority) == ("https://a/1", 0)
+        assert journal.next_id() == 2
+    finally:
+        journal.close()
+
+
+def test_writes_after_close_are_ignored(tmp_path):
+    journal = JobJournal(tmp_path / "jobs.db")
+    journal.close()
+    journal.add(DownloadJob(id=1, url="https://a/1", cmd=[]))
+    journal.flush()
+    journal.close()
@@ -0,0 +1,85 @@
+"""
+Tests for the shared gallery-dl launcher.
+"""
+import threading
+
+import pytest
+
+from utils.installation import Installation, InstallationDetector
+from utils.launcher import GalleryDLLauncher
+
+
+@pytest.fixture
+def detections(monkeypatch):
+    """Replace detection with a lookup in a dict of pinned path -> installation."""
+    for name, value in (("_pinned", ""), ("_generation", 0), ("_resolved", False), ("_installation", None)):
+        monkeypatch.setattr(GalleryDLLauncher, name, value)
+    found = {}
+    calls = []
+    
+    def detect(cls, pinned="", use_cache=True):
+        calls.append(pinned)
+        return found.get(pinned)
+    
+    monkeypatch.setattr(InstallationDetector, "detect", classmethod(detect))
+    return found, calls
+
+
+def test_build_uses_the_resolved_invocation(detections):
+    found, calls = detections
+    found[""] = Installation(["/usr/bin/python3", "-m", "gallery_dl"], "1.26.0", True)
+    argv = ["gallery-dl", "--simulate", "https://example.com/"]
+    assert GalleryDLLauncher.build(argv) == ["/usr/bin/python3", "-m", "gallery_dl", "--simulate",
+                                             "https://example.com/"]
+    assert argv == ["gallery-dl", "--simulate", "https://example.com/"]
+    GalleryDLLauncher.build(argv)
+    assert calls == [""]
+
+
+def test_build_falls_back_to_gallery_dl_on_path(detections):
+    assert GalleryDLLauncher.build(["gallery-dl", "-v"]) == ["gallery-dl", "-v"]
+
+
+def test_pinning_resolves_again(detections):
+    found, calls = detections
+    found[""] = Installation(["/usr/bin/gallery-dl"], "1.26.0")
+    found["/opt/venv"] = Installation(["/opt/venv/bin/gallery-dl"], "1.27.0")
+    GalleryDLLauncher.resolve()
+    GalleryDLLauncher.configure(" /opt/venv ")
+    assert GalleryDLLauncher.resolve().version == "1.27.0"
+    GalleryDLLauncher.configure("/opt/venv")
+    GalleryDLLauncher.resolve()
+    GalleryDLLauncher.resolve(recheck=True)
+    assert calls == ["", "/opt/venv", "/opt/venv"]
+
+
+def test_configure_does_not_wait_for_a_running_detection(detections, monkeypatch):
+    found, calls = detections
+    found["/old"] = Installation(["/old/gallery-dl"], "1.0")
+    found["/new"] = Installation(["/new/gallery-dl"], "2.0")
+    GalleryDLLauncher.configure("/old")
+    detecting, release = threading.Event(), threading.Event()
+    detect = InstallationDetector.detect.__func__
+    
+    def slow_detect(cls, pinned="", use_cache=True):
+        if pinned == "/old":
+            detecting.set()
+            release.wait(5)
+        return detect(cls, pinned, use_cache)
+    
+    monkeypatch.setattr(InstallationDetector, "detect", classmethod(slow_detect))
+    results = []
+    resolver = threading.Thread(target=lambda: results.append(GalleryDLLauncher.resolve()))
+    resolver.start()
+    assert detecting.wait(5)
+    
+    configured = threading.Thread(target=GalleryDLLauncher.configure, args=("/new",))
+    configured.start()
+    configured.join(1)
+    assert not configured.is_alive()
+    
+    release.set()
+    resolver.join(5)
+    # The result for the old path was dropped in favour of the new one
+    assert results[0].version == "2.0"
+    assert calls == ["/old", "/new"]
@@ -0,0 +1,68 @@
+"""
+Tests for the bounded message bus between worker threads and the UI.
+"""
+import threading
+
+from controllers import messages
+from controllers.messages import MessageBus, StatusMessage
+
+
+def test_coalesced_messages_keep_only_the_latest():
+    bus = MessageBus()
+    bus.post(StatusMessage("first"))
+    bus.post(StatusMessage("second"))
+    assert [message.text for message in bus.take_latest()] == ["second"]
+    assert bus.take_latest() == []
+
+
+def test_events_are_kept_in_order():
+    bus = MessageBus()
+    events = [messages.TestFinishedMessage() for _ in range(3)]
+    for event in events:
+        bus.post(event)
+    assert [bus.take_event() for _ in range(4)] == events + [None]
+
+
+def test_logs_drop_the_oldest_and_count_them():
+    bus = MessageBus(max_logs=3)
+    for number in range(5):
+        bus.log(f"line {number}")
+    assert bus.take_logs(2) == (["line 2", "line 3"], 2)
+    assert bus.take_logs(10) == (["line 4"], 0)
+    assert not bus.pending()
+
+
+def test_background_posters_wait_for_space():
+    bus = MessageBus(max_events=1)
+    bus.post(messages.TestFinishedMessage())
+    posted = threading.Event()
+    
+    def post():
+        bus.post(messages.TestFinishedMessage())
+        posted.set()
+    
+    thread = threading.Thread(target=post, daemon=True)
+    thread.start()
+    assert not posted.wait(0.2)
+    bus.take_event()
+    assert posted.wait(2)
+    thread.join(2)
+
+
+def test_close_releases_waiting_posters():
+    bus = MessageBus(max_events=1)
+    bus.post(messages.TestFinishedMessage())
+    thread = threading.Thread(target=bus.post, args=(messages.TestFinishedMessage(),), daemon=True)
+    thread.start()
+    bus.close()
+    thread.join(2)
+    assert not thread.is_alive()
+
+
+def test_on_post_is_called():
+    bus = MessageBus()
+    calls = []
+    bus.on_post = lambda: calls.append(1)
+    bus.log("line")
+    bus.post(StatusMessage("status"))
+    assert len(calls) == 2
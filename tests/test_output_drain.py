@@ -0,0 +1,54 @@
+"""
+Tests for the background output drain.
+"""
+import io
+import os
+import threading
+
+from utils.output_drain import OutputDrain
+
+
+def drain_bytes(data: bytes):
+    read_fd, write_fd = os.pipe()
+    
+    def write():
+        with os.fdopen(write_fd, "wb") as fp:
+            fp.write(data)
+    
+    writer = threading.Thread(target=write, daemon=True)
+    writer.start()
+    lines = [line for batch in OutputDrain(os.fdopen(read_fd, "rb")).batches() for line in batch]
+    writer.join(2)
+    return lines
+
+
+def test_pipe_lines_are_split_and_decoded():
+    data = "first\r\nsecond é\nno newline".encode("utf-8")
+    assert drain_bytes(data) == ["first", "second é", "no newline"]
+
+
+def test_large_pipe_output_is_complete():
+    data = b"".join(b"line %d\n" % number for number in range(50000))
+    lines = drain_bytes(data)
+    assert len(lines) == 50000
+    assert lines[-1] == "line 49999"
+
+
+class LineReader:
+    """Line-based handle like those of the in-process engine and worker pool."""
+    
+    def __init__(self, text):
+        self.readline = io.StringIO(text).readline
+
+
+def test_line_reader():
+    reader = LineReader("one\ntwo\r\nthree")
+    assert [line for batch in OutputDrain(reader).batches() for line in batch] == ["one", "two", "three"]
+
+
+def test_cancel_ends_iteration():
+    read_fd, write_fd = os.pipe()
+    drain = OutputDrain(os.fdopen(read_fd, "rb"))
+    drain.cancel()
+    assert list(drain.batches()) == []
+    os.close(write_fd)
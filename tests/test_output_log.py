@@ -0,0 +1,130 @@
+"""
+Tests for the per-job output store and its kind index.
+"""
+import os
+import time
+
+import pytest
+
+from utils.output_log import JobOutputLog
+from utils.output_parser import EventKind
+
+
+class SmallLog(JobOutputLog):
+    TAIL_LINES = 10
+    SPILL_CHUNK_LINES = 4
+
+
+def kind_of(number):
+    if number % 7 == 0:
+        return EventKind.ERROR
+    if number % 5 == 0:
+        return EventKind.FILE_DONE
+    return EventKind.LOG
+
+
+@pytest.fixture
+def filled(tmp_path):
+    log = SmallLog(1, tmp_path)
+    lines = [f"line {number}" for number in range(53)]
+    for number, line in enumerate(lines):
+        log.append(line, kind_of(number))
+    yield log, lines
+    log.remove()
+
+
+def test_short_output_stays_in_memory(tmp_path):
+    log = SmallLog(1, tmp_path)
+    for number in range(5):
+        log.append(f"line {number}")
+    assert log.spill_path is None
+    assert log.read(0, 10) == [f"line {number}" for number in range(5)]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_close_moves_short_output_to_disk(tmp_path):
+    log = SmallLog(1, tmp_path)
+    for number in range(6):
+        log.append(f"line {number}", EventKind.ERROR if number == 4 else EventKind.LOG)
+    log.close()
+    assert not log.tail
+    assert log.spill_path.exists()
+    assert log.read(0, 10) == [f"line {number}" for number in range(6)]
+    assert list(log.line_numbers([EventKind.ERROR])) == [4]
+    assert log.search("line 5") == ([(5, "line 5")], False)
+    log.remove()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_spilled_lines_can_be_read_back(filled):
+    log, lines = filled
+    assert log.spill_path is not None and log.spill_path.exists()
+    assert log.lines == len(lines)
+    assert log.spilled == len(lines) - SmallLog.TAIL_LINES
+    assert log.read(0, len(lines)) == lines
+    assert log.read(5, 3) == lines[5:8]
+    assert list(log.iter_lines()) == lines
+
+
+def test_reading_after_close(filled):
+    log, lines = filled
+    log.close()
+    log.close()
+    assert not log.tail and not log._pending
+    assert log.spilled == log.lines
+    assert log.read(0, len(lines)) == lines
+    numbers = list(log.line_numbers([EventKind.ERROR]))
+    assert numbers == [number for number in range(len(lines)) if kind_of(number) == EventKind.ERROR]
+
+
+def test_kind_index(filled):
+    log, lines = filled
+    errors = [number for number in range(len(lines)) if kind_of(number) == EventKind.ERROR]
+    files = [number for number in range(len(lines)) if kind_of(number) == EventKind.FILE_DONE]
+    assert log.errors == log.count(EventKind.ERROR) == len(errors)
+    assert log.count(EventKind.FILE_DONE) == len(files)
+    assert list(log.line_numbers([EventKind.ERROR])) == errors
+    assert list(log.line_numbers([EventKind.ERROR, EventKind.FILE_DONE])) == sorted(errors + files)
+    assert list(log.line_numbers([EventKind.ERROR], start=20)) == [n for n in errors if n >= 20]
+    assert list(log.line_numbers(start=50)) == [50, 51, 52]
+
+
+def test_search(filled):
+    log, lines = filled
+    matches, truncated = log.search("LINE 4")
+    assert [number for number, _ in matches] == [4] + list(range(40, 50))
+    assert not truncated
+    assert all(lines[number] == line for number, line in matches)
+    
+    matches, truncated = log.search("line", limit=3)
+    assert [number for number, _ in matches] == [0, 1, 2]
+    assert truncated
+
+
+def test_search_by_kind_and_candidates(filled):
+    log, _ = filled
+    matches, _ = log.search("2", kinds=[EventKind.ERROR])
+    assert [number for number, _ in matches] == [21, 28, 42]
+    matches, _ = log.search("4", candidates=[4, 14, 40, 41, 51])
+    assert [number for number, _ in matches] == [4, 14, 40, 41]
+
+
+def test_remove_deletes_files(filled):
+    log, _ = filled
+    spill, index = log.spill_path, log.index_path
+    log.remove()
+    assert not spill.exists() and not index.exists()
+    assert log.spill_path is None
+
+
+def test_prune_deletes_old_files(tmp_path):
+    old = tmp_path / "job-1-abc.log.gz"
+    old_index = tmp_path / "job-1-abc.idx"
+    new = tmp_path / "job-2-def.log.gz"
+    for path in (old, old_index, new):
+        path.write_bytes(b"")
+    stale = time.time() - 10 * 86400
+    os.utime(old, (stale, stale))
+    os.utime(old_index, (stale, stale))
+    JobOutputLog.prune(7, tmp_path)
+    assert sorted(path.name for path in tmp_path.iterdir()) == [new.name]
@@ -0,0 +1,68 @@
+"""
+Tests for parsing gallery-dl output lines.
+"""
+import pytest
+from utils.output_parser import EventKind, FILE_STARTED_PREFIX, OutputParser
+
+
+@pytest.mark.parametrize("line, kind", [
+    ("[twitter][error] HTTP Error 404", EventKind.ERROR),
+    ("[gallery-dl][critical] Unrecoverable error", EventKind.ERROR),
+    ("[downloader.http][warning] Connection reset", EventKind.WARNING),
+    ("[twitter][info] Logging in", EventKind.LOG),
+    ("[twitter][debug] GET https://x.com/", EventKind.LOG),
+])
+def test_log_lines(line, kind):
+    event = OutputParser.parse(line)
+    assert event.kind == kind
+    assert event.logger == line[1:line.index("]")]
+
+
+@pytest.mark.parametrize("line", [
+    "/home/user/gallery-dl/twitter/user/1.jpg",
+    "./gallery-dl/twitter/user/1 (copy).jpg",
+    "../downloads/a.png",
+    "C:\\Users\\me\\gallery-dl\\a.jpg",
+    "D:/gallery-dl/a.jpg",
+    "\\\\server\\share\\a.jpg",
+    "https://pbs.twimg.com/media/abc.jpg",  # Printed by --get-urls
+])
+def test_downloaded_files(line):
+    event = OutputParser.parse(line)
+    assert event.kind == EventKind.FILE_DONE
+    assert event.path == line
+
+
+@pytest.mark.parametrize("line", [
+    "read 3/10 pages",
+    "and/or something",
+    "see docs\\config",
+    "/ not a path",
+    "gallery-dl/twitter/1.jpg",
+    "Logging in as user",
+])
+def test_other_lines_are_log(line):
+    assert OutputParser.parse(line).kind == EventKind.LOG
+
+
+def test_skipped_and_started_files():
+    skipped = OutputParser.parse("# ./gallery-dl/a.jpg")
+    assert (skipped.kind, skipped.path) == (EventKind.FILE_SKIPPED, "./gallery-dl/a.jpg")
+    started = OutputParser.parse(FILE_STARTED_PREFIX + "/tmp/a.jpg")
+    assert (started.kind, started.path) == (EventKind.FILE_STARTED, "/tmp/a.jpg")
+
+
+def test_json_events():
+    event = OutputParser.parse('{"event": "Done", "path": "/tmp/a.jpg", "total": 120}')
+    assert (event.kind, event.path, event.data["total"]) == (EventKind.FILE_DONE, "/tmp/a.jpg", 120)
+    event = OutputParser.parse('{"id": 1, "_path": "/tmp/b.jpg"}')
+    assert (event.kind, event.path) == (EventKind.JSON, "/tmp/b.jpg")
+
+
+def test_invalid_json_is_log():
+    assert OutputParser.parse("{not json}").kind == EventKind.LOG
+
+
+def test_surrounding_whitespace_is_ignored():
+    event = OutputParser.parse("  /tmp/a.jpg \r")
+    assert (event.kind, event.text) == (EventKind.FILE_DONE, "/tmp/a.jpg")
@@ -0,0 +1,101 @@
+"""
+Tests for per-host limits, token buckets and adaptive (AIMD) limits.
+"""
+import math
+from utils.rate_limiter import HostLimit, HostLimiter, TokenBucket
+
+
+def test_token_bucket_starts_full_and_refills():
+    bucket = TokenBucket(rate=1.0, capacity=2, now=0.0)
+    assert bucket.time_until_available(0.0) == 0.0
+    bucket.take(0.0)
+    bucket.take(0.0)
+    assert bucket.time_until_available(0.0) == 1.0
+    assert bucket.time_until_available(0.5) == 0.5
+    assert bucket.time_until_available(1.0) == 0.0
+
+
+def test_token_bucket_does_not_exceed_capacity():
+    bucket = TokenBucket(rate=10.0, capacity=3, now=0.0)
+    bucket.take(0.0)
+    bucket.time_until_available(100.0)
+    assert bucket.tokens == 3
+
+
+def test_subdomains_share_the_site_limit():
+    limiter = HostLimiter({"example.com": HostLimit(max_concurrent=1)})
+    assert limiter.limit_for("img.Example.com")[0] == "example.com"
+    key = limiter.acquire("img.example.com", 0.0)
+    assert limiter.check("www.example.com", 0.0) == math.inf
+    limiter.release(key)
+    assert limiter.check("www.example.com", 0.0) == 0.0
+
+
+def test_most_specific_site_wins():
+    limiter = HostLimiter({"example.com": HostLimit(max_concurrent=1),
+                           "cdn.example.com": HostLimit(max_concurrent=5)})
+    assert limiter.limit_for("a.cdn.example.com") == ("cdn.example.com", HostLimit(max_concurrent=5))
+
+
+def test_hosts_without_entry_get_the_default_each():
+    limiter = HostLimiter(default=HostLimit(max_concurrent=1))
+    limiter.acquire("a.org", 0.0)
+    assert limiter.check("a.org", 0.0) == math.inf
+    assert limiter.check("b.org", 0.0) == 0.0
+
+
+def test_start_rate_allows_a_burst_then_waits():
+    limiter = HostLimiter({"example.com": HostLimit(max_concurrent=2, starts_per_minute=60)})
+    for _ in range(2):
+        assert limiter.check("example.com", 0.0) == 0.0
+        limiter.release(limiter.acquire("example.com", 0.0))
+    assert limiter.check("example.com", 0.0) == 1.0
+
+
+def test_adaptive_limit_grows_by_one_up_to_the_cap():
+    limiter = HostLimiter({"example.com": HostLimit(max_concurrent=3)})
+    limiter.set_adaptive(True, ceiling=10)
+    key, limit = limiter.limit_for("example.com")
+    assert limiter.max_concurrent(key, limit) == HostLimiter.ADAPTIVE_INITIAL
+    assert limiter.on_success(key, "ok", now=1.0, started_at=0.0) == (2, 3)
+    assert limiter.on_success(key, "ok", now=2.0, started_at=0.0) is None
+    assert limiter.max_concurrent(key, limit) == 3
+
+
+def test_adaptive_limit_halves_once_per_cooldown():
+    limiter = HostLimiter()
+    limiter.set_adaptive(True, ceiling=16)
+    key = "example.com"
+    for now in range(1, 7):
+        limiter.on_success(key, "ok", now=float(now), started_at=0.0)
+    assert limiter.adaptive_limits()[key].limit == 8
+    
+    assert limiter.on_throttled(key, "429", now=100.0) == (8, 4)
+    assert limiter.on_throttled(key, "429", now=100.0 + HostLimiter.DECREASE_COOLDOWN / 2) is None
+    assert limiter.on_throttled(key, "429", now=100.0 + HostLimiter.DECREASE_COOLDOWN) == (4, 2)
+
+
+def test_jobs_started_before_a_decrease_do_not_grow_the_limit():
+    limiter = HostLimiter()
+    limiter.set_adaptive(True, ceiling=16)
+    limiter.on_throttled("example.com", "429", now=50.0)
+    assert limiter.on_success("example.com", "ok", now=60.0, started_at=40.0) is None
+    assert limiter.on_success("example.com", "ok", now=60.0, started_at=55.0) == (1, 2)
+
+
+def test_adaptive_limit_never_drops_below_one():
+    limiter = HostLimiter()
+    limiter.set_adaptive(True, ceiling=4)
+    limiter.on_throttled("example.com", "429", now=0.0)
+    assert limiter.on_throttled("example.com", "429", now=100.0) is None
+    assert limiter.adaptive_limits()["example.com"].limit == 1
+
+
+def test_disabling_adaptive_limits_restores_the_configured_limit():
+    limiter = HostLimiter({"example.com": HostLimit(max_concurrent=4)})
+    limiter.set_adaptive(True, ceiling=4)
+    limiter.on_throttled("example.com", "429", now=0.0)
+    limiter.set_adaptive(False, ceiling=4)
+    key, limit = limiter.limit_for("example.com")
+    assert limiter.max_concurrent(key, limit) == 4
+    assert limiter.adaptive_limits() == {}
@@ -0,0 +1,33 @@
+"""
+Tests for the retry backoff policy.
+"""
+from utils.retry_policy import RetryPolicy
+
+
+def test_backoff_doubles_with_jitter_of_up_to_half():
+    policy = RetryPolicy(base_delay=10, max_delay=1000)
+    for attempt, full in ((1, 10), (2, 20), (3, 40), (5, 160)):
+        for _ in range(50):
+            assert full / 2 <= policy.backoff(attempt) <= full
+
+
+def test_backoff_is_capped():
+    policy = RetryPolicy(base_delay=10, max_delay=60)
+    assert all(30 <= policy.backoff(20) <= 60 for _ in range(50))
+
+
+def test_next_delay_until_attempts_are_used_up():
+    policy = RetryPolicy(max_attempts=3, base_delay=10, max_total_time=10000)
+    assert 5 <= policy.next_delay(1, first_started_at=0, now=0) <= 10
+    assert 10 <= policy.next_delay(2, first_started_at=0, now=0) <= 20
+    assert policy.next_delay(3, first_started_at=0, now=0) is None
+
+
+def test_next_delay_gives_up_after_the_total_time():
+    policy = RetryPolicy(max_attempts=10, base_delay=10, max_total_time=100)
+    assert policy.next_delay(1, first_started_at=0, now=80) is not None
+    assert policy.next_delay(1, first_started_at=0, now=95) is None
+
+
+def test_single_attempt_disables_retries():
+    assert RetryPolicy(max_attempts=1).next_delay(1, first_started_at=0, now=0) is None
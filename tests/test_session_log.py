@@ -0,0 +1,49 @@
+"""
+Tests for the session log and its sparse offset index.
+"""
+import os
+import time
+
+from utils.session_log import SessionLog
+
+
+class SmallLog(SessionLog):
+    INDEX_STEP = 4
+
+
+def test_nothing_is_written_until_the_first_line(tmp_path):
+    log = SessionLog(tmp_path)
+    log.write("")
+    assert log.path is None
+    assert log.read(0, 10) == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_read_pages_across_index_steps(tmp_path):
+    log = SmallLog(tmp_path)
+    lines = [f"line {number} é" for number in range(30)]
+    log.write("".join(line + "\n" for line in lines[:7]))
+    for line in lines[7:]:
+        log.write(line + "\n")
+    assert log.lines == 30
+    assert len(log._offsets) == 8
+    assert log.read(0, 30) == lines
+    assert log.read(5, 6) == lines[5:11]
+    assert log.read(28, 10) == lines[28:]
+    assert log.read(30, 5) == []
+    log.close()
+    assert log.read(13, 2) == lines[13:15]
+    log.close()
+
+
+def test_prune_deletes_old_session_logs(tmp_path):
+    old = tmp_path / "session-20200101-000000-1.log"
+    new = tmp_path / "session-20990101-000000-1.log"
+    other = tmp_path / "job-1-abc.log.gz"
+    for path in (old, new, other):
+        path.write_bytes(b"")
+    stale = time.time() - 10 * 86400
+    os.utime(old, (stale, stale))
+    os.utime(other, (stale, stale))
+    SessionLog.prune(7, tmp_path)
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([new.name, other.name])
@@ -0,0 +1,89 @@
+"""
+Tests for URL test verdicts, run against small Python scripts standing in for gallery-dl.
+"""
+import subprocess
+import sys
+import time
+
+import pytest
+
+from utils.error_classifier import ErrorRules
+from utils.gallery_dl_service import GalleryDLService
+
+
+def hint(rule_id):
+    return next(rule.hint for rule in ErrorRules.default().rules if rule.id == rule_id)
+
+
+def collect(script, probe_items=0):
+    """Run ``script`` as the test process and time how long the verdict took."""
+    handle = subprocess.Popen([sys.executable, "-u", "-c", script],
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    started = time.monotonic()
+    result = GalleryDLService._collect_test(handle, "example.com", probe_items)
+    elapsed = time.monotonic() - started
+    assert handle.poll() is not None
+    return result, elapsed
+
+
+@pytest.fixture(autouse=True)
+def short_timeouts(monkeypatch):
+    monkeypatch.setattr(GalleryDLService, "TEST_TIMEOUT", 3)
+    monkeypatch.setattr(GalleryDLService, "TEST_ERROR_GRACE", 0.5)
+
+
+def test_success():
+    result, _ = collect("print('/downloads/1.jpg')")
+    assert result.success
+    assert result.exit_code == 0
+    assert result.verdict == "OK"
+
+
+def test_reason_comes_from_all_output_not_just_the_kept_lines():
+    script = ("for i in range(150): print(f'[twitter][info] line {i}')\n"
+              "print('[twitter][error] Unsupported URL https://shutterstock.com/x')\n"
+              "raise SystemExit(64)")
+    result, _ = collect(script)
+    assert len(result.output) == GalleryDLService.TEST_OUTPUT_LINES
+    assert result.exit_code == 64
+    assert result.reason == hint("unsupported-shutterstock")
+    assert result.verdict == "Unsupported"
+
+
+def test_probe_stops_after_the_first_items():
+    script = "import time\nfor i in range(5): print(f'/downloads/{i}.jpg')\ntime.sleep(30)"
+    result, elapsed = collect(script, probe_items=3)
+    assert result.success
+    assert result.exit_code is None
+    assert "first items" in result.message
+    assert elapsed < GalleryDLService.TEST_TIMEOUT
+
+
+def test_own_exit_code_is_kept_within_the_grace_period():
+    script = "import time\nprint('[x][error] HTTP 429 Too Many Requests')\ntime.sleep(0.1)\nraise SystemExit(4)"
+    result, _ = collect(script)
+    assert result.exit_code == 4
+    assert result.reason == hint("too-many-requests")
+
+
+def test_error_stops_a_hanging_test_after_the_grace_period():
+    script = "import time\nprint('[x][error] HTTP 429 Too Many Requests')\ntime.sleep(30)"
+    result, elapsed = collect(script)
+    assert not result.success
+    assert result.exit_code is None
+    assert result.reason == hint("too-many-requests")
+    assert elapsed < GalleryDLService.TEST_TIMEOUT
+
+
+def test_timeout_without_output():
+    result, elapsed = collect("import time\ntime.sleep(30)")
+    assert not result.success
+    assert result.verdict == "Timeout"
+    assert GalleryDLService.TEST_TIMEOUT <= elapsed < GalleryDLService.TEST_TIMEOUT + 3
+
+
+def test_timeout_after_items_counts_as_slow_success():
+    script = "import time\nprint('/downloads/1.jpg')\ntime.sleep(30)"
+    result, _ = collect(script, probe_items=3)
+    assert result.success
+    assert "slow to list" in result.message
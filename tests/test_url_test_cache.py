@@ -0,0 +1,89 @@
+"""
+Tests for the persistent URL test result cache.
+"""
+import time
+import tkinter
+
+import pytest
+
+from models.settings import AppState
+from models.url_test_cache import UrlTestCache
+from utils.gallery_dl_service import GalleryDLService, UrlTestResult
+from utils.installation import Installation
+from utils.launcher import GalleryDLLauncher
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = UrlTestCache(tmp_path / "tests.db")
+    yield cache
+    cache.close()
+
+
+def result(url, tested_at=None, **kwargs):
+    return UrlTestResult(url, kwargs.pop("success", True), "message", [f"line {i}" for i in range(50)],
+                         tested_at=tested_at or time.time(), **kwargs)
+
+
+def test_results_are_kept_per_url_and_options(cache):
+    cache.put(result("https://a.example/1", exit_code=0, reason="OK", duration=1.5), "key")
+    cached = cache.get("https://a.example/1", "key", 60)
+    assert cached.cached and cached.success
+    assert (cached.exit_code, cached.reason, cached.duration) == (0, "OK", 1.5)
+    assert len(cached.output) == UrlTestCache.SAMPLE_LINES
+    assert cache.get("https://a.example/1", "other", 60) is None
+    assert cache.get("https://a.example/2", "key", 60) is None
+
+
+def test_newer_result_replaces_older(cache):
+    cache.put(result("https://a.example/1", success=False, exit_code=64), "key")
+    cache.put(result("https://a.example/1", exit_code=0), "key")
+    assert cache.count() == 1
+    assert cache.get("https://a.example/1", "key", 60).success
+
+
+def test_old_results_expire_and_are_pruned(cache):
+    cache.put(result("https://a.example/old", tested_at=time.time() - 120), "key")
+    cache.put(result("https://a.example/new"), "key")
+    assert cache.get("https://a.example/old", "key", 60) is None
+    assert cache.get("https://a.example/old", "key", 600) is not None
+    cache.prune(60)
+    assert cache.count() == 1
+
+
+def test_invalidate(cache):
+    for url in ("https://a.example/1", "https://a.example/2"):
+        cache.put(result(url), "key")
+        cache.put(result(url), "other")
+    assert cache.invalidate("https://a.example/1") == 2
+    assert cache.count() == 2
+    assert cache.invalidate() == 2
+    assert cache.count() == 0
+
+
+def test_results_survive_reopening(tmp_path):
+    cache = UrlTestCache(tmp_path / "tests.db")
+    cache.put(result("https://a.example/1"), "key")
+    cache.close()
+    cache = UrlTestCache(tmp_path / "tests.db")
+    assert cache.get("https://a.example/1", "key", 60) is not None
+    cache.close()
+
+
+def test_key_changes_with_probe_mode(monkeypatch):
+    monkeypatch.setattr(tkinter, "_default_root", tkinter.Tcl())
+    app_state = AppState()
+    app_state.test_probe_var.set(True)
+    probe_key = app_state.get_test_options_key()
+    app_state.test_probe_var.set(False)
+    assert app_state.get_test_options_key() != probe_key
+
+
+def test_key_changes_with_gallery_dl_installation(monkeypatch):
+    installation = Installation(["/usr/bin/gallery-dl"], "1.26.0", False, [["/usr/bin/gallery-dl", 1]])
+    monkeypatch.setattr(GalleryDLLauncher, "resolve", classmethod(lambda cls, recheck=False: installation))
+    key = GalleryDLService.test_cache_key("options")
+    assert GalleryDLService.test_cache_key("options") == key
+    assert GalleryDLService.test_cache_key("other") != key
+    installation.version = "1.27.0"
+    assert GalleryDLService.test_cache_key("options") != key
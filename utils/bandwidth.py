@@ -0,0 +1,61 @@
+"""
+Global bandwidth budget shared by concurrent gallery-dl jobs.
+"""
+from typing import Dict, Optional
+
+
+class BandwidthGovernor:
+    """Splits a total download rate across running jobs.
+    
+    gallery-dl's ``--limit-rate`` is fixed for the lifetime of a process, so
+    each job is given its share when it starts: the budget divided by the
+    number of jobs expected to run at once. Jobs only start while at least
+    half a share is unallocated, which keeps the total below the budget.
+    Shares freed by finished jobs go to the jobs started next; a job holding
+    far more than the current share can be restarted to rebalance. Not
+    thread-safe; callers serialize access.
+    """
+    
+    MIN_SHARE = 0.5  # Fraction of a fair share that must be free to start a job
+    REBALANCE_FACTOR = 2.0  # Jobs holding more than this many shares are rebalanced
+    
+    def __init__(self, budget: float = 0.0):
+        self.budget = budget  # Bytes per second, 0 = unlimited
+        self.allocations: Dict[int, float] = {}  # Job ID -> bytes per second
+    
+    @property
+    def enabled(self) -> bool:
+        return self.budget > 0
+    
+    @property
+    def free(self) -> float:
+        return self.budget - sum(self.allocations.values())
+    
+    def share(self, slots: int) -> float:
+        """Get the fair share of one job when ``slots`` jobs run at once."""
+        return self.budget / max(1, slots)
+    
+    def can_start(self, slots: int) -> bool:
+        """Check whether enough bandwidth is free to start another job."""
+        return not self.enabled or self.free >= self.share(slots) * self.MIN_SHARE
+    
+    def allocate(self, job_id: int, slots: int) -> Optional[float]:
+        """Reserve a job's share; returns its rate, or None without a budget."""
+        if not self.enabled:
+            return None
+        rate = max(1.0, min(self.share(slots), self.free))
+        self.allocations[job_id] = rate
+        return rate
+    
+    def release(self, job_id: int):
+        """Return the share of a finished job."""
+        self.allocations.pop(job_id, None)
+    
+    def rebalance_candidate(self, slots: int) -> Optional[int]:
+        """Get the job whose share is furthest above the fair share, if it is far above."""
+        if not self.enabled or not self.allocations:
+            return None
+        job_id = max(self.allocations, key=self.allocations.get)
+        if self.allocations[job_id] > self.share(slots) * self.REBALANCE_FACTOR:
+            return job_id
+        return None
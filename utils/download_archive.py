@@ -0,0 +1,98 @@
+"""
+Inspection and maintenance of gallery-dl download archives.
+
+gallery-dl records every downloaded file in an SQLite archive (a table
+``archive`` with one ``entry`` column) and skips entries it already knows.
+"""
+import os
+import sqlite3
+from typing import Optional, Tuple
+
+
+class DownloadArchive:
+    """Utilities for a gallery-dl ``--download-archive`` database."""
+    
+    TABLE = "archive"
+    TIMEOUT = 10  # gallery-dl may be writing to the archive at the same time
+    
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        return sqlite3.connect(path, timeout=DownloadArchive.TIMEOUT, isolation_level=None)
+    
+    @staticmethod
+    def _has_table(db: sqlite3.Connection) -> bool:
+        row = db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                         (DownloadArchive.TABLE,)).fetchone()
+        return row is not None
+    
+    @staticmethod
+    def get_stats(path: str) -> Tuple[int, int]:
+        """Get (number of entries, file size in bytes) of an archive."""
+        if not path or not os.path.isfile(path):
+            return 0, 0
+        
+        size = os.path.getsize(path)
+        for suffix in ("-wal", "-journal"):
+            if os.path.isfile(path + suffix):
+                size += os.path.getsize(path + suffix)
+        
+        db = DownloadArchive._connect(path)
+        try:
+            if not DownloadArchive._has_table(db):
+                return 0, size
+            count = db.execute(f"SELECT COUNT(*) FROM {DownloadArchive.TABLE}").fetchone()[0]
+        finally:
+            db.close()
+        return count, size
+    
+    @staticmethod
+    def prune(path: str, prefix: str) -> int:
+        """Remove all entries starting with ``prefix`` (e.g. a site category).
+        
+        Removed files will be downloaded again on the next run.
+        Returns the number of removed entries.
+        """
+        if not prefix or not os.path.isfile(path):
+            return 0
+        
+        # Entries are the primary key, so a range query uses the index
+        # (unlike LIKE, which is case-insensitive and needs escaping)
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        db = DownloadArchive._connect(path)
+        try:
+            if not DownloadArchive._has_table(db):
+                return 0
+            cursor = db.execute(
+                f"DELETE FROM {DownloadArchive.TABLE} WHERE entry >= ? AND entry < ?",
+                (prefix, upper))
+            return cursor.rowcount
+        finally:
+            db.close()
+    
+    @staticmethod
+    def clear(path: str) -> int:
+        """Remove all entries. Returns the number of removed entries."""
+        if not os.path.isfile(path):
+            return 0
+        
+        db = DownloadArchive._connect(path)
+        try:
+            if not DownloadArchive._has_table(db):
+                return 0
+            return db.execute(f"DELETE FROM {DownloadArchive.TABLE}").rowcount
+        finally:
+            db.close()
+    
+    @staticmethod
+    def compact(path: str) -> Optional[int]:
+        """Reclaim unused space. Returns the number of bytes saved."""
+        if not os.path.isfile(path):
+            return None
+        
+        before = os.path.getsize(path)
+        db = DownloadArchive._connect(path)
+        try:
+            db.execute("VACUUM")
+        finally:
+            db.close()
+        return before - os.path.getsize(path)
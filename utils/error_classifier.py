@@ -0,0 +1,179 @@
+"""
+Streaming classification of gallery-dl errors with a data-driven rule table.
+"""
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.output_parser import EventKind
+
+
+# Severities from least to most important
+SEVERITIES = ("info", "warning", "error", "fatal")
+
+
+@dataclass
+class ErrorRule:
+    """A pattern in gallery-dl output and what it means."""
+    id: str
+    category: str
+    severity: str
+    pattern: str  # Regular expression, matched case-insensitively
+    hint: str
+    exit_codes: Tuple[int, ...] = ()  # Only applies to these exit codes, if given
+    retryable: Optional[bool] = None  # Whether a failure with this error is worth retrying
+    throttle: str = ""  # Throttling reason when found in an error or warning
+    
+    @property
+    def rank(self) -> int:
+        return SEVERITIES.index(self.severity)
+    
+    def applies_to(self, exit_code: Optional[int]) -> bool:
+        """Check whether the rule applies to a job that exited with ``exit_code``."""
+        return not self.exit_codes or exit_code in self.exit_codes
+
+
+class ErrorRules:
+    """A compiled table of error rules.
+    
+    The default rules ship in ``error_rules.json`` next to this module;
+    rules in ``~/.gallery-dl-gui-error-rules.json`` (same format) come first
+    and replace default rules with the same ID. Earlier rules win when
+    several match at the same place. All patterns are joined into a single
+    regular expression, so each line is scanned once regardless of the
+    number of rules.
+    """
+    
+    DEFAULT_FILE = Path(__file__).with_name("error_rules.json")
+    USER_FILE = Path.home() / ".gallery-dl-gui-error-rules.json"
+    
+    _default: Optional["ErrorRules"] = None
+    
+    def __init__(self, rules: Iterable[ErrorRule]):
+        self.rules: List[ErrorRule] = []
+        patterns = []
+        for rule in rules:
+            try:
+                re.compile(rule.pattern)
+            except re.error as e:
+                print(f"Invalid pattern in error rule '{rule.id}': {e}")
+                continue
+            patterns.append(f"(?P<r{len(self.rules)}>{rule.pattern})")
+            self.rules.append(rule)
+        self._regex = re.compile("|".join(patterns) or "(?!)", re.IGNORECASE)
+    
+    @classmethod
+    def default(cls) -> "ErrorRules":
+        """Get the rules from the default and user rule files (loaded once)."""
+        if cls._default is None:
+            cls._default = cls.load([cls.USER_FILE, cls.DEFAULT_FILE])
+        return cls._default
+    
+    @classmethod
+    def load(cls, paths: Iterable[Path]) -> "ErrorRules":
+        """Load rules from JSON files; earlier files take precedence."""
+        rules: Dict[str, ErrorRule] = {}
+        for path in paths:
+            if not path.exists():
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entries = json.load(f).get("rules", [])
+                for entry in entries:
+                    rule = cls._parse_rule(entry)
+                    rules.setdefault(rule.id, rule)
+            except (OSError, ValueError, TypeError, KeyError, AttributeError) as e:
+                print(f"Error loading error rules from {path}: {e}")
+        return cls(rules.values())
+    
+    @staticmethod
+    def _parse_rule(entry: dict) -> ErrorRule:
+        severity = str(entry.get("severity", "error")).lower()
+        if severity not in SEVERITIES:
+            raise ValueError(f"unknown severity '{severity}' in rule '{entry['id']}'")
+        retryable = entry.get("retryable")
+        return ErrorRule(
+            id=str(entry["id"]),
+            category=str(entry.get("category", "")),
+            severity=severity,
+            pattern=str(entry["pattern"]),
+            hint=str(entry.get("hint", "")),
+            exit_codes=tuple(int(code) for code in entry.get("exit_codes", ())),
+            retryable=None if retryable is None else bool(retryable),
+            throttle=str(entry.get("throttle", "")),
+        )
+    
+    def match(self, line: str) -> List[ErrorRule]:
+        """Get the rules matching a line, in order of appearance."""
+        return [self.rules[int(m.lastgroup[1:])] for m in self._regex.finditer(line)]
+
+
+class ErrorClassifier:
+    """Classifies the output of one job line by line, as it arrives.
+    
+    Only remembers which rules matched, so memory and work per line do
+    not grow with the length of the output. Downloaded and skipped file
+    paths are not scanned.
+    """
+    
+    SKIPPED_KINDS = (EventKind.FILE_STARTED, EventKind.FILE_DONE, EventKind.FILE_SKIPPED)
+    REPORTED_KINDS = (EventKind.ERROR, EventKind.WARNING)  # Kinds of lines that update current and throttling
+    
+    def __init__(self, rules: Optional[ErrorRules] = None):
+        self.rules = rules or ErrorRules.default()
+        self.matches: Dict[str, int] = {}  # Rule ID -> number of matching lines
+        self.throttle_reason: Optional[str] = None  # First throttling seen in an error or warning
+        self.current: Optional[ErrorRule] = None  # Most severe rule in an error or warning line so far
+        self._matched: List[ErrorRule] = []  # In order of first match
+    
+    def feed(self, line: str, kind: str = EventKind.LOG) -> Optional[ErrorRule]:
+        """Classify an output line; returns the rule if it became the current one.
+        
+        Every line counts for ``result``, but only error and warning lines
+        change ``current`` and ``throttle_reason``, so an informational
+        line that mentions "login" or "403" does not look like a failure.
+        """
+        if kind in self.SKIPPED_KINDS:
+            return None
+        changed = None
+        reported = kind in self.REPORTED_KINDS
+        for rule in self.rules.match(line):
+            if rule.id not in self.matches:
+                self.matches[rule.id] = 0
+                self._matched.append(rule)
+            self.matches[rule.id] += 1
+            if not reported:
+                continue
+            if not rule.exit_codes and (self.current is None or rule.rank > self.current.rank):
+                self.current = changed = rule
+            if rule.throttle and self.throttle_reason is None:
+                self.throttle_reason = rule.throttle
+        return changed
+    
+    def feed_lines(self, lines: Iterable[str]):
+        """Classify a sequence of output lines."""
+        for line in lines:
+            self.feed(line)
+    
+    def result(self, exit_code: Optional[int] = None) -> Optional[ErrorRule]:
+        """Get the most severe matched rule for a job that exited with ``exit_code``.
+        
+        Among rules of the same severity, the one listed first wins.
+        """
+        best = None
+        for rule in self._matched:
+            if rule.applies_to(exit_code) and (
+                    best is None or rule.rank > best.rank
+                    or (rule.rank == best.rank and self.rules.rules.index(rule) < self.rules.rules.index(best))):
+                best = rule
+        return best
+    
+    def retryable(self, exit_code: Optional[int] = None) -> Optional[bool]:
+        """Get whether the matched rules call for a retry: False wins over True, None if undecided."""
+        verdicts = {rule.retryable for rule in self._matched if rule.applies_to(exit_code)}
+        if False in verdicts:
+            return False
+        if True in verdicts:
+            return True
+        return None
@@ -1,15 +1,61 @@
 """
 Gallery-DL service for handling downloads and URL testing.
 """
+import hashlib
+import json
+import os
 import subprocess
-import sys
+import threading
+import time
+from dataclasses import dataclass, field
 from typing import Optional, List, Tuple
 from urllib.parse import urlparse
+from utils.error_classifier import ErrorClassifier, ErrorRule, ErrorRules
+from utils.inprocess_engine import InProcessEngine
+from utils.launcher import GalleryDLLauncher
+from utils.output_drain import OutputDrain
+from utils.output_parser import OutputParser, EventKind
+from utils.worker_pool import WorkerPool
+
+
+@dataclass
+class UrlTestResult:
+    """Outcome of a URL test."""
+    url: str
+    success: bool
+    message: str
+    output: List[str] = field(default_factory=list)
+    exit_code: Optional[int] = None
+    reason: str = ""
+    duration: float = 0.0
+    tested_at: float = field(default_factory=time.time)
+    cached: bool = False
+    
+    @property
+    def verdict(self) -> str:
+        """Short verdict: OK, Unsupported, Timeout, Error or Failed."""
+        if self.success:
+            return "OK"
+        if self.exit_code == 64 or "not supported" in self.reason:
+            return "Unsupported"
+        if self.exit_code is None:
+            return "Timeout" if self.reason == "Timeout" else "Error"
+        return "Failed"
 
 
 class GalleryDLService:
     """Service for interacting with gallery-dl."""
     
+    # Execution engines
+    ENGINE_SUBPROCESS = "subprocess"
+    ENGINE_INPROCESS = "inprocess"
+    ENGINE_POOL = "pool"
+    
+    TEST_TIMEOUT = 30
+    TEST_ERROR_GRACE = 2  # Seconds a test may keep running after reporting an error
+    TEST_OUTPUT_LINES = 100  # Output lines kept from a test
+    PROBE_ITEMS = 3  # Items listed by a quick probe
+    
     ERROR_DESCRIPTIONS = {
         1: "General error or exception occurred",
         2: "Interrupted by user (Ctrl+C)",
@@ -28,82 +74,204 @@ class GalleryDLService:
         64: "Unsupported URL or site - this website is not supported by gallery-dl"
     }
     
+    # Exit codes of failures that may go away when the job is run again
+    RETRYABLE_EXIT_CODES = {4, 32}
+    # Exit codes of failures that need a change by the user first
+    PERMANENT_EXIT_CODES = {2, 3, 5, 6, 8, 64, 128}
+    
     @staticmethod
-    def check_installation() -> Tuple[bool, str]:
-        """Check if gallery-dl is installed and accessible."""
-        # Try gallery-dl command first
-        try:
-            result = subprocess.run(["gallery-dl", "--version"], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                version = result.stdout.strip()
-                return True, f"Gallery-dl found: {version}"
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            pass
-        
-        # Try python -m gallery_dl
-        try:
-            result = subprocess.run([sys.executable, "-m", "gallery_dl", "--version"], 
-                                  capture_output=True, text=True, timeout=5)
-            if result.returncode == 0:
-                version = result.stdout.strip()
-                return True, f"Gallery-dl found (Python module): {version}"
-        except (subprocess.TimeoutExpired, FileNotFoundError):
-            pass
+    def check_installation(recheck: bool = False) -> Tuple[bool, str]:
+        """Check if gallery-dl is installed and accessible.
         
-        return False, "Gallery-dl not found. Please install it first: pip install gallery-dl"
+        Runs subprocesses unless the result of an earlier start is still
+        valid, so call it off the Tk thread.
+        """
+        installation = GalleryDLLauncher.resolve(recheck)
+        if installation is None:
+            if GalleryDLLauncher.pinned():
+                return False, f"Gallery-dl not found at {GalleryDLLauncher.pinned()}"
+            return False, "Gallery-dl not found. Please install it first: pip install gallery-dl"
+        if installation.module:
+            return True, f"Gallery-dl found (Python module): {installation.version} ({installation.command[0]})"
+        return True, f"Gallery-dl found: {installation.version} ({installation.command[0]})"
     
     @staticmethod
-    def test_url(url: str) -> Tuple[bool, str, List[str]]:
-        """Test URL without downloading."""
-        if not url.strip():
-            return False, "Please enter a URL", []
+    def test_url(url: str, engine: str = ENGINE_SUBPROCESS, worker_pool: Optional[WorkerPool] = None,
+                 options: Optional[List[str]] = None, probe_items: int = 0) -> UrlTestResult:
+        """Test URL without downloading.
         
+        ``options`` (authentication, cookies, config file) are passed to
+        gallery-dl before the URL. With ``probe_items``, only that many
+        items are listed (``--range``) and the test ends as soon as they
+        are, instead of simulating the whole gallery.
+        """
+        url = url.strip()
+        if not url:
+            return UrlTestResult(url, False, "Please enter a URL")
+        
+        started = time.time()
         try:
             # Parse URL to show basic info
-            parsed = urlparse(url)
-            domain = parsed.netloc
-            
-            # Try gallery-dl command first
-            cmd = ["gallery-dl", "--no-download", "--simulate", url]
+            domain = GalleryDLService.get_domain(url)
             
+            test_cmd = ["gallery-dl", *(options or []), "--no-download", "--simulate"]
+            if probe_items:
+                test_cmd.extend(["--range", f"1-{probe_items}"])
+            test_cmd.append(url)
+            handle = GalleryDLService.create_download_process(test_cmd, engine, worker_pool)
+            result = GalleryDLService._collect_test(handle, domain, probe_items)
+        except Exception as e:
+            result = UrlTestResult(url, False, f"✗ Test error: {str(e)}", reason=str(e))
+        
+        result.url = url
+        result.duration = time.time() - started
+        return result
+    
+    @staticmethod
+    def _collect_test(handle, domain: str, probe_items: int) -> UrlTestResult:
+        """Read the output of a running URL test and decide on a verdict as early as possible.
+        
+        The test stops as soon as ``probe_items`` items were listed, and
+        soon after the first error if gallery-dl does not exit by itself.
+        A test that runs into the timeout after listing items counts as
+        successful: the gallery is slow, not broken.
+        """
+        drain = OutputDrain(handle.stdout)
+        classifier = ErrorClassifier()
+        output_lines: List[str] = []
+        items = 0
+        timer = None
+        stopped = []  # Why the output was cut off, if it was
+        
+        def stop_after(seconds: float, reason: str):
+            nonlocal timer
+            if timer is not None:
+                timer.cancel()
+            timer = threading.Timer(seconds, lambda: (stopped.append(reason), drain.cancel()))
+            timer.daemon = True
+            timer.start()
+        
+        stop_after(GalleryDLService.TEST_TIMEOUT, "timeout")
+        error_seen = False
+        try:
+            for lines in drain.batches():
+                for line in lines:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    if len(output_lines) < GalleryDLService.TEST_OUTPUT_LINES:
+                        output_lines.append(line)
+                    event = OutputParser.parse(line)
+                    if event.kind in (EventKind.FILE_DONE, EventKind.FILE_SKIPPED):
+                        items += 1
+                    classifier.feed(line, event.kind)
+                    if event.kind == EventKind.ERROR and not error_seen:
+                        # Give gallery-dl a moment to exit with its own exit code
+                        error_seen = True
+                        stop_after(GalleryDLService.TEST_ERROR_GRACE, "error")
+                if probe_items and items >= probe_items:
+                    stopped.append("probe")
+                    break
+        finally:
+            timer.cancel()
+        
+        if not stopped:
+            # gallery-dl finished on its own
             try:
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            except FileNotFoundError:
-                # Fallback to python -m gallery_dl
-                cmd = [sys.executable, "-m", "gallery_dl", "--no-download", "--simulate", url]
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            
-            output_lines = []
-            if result.stdout:
-                output_lines = [line.strip() for line in result.stdout.split('\n') if line.strip()]
-            
-            if result.returncode == 0:
-                success_msg = f"✓ URL test successful for {domain} - gallery-dl can process this URL"
-                return True, success_msg, output_lines
-            else:
-                exit_code = result.returncode
-                error_desc = GalleryDLService.get_error_description(exit_code)
-                
-                # Analyze output for more specific context
-                all_output = []
-                if result.stdout:
-                    all_output.extend(result.stdout.split('\n'))
-                if result.stderr:
-                    all_output.extend(result.stderr.split('\n'))
-                
-                error_context = GalleryDLService.analyze_error_output(all_output, exit_code)
-                
-                error_msg = f"✗ URL test failed for {domain} (exit code: {exit_code})\nReason: {error_desc}"
-                if error_context:
-                    error_msg += f"\nContext: {error_context}"
-                
-                return False, error_msg, output_lines
-                
+                returncode = handle.wait(timeout=GalleryDLService.TEST_ERROR_GRACE)
+            except subprocess.TimeoutExpired:
+                GalleryDLService._stop_test(handle)
+                returncode = handle.returncode
+            if returncode is not None:
+                return GalleryDLService._test_result(domain, returncode, output_lines,
+                                                     classifier.result(returncode))
+            stopped.append("timeout")
+        
+        GalleryDLService._stop_test(handle)
+        reason = stopped[0]
+        if items and reason != "error":
+            detail = ("stopped after the first items" if reason == "probe"
+                      else f"stopped after {items} item(s), the gallery is slow to list")
+            success_msg = f"✓ URL test successful for {domain} - gallery-dl can process this URL ({detail})"
+            return UrlTestResult("", True, success_msg, output_lines, None, "OK")
+        if reason == "error":
+            rule = classifier.result()
+            context = rule.hint if rule else next(
+                (line for line in output_lines if OutputParser.parse(line).kind == EventKind.ERROR), "")
+            return UrlTestResult("", False, f"✗ URL test failed for {domain}\nContext: {context}",
+                                 output_lines, None, context)
+        return UrlTestResult("", False, "✗ Test timeout - URL may be slow to respond or invalid",
+                             output_lines, None, "Timeout")
+    
+    @staticmethod
+    def _stop_test(handle):
+        """Stop a URL test that is still running, without waiting long for it."""
+        try:
+            handle.terminate()
+            handle.wait(timeout=GalleryDLService.TEST_ERROR_GRACE)
         except subprocess.TimeoutExpired:
-            return False, "✗ Test timeout - URL may be slow to respond or invalid", []
-        except Exception as e:
-            return False, f"✗ Test error: {str(e)}", []
+            handle.kill()
+        except OSError:
+            pass
+    
+    @staticmethod
+    def _test_result(domain: str, exit_code: int, output_lines: List[str],
+                     rule: Optional[ErrorRule]) -> UrlTestResult:
+        """Build the URL test verdict from a finished gallery-dl run.
+        
+        ``rule`` is the classification of the whole output, which may be
+        longer than the ``output_lines`` kept.
+        """
+        if exit_code == 0:
+            success_msg = f"✓ URL test successful for {domain} - gallery-dl can process this URL"
+            return UrlTestResult("", True, success_msg, output_lines, exit_code, "OK")
+        
+        error_desc = GalleryDLService.get_error_description(exit_code)
+        error_context = rule.hint if rule else None
+        
+        error_msg = f"✗ URL test failed for {domain} (exit code: {exit_code})\nReason: {error_desc}"
+        if error_context:
+            error_msg += f"\nContext: {error_context}"
+        
+        return UrlTestResult("", False, error_msg, output_lines, exit_code, error_context or error_desc)
+    
+    @staticmethod
+    def test_cache_key(options_key: str) -> str:
+        """Combine a key of test settings with the gallery-dl installation that runs the tests.
+        
+        Cached verdicts (e.g. "try updating gallery-dl") then no longer apply
+        once gallery-dl was updated or another installation was picked. May
+        run ``gallery-dl --version``, so call it off the Tk thread.
+        """
+        installation = GalleryDLLauncher.resolve()
+        state = [options_key]
+        if installation:
+            state += [installation.command, installation.version, installation.key]
+        return hashlib.sha256(json.dumps(state).encode()).hexdigest()[:16]
+    
+    @staticmethod
+    def is_conclusive(result: UrlTestResult) -> bool:
+        """Check whether a URL test result holds until the URL or options change.
+        
+        Successes and permanent errors (unsupported URL, login required, ...)
+        are conclusive; timeouts, network errors and interrupted tests are not.
+        """
+        if result.success:
+            return True
+        return result.exit_code in GalleryDLService.PERMANENT_EXIT_CODES and result.exit_code != 2
+    
+    @staticmethod
+    def get_domain(url: str) -> str:
+        """Get the host part of a URL."""
+        return urlparse(url.strip()).netloc
+    
+    @staticmethod
+    def get_host_key(url: str) -> str:
+        """Get the host a download is scheduled under (lowercase, without port or 'www.')."""
+        host = GalleryDLService.get_domain(url).lower().rpartition("@")[2].split(":")[0]
+        if host.startswith("www."):
+            host = host[4:]
+        return host
     
     @staticmethod
     def get_error_description(exit_code: int) -> str:
@@ -118,50 +286,54 @@ class GalleryDLService:
     @staticmethod
     def analyze_error_output(output_lines: List[str], exit_code: int) -> Optional[str]:
         """Analyze gallery-dl output to provide specific error context."""
-        output_text = " ".join(output_lines).lower()
-        
-        # Check for common error patterns
-        if "unsupported url" in output_text:
-            # Extract the URL or site name for context
-            for line in output_lines:
-                if "Unsupported URL" in line:
-                    if "shutterstock" in line.lower():
-                        return "Shutterstock is not supported by gallery-dl (commercial stock photo site)"
-                    elif "getty" in line.lower():
-                        return "Getty Images is not supported (commercial stock photo site)"
-                    elif "adobe stock" in line.lower():
-                        return "Adobe Stock is not supported (commercial stock photo site)"
-                    else:
-                        return "This website is not supported by gallery-dl"
-        
-        if exit_code == 6 and ("login" in output_text or "authentication" in output_text):
-            return "This site requires login credentials - try using the Authentication tab"
-        
-        if exit_code == 8 and ("extractor" in output_text or "format" in output_text):
-            return "Website structure may have changed - try updating gallery-dl"
-        
-        if exit_code == 16 and ("permission" in output_text or "access" in output_text):
-            return "Check file permissions and available disk space"
-        
-        if "network" in output_text or "connection" in output_text or "timeout" in output_text:
-            return "Network connectivity issue - check your internet connection"
-        
+        classifier = ErrorClassifier()
+        classifier.feed_lines(output_lines)
+        rule = classifier.result(exit_code)
+        return rule.hint if rule else None
+    
+    @staticmethod
+    def get_throttle_reason(message: str) -> Optional[str]:
+        """Check a gallery-dl warning or error message for signs of throttling."""
+        for rule in ErrorRules.default().match(message):
+            if rule.throttle:
+                return rule.throttle
         return None
     
     @staticmethod
-    def create_download_process(cmd: List[str]) -> subprocess.Popen:
-        """Create a subprocess for downloading."""
-        try:
-            return subprocess.Popen(
-                cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                text=True, bufsize=1, universal_newlines=True
-            )
-        except FileNotFoundError:
-            # Fallback to python -m gallery_dl
-            cmd[0] = sys.executable
-            cmd.insert(1, "-m")
-            cmd.insert(2, "gallery_dl")
-            return subprocess.Popen(
-                cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
-                text=True, bufsize=1, universal_newlines=True
-            )
+    def is_retryable(exit_code: int, classifier: ErrorClassifier) -> bool:
+        """Check whether a failed job is worth retrying.
+        
+        Network, I/O and throttling failures are retryable; interrupted jobs
+        and argument, config, authentication, extraction and unsupported-URL
+        errors are not. Error rules decide for other exit codes (e.g. crashed
+        worker processes).
+        """
+        if exit_code in GalleryDLService.PERMANENT_EXIT_CODES:
+            return False
+        verdict = classifier.retryable(exit_code)
+        if verdict is False:
+            return False
+        return exit_code in GalleryDLService.RETRYABLE_EXIT_CODES or bool(verdict)
+    
+    @staticmethod
+    def create_download_process(cmd: List[str], engine: str = ENGINE_SUBPROCESS,
+                                worker_pool: Optional[WorkerPool] = None):
+        """Create a process (or Popen-like handle) for downloading.
+        
+        Commands the in-process engine cannot run, also when importing
+        gallery_dl fails, fall back to a subprocess, whose output is a
+        binary pipe of UTF-8 text (see OutputDrain).
+        ``cmd`` starts with "gallery-dl" and is not modified; the subprocess
+        runs the installation resolved by GalleryDLLauncher.
+        """
+        if engine == GalleryDLService.ENGINE_POOL and worker_pool and InProcessEngine.supports(cmd):
+            return worker_pool.start(cmd)
+        if engine == GalleryDLService.ENGINE_INPROCESS and InProcessEngine.supports(cmd):
+            try:
+                return InProcessEngine.start(cmd)
+            except ImportError:
+                pass  # Found but broken; supports() is False from now on
+        
+        env = dict(os.environ, PYTHONIOENCODING="utf-8")
+        return subprocess.Popen(GalleryDLLauncher.build(cmd), stdout=subprocess.PIPE,
+                                stderr=subprocess.STDOUT, env=env)
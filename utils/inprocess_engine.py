@@ -0,0 +1,419 @@
+"""
+In-process execution engine for gallery-dl.
+
+Imports gallery_dl once and runs jobs through its job/config API in worker
+threads instead of starting a new interpreter for every download.
+"""
+import importlib.util
+import logging
+import queue
+import subprocess
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from utils.output_parser import FILE_STARTED_PREFIX
+
+
+# Options whose output gallery-dl prints directly to stdout; these jobs are
+# left to the subprocess engine.
+UNSUPPORTED_OPTIONS = {
+    "-g", "--get-urls", "-G", "--resolve-urls", "-j", "--dump-json",
+    "-J", "--resolve-json", "-K", "--list-keywords", "-E", "--extractor-info",
+    "--list-extractors", "--list-modules", "--list-sites", "--version", "-h", "--help",
+}
+
+# Options that only set a top-level config value, mapped to that key. These
+# are applied per job thread, so jobs that differ only in them (e.g. their
+# bandwidth share) still run concurrently.
+PER_JOB_OPTIONS = {
+    "-r": "rate", "--limit-rate": "rate",
+    "-d": "base-directory", "--destination": "base-directory",
+}
+
+# Exit code reported for jobs cancelled through terminate()
+CANCELLED_EXIT_CODE = 2
+
+# Exit code reported for command lines gallery-dl's argument parser rejects,
+# the one argparse exits with
+USAGE_EXIT_CODE = 2
+
+_local = threading.local()
+
+
+class JobCancelled(BaseException):
+    """Raised inside a gallery-dl job thread when its handle was terminated.
+    
+    Derives from BaseException so gallery-dl's own error handling does not
+    swallow it, much like KeyboardInterrupt in the command-line program.
+    """
+
+
+class LineReader:
+    """File-like reader over output lines relayed from an in-process or pooled job.
+    
+    Mirrors the ``readline`` contract of a text-mode pipe: returns a line
+    with a trailing newline, or an empty string once the job has finished.
+    """
+    
+    def __init__(self):
+        self._lines = queue.Queue()
+    
+    def write_line(self, line: str):
+        self._lines.put(line + "\n")
+    
+    def close(self):
+        self._lines.put("")
+    
+    def readline(self) -> str:
+        return self._lines.get()
+
+
+class InProcessHandle:
+    """Popen-like handle for a gallery-dl job running in a worker thread."""
+    
+    def __init__(self, argv: List[str]):
+        self.args = argv
+        self.pid = None
+        self.returncode: Optional[int] = None
+        self.stdout = LineReader()
+        self._done = threading.Event()
+        self._cancelled = threading.Event()
+    
+    def poll(self) -> Optional[int]:
+        """Return the exit code, or None while the job is running."""
+        return self.returncode
+    
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """Wait for the job to finish and return its exit code."""
+        if not self._done.wait(timeout):
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+    
+    def terminate(self):
+        """Ask the job to stop before its next file."""
+        self._cancelled.set()
+    
+    kill = terminate
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+    
+    def check_cancelled(self):
+        if self._cancelled.is_set():
+            raise JobCancelled()
+    
+    def emit(self, line: str):
+        """Send an output line to the reader (dropped once cancelled)."""
+        if not self._cancelled.is_set():
+            self.stdout.write_line(line)
+    
+    def finish(self, returncode: int):
+        self.returncode = CANCELLED_EXIT_CODE if self.cancelled else returncode
+        self._done.set()
+        self.stdout.close()
+
+
+class _JobOutput:
+    """gallery-dl output object that writes file events to a job handle.
+    
+    Uses the same format as gallery-dl's pipe output: downloaded files are
+    printed as their path, skipped files are prefixed with '# '. Starting
+    downloads are reported with a marker line for the output parser.
+    """
+    
+    def __init__(self, handle: InProcessHandle):
+        self.handle = handle
+    
+    def start(self, path):
+        self.handle.emit(FILE_STARTED_PREFIX + path)
+    
+    def skip(self, path):
+        self.handle.emit("# " + path)
+    
+    def success(self, path, *args):
+        self.handle.emit(path)
+    
+    def progress(self, bytes_total, bytes_downloaded, bytes_per_second):
+        pass
+
+
+class _RoutingLogHandler(logging.Handler):
+    """Send log records to the handle of the job running in the current thread."""
+    
+    def emit(self, record):
+        handle = getattr(_local, "handle", None)
+        if handle is None:
+            return
+        try:
+            message = record.getMessage()
+        except Exception:
+            message = str(record.msg)
+        handle.emit(f"[{record.name}][{record.levelname.lower()}] {message}")
+
+
+class InProcessEngine:
+    """Runs gallery-dl jobs inside this process.
+    
+    gallery-dl keeps its configuration in a process-wide dict, so jobs only
+    run concurrently when they were started with the same options, apart
+    from the per-job rate limit and destination. A job with different
+    options waits until the running ones have finished.
+    """
+    
+    _import_lock = threading.Lock()
+    _modules = None
+    _available: Optional[bool] = None  # Whether importing gallery_dl worked, None until tried
+    _found: Optional[bool] = None  # Whether the gallery_dl package can be found
+    
+    _config_cond = threading.Condition()
+    _active_signature: Optional[Tuple[str, ...]] = None
+    _active_count = 0
+    
+    _job_classes = {}
+    
+    @classmethod
+    def is_available(cls) -> bool:
+        """Check whether the gallery_dl package can be imported.
+        
+        Imports gallery_dl and all extractor modules if that was not tried
+        yet, which takes a second; do not call it on the Tk thread.
+        """
+        if cls._available is None:
+            try:
+                cls._load()
+            except ImportError:
+                pass
+        return bool(cls._available)
+    
+    @classmethod
+    def is_installed(cls) -> bool:
+        """Check whether the gallery_dl package can be found, without importing it."""
+        if cls._available is not None:
+            return cls._available
+        if cls._found is None:
+            try:
+                cls._found = importlib.util.find_spec("gallery_dl") is not None
+            except (ImportError, ValueError):
+                cls._found = False
+        return cls._found
+    
+    @classmethod
+    def supports(cls, argv: List[str]) -> bool:
+        """Check whether a command can be run in-process (or in a pooled worker).
+        
+        Does not import gallery_dl: a command that passes this check may
+        still fail to start with an ImportError.
+        """
+        return cls.is_installed() and not any(arg in UNSUPPORTED_OPTIONS for arg in argv[1:])
+    
+    @classmethod
+    def warm_up(cls, on_unavailable: Optional[Callable[[], None]] = None, import_modules: bool = True):
+        """Check for gallery_dl in a background thread.
+        
+        With ``import_modules``, gallery_dl and all extractor modules are
+        imported there as well. ``on_unavailable`` is called from that thread
+        if gallery_dl cannot be found or imported.
+        """
+        def worker():
+            if import_modules:
+                try:
+                    cls._load()
+                except ImportError:
+                    pass
+                except Exception as e:
+                    print(f"Failed to load gallery_dl: {e}")
+                    return
+            if not cls.is_installed() and on_unavailable:
+                on_unavailable()
+        threading.Thread(target=worker, daemon=True).start()
+    
+    @classmethod
+    def start(cls, argv: List[str]) -> InProcessHandle:
+        """Start a gallery-dl command in a worker thread.
+        
+        ``argv`` is a full gallery-dl command line as built by
+        ``AppState.build_gallery_dl_command``; ``argv[0]`` is ignored.
+        """
+        modules = cls._load()
+        handle = InProcessHandle(argv)
+        try:
+            args = modules["option"].build_parser().parse_args(argv[1:])
+        except SystemExit:
+            # argparse has printed the problem to stderr; fail the job instead
+            # of letting SystemExit end the calling thread
+            handle.emit("[gallery-dl][error] Invalid command line arguments")
+            handle.finish(USAGE_EXIT_CODE)
+            return handle
+        
+        per_job_keys = set(PER_JOB_OPTIONS.values())
+        overrides = {key: value for path, key, value in args.options
+                     if not path and key in per_job_keys}
+        args.options = [option for option in args.options
+                        if option[0] or option[1] not in per_job_keys]
+        
+        thread = threading.Thread(target=cls._run, args=(handle, argv, args, overrides), daemon=True)
+        thread.start()
+        return handle
+    
+    @classmethod
+    def _load(cls):
+        """Import gallery_dl and its extractors once and install the log router."""
+        with cls._import_lock:
+            if cls._modules is None:
+                try:
+                    from gallery_dl import config, exception, job, option, extractor, output
+                except ImportError:
+                    cls._available = False
+                    raise
+                
+                # Same logger setup as gallery-dl's initialize_logging(),
+                # minus its stderr handler
+                for level in (logging.DEBUG, logging.INFO, logging.WARNING,
+                              logging.ERROR, logging.CRITICAL):
+                    logging.addLevelName(level, logging.getLevelName(level).lower())
+                logging.Logger.manager.setLoggerClass(output.Logger)
+                
+                root = logging.getLogger()
+                root.addHandler(_RoutingLogHandler())
+                if root.level == logging.NOTSET or root.level > logging.INFO:
+                    root.setLevel(logging.INFO)
+                
+                # Extractor modules are imported lazily through a shared
+                # generator, which is not thread-safe; load them all up front.
+                extractor.extractors()
+                
+                # Let the job thread's own values of per-job options take
+                # precedence, the way command-line options do
+                interpolate = config.interpolate
+                
+                def job_interpolate(path, key, default=None, conf=config._config):
+                    overrides = getattr(_local, "overrides", None)
+                    if overrides and key in overrides and conf is config._config:
+                        return overrides[key]
+                    return interpolate(path, key, default, conf)
+                
+                config.interpolate = job_interpolate
+                
+                cls._modules = {
+                    "config": config,
+                    "exception": exception,
+                    "job": job,
+                    "option": option,
+                    "extractor": extractor,
+                }
+                cls._available = True
+            return cls._modules
+    
+    @staticmethod
+    def _signature(argv: List[str], args) -> Tuple[str, ...]:
+        """Get the part of a command line that determines gallery-dl's shared config.
+        
+        URLs and per-job options (see ``PER_JOB_OPTIONS``) are left out.
+        """
+        urls = set(args.urls or ())
+        signature = []
+        skip_value = False
+        for arg in argv[1:]:
+            if skip_value:
+                skip_value = False
+            elif arg in PER_JOB_OPTIONS:
+                skip_value = True
+            elif arg.split("=", 1)[0] in PER_JOB_OPTIONS or (arg[:2] in PER_JOB_OPTIONS
+                                                             and not arg.startswith("--")):
+                pass  # '--limit-rate=1M' or '-r1M'
+            elif arg not in urls:
+                signature.append(arg)
+        return tuple(signature)
+    
+    @classmethod
+    def _acquire_config(cls, signature: Tuple[str, ...], args):
+        """Wait until the global config can be used for ``signature``.
+        
+        The config is rebuilt from scratch whenever no other job is running,
+        so changes to config files are picked up between jobs.
+        """
+        with cls._config_cond:
+            while cls._active_count and cls._active_signature != signature:
+                cls._config_cond.wait()
+            if not cls._active_count:
+                cls._configure(args)
+                cls._active_signature = signature
+            cls._active_count += 1
+    
+    @classmethod
+    def _release_config(cls):
+        with cls._config_cond:
+            cls._active_count -= 1
+            if not cls._active_count:
+                cls._config_cond.notify_all()
+    
+    @classmethod
+    def _configure(cls, args):
+        """Apply parsed command-line arguments to gallery-dl's global config."""
+        config = cls._modules["config"]
+        config.clear()
+        
+        if getattr(args, "config_load", True):
+            config.load()
+        if getattr(args, "configs_json", None):
+            config.load(args.configs_json, strict=True)
+        if getattr(args, "configs_yaml", None):
+            import yaml
+            config.load(args.configs_yaml, strict=True, loads=yaml.safe_load)
+        for opts in getattr(args, "options", None) or ():
+            config.set(*opts)
+        if getattr(args, "postprocessors", None):
+            config.set((), "postprocessors", args.postprocessors)
+    
+    @classmethod
+    def _job_class(cls, base):
+        """Get a subclass of a gallery-dl job type that reports to the current handle."""
+        if base not in cls._job_classes:
+            class EngineJob(base):
+                def __init__(self, url, parent=None):
+                    base.__init__(self, url, parent)
+                    self.out = _JobOutput(_local.handle)
+                
+                def handle_url(self, url, kwdict):
+                    _local.handle.check_cancelled()
+                    return base.handle_url(self, url, kwdict)
+                
+                def handle_queue(self, url, kwdict):
+                    _local.handle.check_cancelled()
+                    return base.handle_queue(self, url, kwdict)
+            
+            cls._job_classes[base] = EngineJob
+        return cls._job_classes[base]
+    
+    @classmethod
+    def _run(cls, handle: InProcessHandle, argv: List[str], args, overrides: Dict[str, Any]):
+        """Job thread: configure gallery-dl and run every URL of the command."""
+        _local.handle = handle
+        _local.overrides = overrides
+        status = 0
+        acquired = False
+        try:
+            cls._acquire_config(cls._signature(argv, args), args)
+            acquired = True
+            
+            jobtype = cls._job_class(getattr(args, "jobtype", None) or cls._modules["job"].DownloadJob)
+            no_extractor = cls._modules["exception"].NoExtractorError
+            for url in args.urls:
+                handle.check_cancelled()
+                try:
+                    status |= jobtype(url).run()
+                except no_extractor:
+                    # Same message and exit code as gallery-dl's main()
+                    handle.emit(f"[gallery-dl][error] Unsupported URL '{url}'")
+                    status |= 64
+        except JobCancelled:
+            pass
+        except Exception as e:
+            handle.emit(f"[gallery-dl][error] {e.__class__.__name__}: {e}")
+            status = status or 1
+        finally:
+            if acquired:
+                cls._release_config()
+            _local.handle = None
+            _local.overrides = None
+            handle.finish(status)
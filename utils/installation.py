@@ -0,0 +1,133 @@
+"""
+Detection of the gallery-dl installation, cached across application starts.
+"""
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+@dataclass
+class Installation:
+    """A way to run gallery-dl that was found to work."""
+    command: List[str]  # Arguments that start gallery-dl, e.g. ["/usr/bin/gallery-dl"]
+    version: str
+    module: bool = False  # Runs as "python -m gallery_dl"
+    key: List[list] = None  # [path, mtime_ns] of the files the result depends on
+
+
+class InstallationDetector:
+    """Finds gallery-dl and its version, skipping the version check when nothing changed.
+    
+    The ``gallery-dl`` command on PATH is tried first, then the
+    ``gallery_dl`` module of the running Python. A pinned path replaces
+    both: a Python interpreter runs ``-m gallery_dl``, a virtualenv folder
+    uses its ``gallery-dl`` script or interpreter, anything else is taken
+    as the gallery-dl executable. The last successful result
+    is stored in a small JSON file together with the path and modification
+    time of the executable (and module); as long as these are unchanged,
+    later starts reuse it without running any subprocess.
+    """
+    
+    CACHE_FILE = Path.home() / ".gallery-dl-gui-install.json"
+    VERSION_TIMEOUT = 5
+    
+    @classmethod
+    def detect(cls, pinned: str = "", use_cache: bool = True) -> Optional[Installation]:
+        """Get the gallery-dl installation, or None if gallery-dl was not found."""
+        cached = cls._load_cache() if use_cache else None
+        candidates = cls._pinned_candidates(pinned) if pinned else cls._candidates()
+        for command, module, key_files in candidates:
+            key = cls._file_key(key_files)
+            if key is None:
+                continue
+            if cached and cached.command == command and cached.key == key:
+                return cached
+            version = cls._probe(command)
+            if version is not None:
+                installation = Installation(command, version, module, key)
+                cls._save_cache(installation)
+                return installation
+        return None
+    
+    @staticmethod
+    def _candidates() -> List[Tuple[List[str], bool, List[str]]]:
+        """Get (command, module, files the result depends on) in order of preference."""
+        candidates = []
+        executable = shutil.which("gallery-dl")
+        if executable:
+            candidates.append(([executable], False, [executable]))
+        try:
+            spec = importlib.util.find_spec("gallery_dl")
+        except (ImportError, ValueError):
+            spec = None
+        if spec is not None and spec.origin:
+            candidates.append(([sys.executable, "-m", "gallery_dl"], True, [sys.executable, spec.origin]))
+        return candidates
+    
+    @staticmethod
+    def _pinned_candidates(path: str) -> List[Tuple[List[str], bool, List[str]]]:
+        """Get the candidates for a pinned interpreter, virtualenv or executable."""
+        path = os.path.abspath(os.path.expanduser(path))
+        if os.path.isdir(path):
+            candidates = []
+            for scripts in ("bin", "Scripts"):
+                for name in ("gallery-dl", "gallery-dl.exe"):
+                    executable = os.path.join(path, scripts, name)
+                    if os.path.isfile(executable):
+                        candidates.append(([executable], False, [executable]))
+                for name in ("python", "python3", "python.exe"):
+                    interpreter = os.path.join(path, scripts, name)
+                    if os.path.isfile(interpreter):
+                        candidates.append(([interpreter, "-m", "gallery_dl"], True, [interpreter]))
+                        break
+            return candidates
+        if os.path.basename(path).lower().startswith("python"):
+            return [([path, "-m", "gallery_dl"], True, [path])]
+        return [([path], False, [path])]
+    
+    @staticmethod
+    def _file_key(paths: List[str]) -> Optional[List[list]]:
+        """Get [path, mtime_ns] of each file, or None if one is missing."""
+        key = []
+        for path in paths:
+            try:
+                key.append([os.path.abspath(path), os.stat(path).st_mtime_ns])
+            except OSError:
+                return None
+        return key
+    
+    @classmethod
+    def _probe(cls, command: List[str]) -> Optional[str]:
+        """Run ``--version``; returns the version, or None if the command does not work."""
+        try:
+            result = subprocess.run(command + ["--version"], capture_output=True, text=True,
+                                    timeout=cls.VERSION_TIMEOUT)
+        except (subprocess.TimeoutExpired, OSError):
+            return None
+        if result.returncode != 0:
+            return None
+        return result.stdout.strip()
+    
+    @classmethod
+    def _load_cache(cls) -> Optional[Installation]:
+        try:
+            if cls.CACHE_FILE.exists():
+                with open(cls.CACHE_FILE, 'r', encoding='utf-8') as f:
+                    return Installation(**json.load(f))
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Error loading installation cache: {e}")
+        return None
+    
+    @classmethod
+    def _save_cache(cls, installation: Installation):
+        try:
+            with open(cls.CACHE_FILE, 'w', encoding='utf-8') as f:
+                json.dump(asdict(installation), f, indent=2)
+        except OSError as e:
+            print(f"Error saving installation cache: {e}")
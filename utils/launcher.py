@@ -0,0 +1,73 @@
+"""
+Single place that decides how gallery-dl subprocesses are started.
+"""
+import threading
+from typing import List, Optional
+from utils.installation import Installation, InstallationDetector
+
+
+class GalleryDLLauncher:
+    """Resolves the gallery-dl invocation once and builds the command line of every launch.
+    
+    Commands are written as ``["gallery-dl", *arguments]``; ``build`` swaps
+    the first element for the resolved invocation (an executable, or a
+    Python interpreter with ``-m gallery_dl``) and returns a new list.
+    The installation can be pinned to a Python interpreter, a virtualenv
+    folder or a gallery-dl executable; otherwise it is looked up on PATH
+    and in the running Python. Resolution happens on the first launch (or
+    on ``resolve``) and is kept until the pinned path changes or a recheck
+    is requested.
+    """
+    
+    DEFAULT_COMMAND = ["gallery-dl"]
+    
+    _lock = threading.Lock()  # Guards the fields below; never held while detecting
+    _detect_lock = threading.Lock()  # Lets one thread at a time run the detection
+    _pinned = ""
+    _generation = 0  # Incremented when the pinned path changes
+    _resolved = False
+    _installation: Optional[Installation] = None
+    
+    @classmethod
+    def configure(cls, pinned: str):
+        """Set the pinned installation path ("" to find gallery-dl automatically)."""
+        pinned = pinned.strip()
+        with cls._lock:
+            if pinned != cls._pinned:
+                cls._pinned = pinned
+                cls._generation += 1
+                cls._resolved = False
+                cls._installation = None
+    
+    @classmethod
+    def resolve(cls, recheck: bool = False) -> Optional[Installation]:
+        """Get the installation used for launches, or None if gallery-dl was not found.
+        
+        May run ``gallery-dl --version`` the first time, so the first call
+        should happen off the Tk thread. The detection runs without holding
+        the lock ``configure`` takes; a result for a pinned path that was
+        changed meanwhile is thrown away and the new path is resolved.
+        """
+        with cls._detect_lock:
+            while True:
+                with cls._lock:
+                    if cls._resolved and not recheck:
+                        return cls._installation
+                    pinned, generation = cls._pinned, cls._generation
+                installation = InstallationDetector.detect(pinned, use_cache=not recheck)
+                with cls._lock:
+                    if generation == cls._generation:
+                        cls._installation = installation
+                        cls._resolved = True
+                        return installation
+    
+    @classmethod
+    def pinned(cls) -> str:
+        return cls._pinned
+    
+    @classmethod
+    def build(cls, argv: List[str]) -> List[str]:
+        """Get the full command line for ``["gallery-dl", *arguments]``; ``argv`` is not modified."""
+        installation = cls.resolve()
+        prefix = installation.command if installation else cls.DEFAULT_COMMAND
+        return list(prefix) + list(argv[1:])
@@ -0,0 +1,103 @@
+"""
+Non-blocking drain for the output of gallery-dl jobs.
+"""
+import codecs
+import os
+import queue
+import threading
+from typing import Iterator, List
+
+
+class OutputDrain:
+    """Reads a job's output on a background thread and hands it over in batches of lines.
+    
+    Pipes of subprocesses are read in large binary chunks with ``os.read``,
+    which returns whatever is available, then decoded and split into lines
+    incrementally. At most ``MAX_BATCHES`` batches are held: while the
+    consumer is behind, the drain thread waits, so the pipe fills and the
+    child is slowed down instead of its output piling up in memory. After
+    ``cancel`` the pipe is drained and discarded until EOF, so the child
+    never blocks on a full pipe once nobody reads its output. Line-based
+    handles of the in-process engine and worker pool are read with
+    ``readline``.
+    
+    ``cancel`` ends iteration over ``batches`` at once, without waiting for
+    the next line of output.
+    """
+    
+    CHUNK_SIZE = 64 * 1024
+    MAX_LINE_LENGTH = 1024 * 1024  # Longer lines are split, so a missing newline cannot grow memory
+    ENCODING = "utf-8"
+    MAX_BATCHES = 64  # Up to CHUNK_SIZE of output each for pipes
+    
+    def __init__(self, stream):
+        self._batches = queue.Queue(self.MAX_BATCHES)
+        self._cancelled = threading.Event()
+        target = self._drain_pipe if hasattr(stream, "fileno") else self._drain_reader
+        threading.Thread(target=target, args=(stream,), daemon=True).start()
+    
+    def batches(self) -> Iterator[List[str]]:
+        """Yield lists of output lines (without line endings) until EOF or cancel."""
+        while True:
+            batch = self._batches.get()
+            if batch is None or self._cancelled.is_set():
+                return
+            yield batch
+    
+    def cancel(self):
+        """Stop handing out output; the stream keeps being drained in the background."""
+        self._cancelled.set()
+        try:
+            self._batches.put_nowait(None)
+        except queue.Full:
+            pass  # The consumer sees the cancel after its next batch
+    
+    def _put(self, lines: List[str]):
+        if lines:
+            self._enqueue(lines)
+    
+    def _enqueue(self, item):
+        """Queue a batch or the EOF marker, waiting while the queue is full (until cancelled)."""
+        while not self._cancelled.is_set():
+            try:
+                self._batches.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                pass
+    
+    def _drain_pipe(self, stream):
+        """Drain thread for a binary pipe."""
+        fd = stream.fileno()
+        decoder = codecs.getincrementaldecoder(self.ENCODING)(errors="replace")
+        partial = ""
+        try:
+            while True:
+                try:
+                    chunk = os.read(fd, self.CHUNK_SIZE)
+                except OSError:
+                    break
+                if not chunk:
+                    break
+                lines = (partial + decoder.decode(chunk)).split("\n")
+                partial = lines.pop()
+                if len(partial) > self.MAX_LINE_LENGTH:
+                    lines.append(partial)
+                    partial = ""
+                self._put([line.rstrip("\r") for line in lines])
+            partial += decoder.decode(b"", final=True)
+            if partial:
+                self._put([partial.rstrip("\r")])
+        finally:
+            try:
+                stream.close()
+            except OSError:
+                pass
+            self._enqueue(None)
+    
+    def _drain_reader(self, reader):
+        """Drain thread for a line-based reader."""
+        try:
+            for line in iter(reader.readline, ""):
+                self._put([line.rstrip("\r\n")])
+        finally:
+            self._enqueue(None)
@@ -0,0 +1,351 @@
+"""
+Bounded per-job store of gallery-dl output, with a line-kind index for filtered searches.
+"""
+import gzip
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+from utils.output_parser import EventKind
+
+
+class JobOutputLog:
+    """Keeps the most recent output lines of a job in memory and spills older ones to disk.
+    
+    Memory stays flat however long a job runs: only the last ``TAIL_LINES``
+    lines and up to ``SPILL_CHUNK_LINES`` lines waiting to be compressed
+    are held, each cut to ``MAX_LINE_LENGTH`` characters. Lines pushed out
+    of the tail are compressed in chunks, each a separate gzip member, so
+    the spill file is an ordinary gzip file and any chunk can be read on
+    its own. The file is created once a job produces more output than fits
+    the tail, or when the log is closed: closing writes the tail to the
+    file as well, so a finished job keeps no lines in memory until its
+    output is read.
+    
+    The kinds of errors, warnings and file events are indexed as lines
+    arrive: one byte per line, which is written to a sidecar file next to
+    the spill file along with each chunk, and a bit mask of the kinds in
+    each chunk, which stays in memory. Filtered searches only read the
+    chunks that hold matches. Written by the job's worker thread; reading
+    and searching are safe from other threads.
+    """
+    
+    TAIL_LINES = 1000
+    MAX_LINE_LENGTH = 4096
+    SPILL_CHUNK_LINES = 2048
+    SPILL_COMPRESS_LEVEL = 6
+    CHUNK_CACHE = 8  # Decompressed chunks kept for paging and searching
+    INDEXED_KINDS = (EventKind.ERROR, EventKind.WARNING, EventKind.FILE_DONE, EventKind.FILE_SKIPPED)
+    SPILL_DIR = Path.home() / ".gallery-dl-gui-logs"
+    SPILL_SUFFIX = ".log.gz"
+    INDEX_SUFFIX = ".idx"  # Sidecar with one kind code per spilled line
+    ENCODING = "utf-8"
+    
+    def __init__(self, job_id: int, spill_dir: Optional[Path] = None):
+        self.job_id = job_id
+        self.spill_dir = Path(spill_dir or self.SPILL_DIR)
+        self.spill_path: Optional[Path] = None
+        self.index_path: Optional[Path] = None
+        self.tail = deque(maxlen=self.TAIL_LINES)
+        self.lines = 0
+        self.errors = 0
+        self.warnings = 0
+        self.spilled = 0
+        self._pending: List[str] = []  # Spilled lines not yet compressed
+        self._chunks: List[Tuple[int, int]] = []  # (offset, size) of each compressed chunk, -1 if lost
+        self._kinds = bytearray()  # Kind codes of the lines after the last chunk
+        self._chunk_kinds = bytearray()  # Bit mask of the kind codes in each chunk
+        self._counts = dict.fromkeys(self.INDEXED_KINDS, 0)
+        self._cache: "OrderedDict[int, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._spill = None
+        self._index = None
+        self._spill_size = 0
+        self._spill_failed = False
+        self._closed = False
+    
+    def append(self, line: str, kind: str = EventKind.LOG):
+        """Add an output line with the kind of event it was parsed as."""
+        if len(line) > self.MAX_LINE_LENGTH:
+            line = line[:self.MAX_LINE_LENGTH] + " ..."
+        with self._lock:
+            if kind == EventKind.ERROR:
+                self.errors += 1
+            elif kind == EventKind.WARNING:
+                self.warnings += 1
+            code = _KIND_CODES.get(kind, 0)
+            self._kinds.append(code)
+            if code:
+                self._counts[kind] += 1
+        
+            if len(self.tail) == self.tail.maxlen:
+                self._write_spill(self.tail[0])
+            self.tail.append(line)
+            self.lines += 1
+    
+    def count(self, kind: str) -> int:
+        """Get the number of lines of an indexed kind."""
+        return self._counts[kind]
+    
+    def read(self, start: int, count: int) -> List[str]:
+        """Get up to ``count`` lines starting at line ``start`` (0-based)."""
+        start = max(0, start)
+        return [line for _, line in self._numbered_lines(range(start, min(start + count, self.lines)))]
+    
+    def iter_lines(self) -> Iterator[str]:
+        """Yield the whole output kept so far."""
+        for start in range(0, self.lines, self.SPILL_CHUNK_LINES):
+            yield from self.read(start, self.SPILL_CHUNK_LINES)
+    
+    def line_numbers(self, kinds: Optional[Sequence[str]] = None, start: int = 0) -> Iterable[int]:
+        """Get the numbers of the lines of some kinds (or all lines) from ``start`` on, in order."""
+        if not kinds:
+            return range(start, self.lines)
+        return self._indexed_lines({_KIND_CODES[kind] for kind in kinds}, start)
+    
+    def _indexed_lines(self, codes: Set[int], start: int) -> Iterator[int]:
+        """Yield the numbers of the lines with one of the kind ``codes`` from ``start`` on."""
+        mask = 0
+        for code in codes:
+            mask |= 1 << code
+        chunk_lines = self.SPILL_CHUNK_LINES
+        with self._lock:
+            chunk_kinds, kinds = bytes(self._chunk_kinds), bytes(self._kinds)
+            first = self.spilled - len(self._pending)  # The last chunk is short once closed
+        for index in range(start // chunk_lines, len(chunk_kinds)):
+            if chunk_kinds[index] & mask:
+                yield from self._matching(self._chunk_codes(index), index * chunk_lines, codes, start)
+        yield from self._matching(kinds, first, codes, start)
+    
+    @staticmethod
+    def _matching(kinds: bytes, first: int, codes: Set[int], start: int) -> Iterator[int]:
+        for offset, code in enumerate(kinds, first):
+            if code in codes and offset >= start:
+                yield offset
+    
+    def search(self, text: str = "", kinds: Optional[Sequence[str]] = None, limit: int = 10000,
+               candidates: Optional[Iterable[int]] = None) -> Tuple[List[Tuple[int, str]], bool]:
+        """Find lines containing ``text`` (ignoring case), optionally only of some kinds.
+        
+        Only the kinds are indexed: with ``kinds`` just the lines of those
+        kinds are read, while a plain text search is a linear scan over all
+        lines (block by block, decompressing spilled chunks as it goes).
+        ``candidates`` limits the search to these line numbers (in order),
+        e.g. the matches of a shorter query. Returns up to ``limit``
+        (line number, line) pairs and whether more lines would match.
+        """
+        needle = text.lower()
+        if candidates is None and kinds:
+            candidates = self.line_numbers(kinds)
+        if candidates is None:
+            return self._scan(needle, limit)
+        
+        matches = []
+        for number, line in self._numbered_lines(candidates):
+            if needle in line.lower():
+                if len(matches) == limit:
+                    return matches, True
+                matches.append((number, line))
+        return matches, False
+    
+    def _scan(self, needle: str, limit: int) -> Tuple[List[Tuple[int, str]], bool]:
+        """Search all lines block by block, with one find per match instead of a test per line."""
+        matches = []
+        for start, block in self._blocks():
+            if not block:
+                continue
+            haystack = "\n".join(block).lower()
+            pos = haystack.find(needle)
+            line_start, index = 0, 0
+            while pos >= 0:
+                index += haystack.count("\n", line_start, pos)
+                if len(matches) == limit:
+                    return matches, True
+                matches.append((start + index, block[index]))
+                # Continue after the end of the matching line
+                line_start = haystack.find("\n", pos)
+                if line_start < 0:
+                    break
+                pos = haystack.find(needle, line_start + 1)
+        return matches, False
+    
+    def _numbered_lines(self, numbers: Iterable[int]) -> Iterator[Tuple[int, str]]:
+        """Yield (number, line) for line numbers in ascending order."""
+        chunk_lines = self.SPILL_CHUNK_LINES
+        with self._lock:
+            spilled, pending_start = self.spilled, len(self._chunks) * chunk_lines
+            pending, tail = list(self._pending), list(self.tail)
+        chunk_index, chunk = -1, []
+        for number in numbers:
+            if number >= spilled:
+                lines, position = tail, number - spilled
+            elif number >= pending_start:
+                lines, position = pending, number - pending_start
+            else:
+                if number // chunk_lines != chunk_index:
+                    chunk_index = number // chunk_lines
+                    chunk = self._chunk(chunk_index)
+                lines, position = chunk, number % chunk_lines
+            yield number, lines[position] if position < len(lines) else ""
+    
+    def _blocks(self) -> Iterator[Tuple[int, List[str]]]:
+        """Yield (number of the first line, lines) of each chunk, the pending lines and the tail."""
+        with self._lock:
+            chunks, spilled = len(self._chunks), self.spilled
+            pending, tail = list(self._pending), list(self.tail)
+        for index in range(chunks):
+            yield index * self.SPILL_CHUNK_LINES, self._chunk(index)
+        yield chunks * self.SPILL_CHUNK_LINES, pending
+        yield spilled, tail
+    
+    def _chunk(self, index: int) -> List[str]:
+        """Get the lines of a compressed chunk."""
+        with self._lock:
+            lines = self._cache.get(index)
+            if lines is not None:
+                self._cache.move_to_end(index)
+                return lines
+            offset, size = self._chunks[index]
+            path = self.spill_path
+        if offset < 0 or path is None:
+            return []
+        try:
+            with open(path, "rb") as fp:
+                fp.seek(offset)
+                data = gzip.decompress(fp.read(size))
+        except (OSError, EOFError) as e:
+            print(f"Failed to read job output: {e}")
+            return []
+        lines = data.decode(self.ENCODING, errors="replace").split("\n")[:-1]
+        with self._lock:
+            self._cache[index] = lines
+            if len(self._cache) > self.CHUNK_CACHE:
+                self._cache.popitem(last=False)
+        return lines
+    
+    def _chunk_codes(self, index: int) -> bytes:
+        """Get the kind codes of the lines of a compressed chunk from the sidecar file."""
+        path = self.index_path
+        if path is None:
+            return b""
+        try:
+            with open(path, "rb") as fp:
+                fp.seek(index * self.SPILL_CHUNK_LINES)
+                return fp.read(self.SPILL_CHUNK_LINES)
+        except OSError as e:
+            print(f"Failed to read job output index: {e}")
+            return b""
+    
+    def close(self):
+        """Write the lines still held in memory to the spill file and free them.
+        
+        The log can still be read, from the file. After an earlier write
+        error, the tail stays in memory instead.
+        """
+        with self._lock:
+            if not self._closed and not self._spill_failed:
+                for line in self.tail:
+                    self._write_spill(line)
+                self.tail.clear()
+            self._closed = True
+            if self._pending:
+                self._write_chunk()
+            self._close_files()
+    
+    def _close_files(self):
+        """Close the spill and index files. Called with _lock held."""
+        for fp in (self._spill, self._index):
+            if fp is not None:
+                try:
+                    fp.close()
+                except OSError as e:
+                    print(f"Failed to write job output: {e}")
+        self._spill = self._index = None
+    
+    def remove(self):
+        """Close the log without writing it and delete its spill and index files."""
+        with self._lock:
+            self._closed = True
+            self._pending = []
+            self.tail.clear()
+            self._cache.clear()
+            self._close_files()
+        for path in (self.spill_path, self.index_path):
+            if path is not None:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+        self.spill_path = self.index_path = None
+    
+    def _write_spill(self, line: str):
+        """Queue a line pushed out of the tail for the spill file. Called with _lock held."""
+        if self._closed:
+            return
+        self._pending.append(line)
+        self.spilled += 1
+        if len(self._pending) >= self.SPILL_CHUNK_LINES:
+            self._write_chunk()
+    
+    def _write_chunk(self):
+        """Compress the pending lines into a chunk of the spill file. Called with _lock held."""
+        data = gzip.compress(("\n".join(self._pending) + "\n").encode(self.ENCODING, errors="replace"),
+                             compresslevel=self.SPILL_COMPRESS_LEVEL)
+        kinds = bytes(self._kinds[:len(self._pending)])
+        del self._kinds[:len(self._pending)]
+        self._pending = []
+        if not self._spill_failed and self._spill is None:
+            try:
+                self.spill_dir.mkdir(parents=True, exist_ok=True)
+                fd, path = tempfile.mkstemp(prefix=f"job-{self.job_id}-", suffix=self.SPILL_SUFFIX,
+                                            dir=str(self.spill_dir))
+                self.spill_path = Path(path)
+                self._spill = os.fdopen(fd, "wb")
+                self.index_path = Path(path[:-len(self.SPILL_SUFFIX)] + self.INDEX_SUFFIX)
+                self._index = open(self.index_path, "wb")
+            except OSError as e:
+                print(f"Failed to create job output file: {e}")
+                self._spill_failed = True
+        if self._spill_failed:
+            self._chunks.append((-1, 0))
+            self._chunk_kinds.append(0)
+            return
+        try:
+            self._spill.write(data)
+            self._spill.flush()
+            # Chunks hold SPILL_CHUNK_LINES lines (only the last may hold
+            # fewer), so the codes of chunk i start at i * SPILL_CHUNK_LINES
+            self._index.write(kinds)
+            self._index.flush()
+            self._chunks.append((self._spill_size, len(data)))
+            self._spill_size += len(data)
+        except OSError as e:
+            print(f"Failed to write job output: {e}")
+            self._spill_failed = True
+            self._chunks.append((-1, 0))
+            self._chunk_kinds.append(0)
+            return
+        mask = 0
+        for code in set(kinds):
+            mask |= 1 << code
+        self._chunk_kinds.append(mask)
+    
+    @classmethod
+    def prune(cls, max_age_days: float = 7, spill_dir: Optional[Path] = None):
+        """Delete spill and index files older than ``max_age_days``."""
+        spill_dir = Path(spill_dir or cls.SPILL_DIR)
+        cutoff = time.time() - max_age_days * 86400
+        try:
+            for suffix in (cls.SPILL_SUFFIX, cls.INDEX_SUFFIX):
+                for path in spill_dir.glob("job-*" + suffix):
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+        except OSError as e:
+            print(f"Failed to clean up job output files: {e}")
+
+
+# Codes of the indexed kinds in the kind index; 0 is any other line
+_KIND_CODES = {kind: code for code, kind in enumerate(JobOutputLog.INDEXED_KINDS, 1)}
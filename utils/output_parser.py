@@ -0,0 +1,105 @@
+"""
+Parser that turns gallery-dl output lines into typed progress events.
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+
+class EventKind:
+    """Kinds of events found in gallery-dl output."""
+    FILE_STARTED = "file_started"
+    FILE_SKIPPED = "file_skipped"
+    FILE_DONE = "file_done"
+    ERROR = "error"
+    WARNING = "warning"
+    JSON = "json"
+    LOG = "log"
+
+
+@dataclass
+class OutputEvent:
+    """One parsed line of gallery-dl output."""
+    kind: str
+    text: str
+    path: str = ""
+    logger: str = ""
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+# Marker the in-process engine prints when a file download begins; gallery-dl's
+# own pipe output has no equivalent.
+FILE_STARTED_PREFIX = "[gallery-dl-gui][start] "
+
+# JSON "event" values a post-processor hook can use to report file events
+_JSON_EVENTS = {
+    "start": EventKind.FILE_STARTED,
+    "skip": EventKind.FILE_SKIPPED,
+    "done": EventKind.FILE_DONE,
+    "error": EventKind.ERROR,
+}
+
+_LOG_LINE = re.compile(r"^\[([\w.-]+)\]\[(\w+)\] ?(.*)$")
+_URL_LINE = re.compile(r"^[a-z][a-z0-9+.-]*://\S+$", re.IGNORECASE)
+# A path as gallery-dl prints it: absolute (POSIX, drive letter or UNC share)
+# or relative to './' / '../', with no space directly after the root
+_PATH_LINE = re.compile(r"^(?:/|\\\\|[A-Za-z]:[\\/]|\.{1,2}[\\/])[^\s\\/]")
+
+
+class OutputParser:
+    """Classifies gallery-dl output lines.
+    
+    With its output piped, gallery-dl prints each downloaded file as its
+    absolute or './'-relative path and each skipped file as its path prefixed
+    with '# '; log messages look like '[category][level] message' and any
+    other unstructured line is plain log. A post-processor (e.g. ``exec``) may
+    also print JSON objects such as ``{"event": "done", "path": ..., "total": 120}``.
+    """
+    
+    @staticmethod
+    def parse(line: str) -> OutputEvent:
+        """Parse a single output line (without trailing newline)."""
+        text = line.strip()
+        
+        if text.startswith(FILE_STARTED_PREFIX):
+            return OutputEvent(EventKind.FILE_STARTED, text, path=text[len(FILE_STARTED_PREFIX):])
+        
+        match = _LOG_LINE.match(text)
+        if match:
+            logger, level, message = match.groups()
+            level = level.lower()
+            if level in ("error", "critical"):
+                kind = EventKind.ERROR
+            elif level == "warning":
+                kind = EventKind.WARNING
+            else:
+                kind = EventKind.LOG
+            return OutputEvent(kind, text, logger=logger)
+        
+        if text.startswith("# "):
+            return OutputEvent(EventKind.FILE_SKIPPED, text, path=text[2:])
+        
+        if text.startswith("{") and text.endswith("}"):
+            event = OutputParser._parse_json(text)
+            if event:
+                return event
+        
+        if _URL_LINE.match(text) or _PATH_LINE.match(text):
+            # Downloaded file path, or a URL printed by --get-urls
+            return OutputEvent(EventKind.FILE_DONE, text, path=text)
+        
+        return OutputEvent(EventKind.LOG, text)
+    
+    @staticmethod
+    def _parse_json(text: str) -> Optional[OutputEvent]:
+        """Parse a JSON object line printed by a post-processor hook."""
+        try:
+            data = json.loads(text)
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        kind = _JSON_EVENTS.get(str(data.get("event", "")).lower(), EventKind.JSON)
+        path = data.get("path") or data.get("_path") or ""
+        return OutputEvent(kind, text, path=str(path), data=data)
@@ -0,0 +1,204 @@
+"""
+Per-host concurrency limits and start-rate limiting for queued downloads.
+"""
+import math
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+@dataclass
+class HostLimit:
+    """Limits for one site. A value of 0 means unlimited."""
+    max_concurrent: int = 0
+    starts_per_minute: float = 0.0
+
+
+@dataclass
+class AdaptiveLimit:
+    """Current AIMD concurrency limit of one site and why it last changed."""
+    limit: int
+    reason: str = "initial limit"
+    changed_at: float = 0.0
+    last_decrease: float = -math.inf
+
+
+class TokenBucket:
+    """Token bucket that refills at ``rate`` tokens per second up to ``capacity``."""
+    
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = now
+    
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+    
+    def time_until_available(self, now: float) -> float:
+        """Get the number of seconds until a token can be taken."""
+        self._refill(now)
+        if self.tokens >= 1.0:
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+    
+    def take(self, now: float):
+        """Take one token (callers check availability first)."""
+        self._refill(now)
+        self.tokens -= 1.0
+
+
+class HostLimiter:
+    """Tracks running jobs and start rates per host.
+    
+    Limits are configured per site; a site entry applies to the host itself
+    and all of its subdomains, which share one budget, with the most specific
+    entry winning. Hosts without an entry get the default limit each. The
+    start rate allows bursts of up to ``max_concurrent`` starts. Not
+    thread-safe; callers serialize access.
+    
+    With ``adaptive`` enabled, each site's concurrency additionally follows
+    an AIMD rule: it starts at ``ADAPTIVE_INITIAL``, grows by one for every
+    successful job and is halved when a job is throttled, never exceeding
+    the configured limit (or ``ceiling`` for unlimited sites).
+    """
+    
+    ADAPTIVE_INITIAL = 2
+    DECREASE_FACTOR = 0.5
+    DECREASE_COOLDOWN = 10.0  # Seconds in which further throttling signals are one event
+    
+    def __init__(self, limits: Optional[Dict[str, HostLimit]] = None,
+                 default: Optional[HostLimit] = None):
+        self.limits: Dict[str, HostLimit] = {}
+        self.default = HostLimit()
+        self.running: Dict[str, int] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.adaptive = False
+        self.ceiling = 1
+        self._adaptive: Dict[str, AdaptiveLimit] = {}
+        self.update(limits or {}, default or HostLimit())
+    
+    def update(self, limits: Dict[str, HostLimit], default: HostLimit):
+        """Replace the configured limits, keeping running counts."""
+        self.limits = {site.lower(): limit for site, limit in limits.items()}
+        self.default = default
+        self._buckets.clear()
+    
+    def limit_for(self, host: str) -> Tuple[str, HostLimit]:
+        """Get the key jobs for ``host`` are counted under, and its limit."""
+        site = host.lower()
+        while site:
+            if site in self.limits:
+                return site, self.limits[site]
+            _, _, site = site.partition(".")
+        return host.lower(), self.default
+    
+    def _bucket(self, key: str, limit: HostLimit, now: float) -> Optional[TokenBucket]:
+        if limit.starts_per_minute <= 0:
+            return None
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(limit.starts_per_minute / 60.0, limit.max_concurrent or 1, now)
+            self._buckets[key] = bucket
+        return bucket
+    
+    def check(self, host: str, now: float) -> float:
+        """Get how long a job for ``host`` has to wait before it may start.
+        
+        Returns 0 if it can start now, and infinity if it has to wait for a
+        running job of the same host to finish.
+        """
+        key, limit = self.limit_for(host)
+        max_concurrent = self.max_concurrent(key, limit)
+        if max_concurrent and self.running.get(key, 0) >= max_concurrent:
+            return math.inf
+        bucket = self._bucket(key, limit, now)
+        return bucket.time_until_available(now) if bucket else 0.0
+    
+    def acquire(self, host: str, now: float) -> str:
+        """Record that a job for ``host`` has started.
+        
+        Returns the key to pass to ``release`` when the job finishes.
+        """
+        key, limit = self.limit_for(host)
+        self.running[key] = self.running.get(key, 0) + 1
+        bucket = self._bucket(key, limit, now)
+        if bucket:
+            bucket.take(now)
+        return key
+    
+    def release(self, key: str):
+        """Record that a job started under ``key`` has finished."""
+        count = self.running.get(key, 0) - 1
+        if count > 0:
+            self.running[key] = count
+        else:
+            self.running.pop(key, None)
+
+    def set_adaptive(self, enabled: bool, ceiling: int):
+        """Turn adaptive limits on or off; ``ceiling`` caps sites without a configured limit."""
+        self.adaptive = enabled
+        self.ceiling = max(1, ceiling)
+        if not enabled:
+            self._adaptive.clear()
+    
+    def _cap(self, limit: HostLimit) -> int:
+        return limit.max_concurrent or self.ceiling
+    
+    def max_concurrent(self, key: str, limit: HostLimit) -> int:
+        """Get the number of parallel jobs allowed under ``key`` right now (0 = unlimited)."""
+        if not self.adaptive:
+            return limit.max_concurrent
+        state = self._adaptive.get(key)
+        current = state.limit if state else self.ADAPTIVE_INITIAL
+        return max(1, min(current, self._cap(limit)))
+    
+    def _state(self, key: str, now: float) -> AdaptiveLimit:
+        state = self._adaptive.get(key)
+        if state is None:
+            limit = self.limits.get(key, self.default)
+            state = AdaptiveLimit(min(self.ADAPTIVE_INITIAL, self._cap(limit)), changed_at=now)
+            self._adaptive[key] = state
+        return state
+    
+    def on_success(self, key: str, reason: str, now: float,
+                   started_at: float) -> Optional[Tuple[int, int]]:
+        """Grow the limit of ``key`` by one after a successful job.
+        
+        Jobs started before the last decrease ran under the old limit and
+        do not count. Returns (old, new) limit if it changed.
+        """
+        if not self.adaptive:
+            return None
+        state = self._state(key, now)
+        old = state.limit
+        if started_at < state.last_decrease or old >= self._cap(self.limits.get(key, self.default)):
+            return None
+        state.limit = old + 1
+        state.reason = reason
+        state.changed_at = now
+        return old, state.limit
+    
+    def on_throttled(self, key: str, reason: str, now: float) -> Optional[Tuple[int, int]]:
+        """Halve the limit of ``key`` after a throttling or network failure.
+        
+        Signals within ``DECREASE_COOLDOWN`` of the last decrease usually come
+        from jobs started before it and are ignored. Returns (old, new) limit
+        if it changed.
+        """
+        if not self.adaptive:
+            return None
+        state = self._state(key, now)
+        if now - state.last_decrease < self.DECREASE_COOLDOWN:
+            return None
+        old = state.limit
+        state.limit = max(1, int(old * self.DECREASE_FACTOR))
+        state.last_decrease = now
+        state.reason = reason
+        state.changed_at = now
+        return (old, state.limit) if state.limit != old else None
+    
+    def adaptive_limits(self) -> Dict[str, AdaptiveLimit]:
+        """Get a copy of the current adaptive limits per site."""
+        return {key: AdaptiveLimit(**vars(state)) for key, state in self._adaptive.items()}
@@ -0,0 +1,34 @@
+"""
+Automatic retry policy for failed downloads.
+"""
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with jitter, bounded by attempts and total time.
+    
+    The n-th retry waits between half and all of ``base_delay * 2**(n-1)``
+    seconds (capped at ``max_delay``), so jobs that failed together do not
+    all hit the site again at the same moment.
+    """
+    max_attempts: int = 3  # Including the first attempt; 1 disables retries
+    base_delay: float = 30.0
+    max_delay: float = 900.0
+    max_total_time: float = 3600.0  # Seconds since the first attempt started
+    
+    def backoff(self, attempt: int) -> float:
+        """Get the delay in seconds before the retry following ``attempt``."""
+        delay = min(self.max_delay, self.base_delay * 2 ** max(0, attempt - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+    
+    def next_delay(self, attempts: int, first_started_at: float, now: float) -> Optional[float]:
+        """Get the delay before the next attempt, or None if the job should give up."""
+        if attempts >= self.max_attempts:
+            return None
+        delay = self.backoff(attempts)
+        if now + delay - first_started_at > self.max_total_time:
+            return None
+        return delay
@@ -0,0 +1,108 @@
+"""
+On-disk log of everything shown in the Output Log during a session.
+"""
+import os
+import time
+from array import array
+from pathlib import Path
+from typing import List, Optional
+from utils.output_log import JobOutputLog
+
+
+class SessionLog:
+    """Append-only text file of all log lines of the session, readable by line number.
+    
+    The byte offset of every ``INDEX_STEP``-th line is kept in memory, so
+    reading a page seeks close to its first line and the index grows by
+    only 8 bytes per ``INDEX_STEP`` lines. The file is created on the first
+    write. Not thread-safe; written and read from the Tk thread.
+    """
+    
+    INDEX_STEP = 256
+    LOG_DIR = JobOutputLog.SPILL_DIR
+    PREFIX = "session-"
+    SUFFIX = ".log"
+    ENCODING = "utf-8"
+    
+    def __init__(self, log_dir: Optional[Path] = None):
+        self.log_dir = Path(log_dir or self.LOG_DIR)
+        self.path: Optional[Path] = None
+        self.lines = 0
+        self._offsets = array("Q")  # Byte offsets of lines 0, INDEX_STEP, 2 * INDEX_STEP, ...
+        self._size = 0
+        self._file = None
+        self._reader = None
+        self._failed = False
+    
+    def write(self, text: str):
+        """Append text made of complete lines, each ending with a newline."""
+        if self._failed or not text:
+            return
+        if self._file is None and not self._open():
+            return
+        data = text.encode(self.ENCODING, errors="replace")
+        pos = 0
+        while pos < len(data):
+            if self.lines % self.INDEX_STEP == 0:
+                self._offsets.append(self._size + pos)
+            end = data.find(b"\n", pos)
+            pos = len(data) if end < 0 else end + 1
+            self.lines += 1
+        self._size += len(data)
+        try:
+            self._file.write(data)
+            self._file.flush()
+        except OSError as e:
+            print(f"Failed to write session log: {e}")
+            self._failed = True
+    
+    def _open(self) -> bool:
+        try:
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            self.path = self.log_dir / f"{self.PREFIX}{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}{self.SUFFIX}"
+            self._file = open(self.path, "wb")
+            return True
+        except OSError as e:
+            print(f"Failed to create session log: {e}")
+            self._failed = True
+            return False
+    
+    def read(self, start: int, count: int) -> List[str]:
+        """Get up to ``count`` lines starting at line ``start`` (0-based), without newlines."""
+        start = max(0, start)
+        count = min(count, self.lines - start)
+        if count <= 0 or self.path is None:
+            return []
+        try:
+            if self._reader is None:
+                self._reader = open(self.path, "rb")
+            block = start // self.INDEX_STEP
+            self._reader.seek(self._offsets[block])
+            for _ in range(start - block * self.INDEX_STEP):
+                self._reader.readline()
+            return [self._reader.readline().decode(self.ENCODING, errors="replace").rstrip("\r\n")
+                    for _ in range(count)]
+        except OSError as e:
+            print(f"Failed to read session log: {e}")
+            return []
+    
+    def close(self):
+        for f in (self._file, self._reader):
+            if f is not None:
+                try:
+                    f.close()
+                except OSError:
+                    pass
+        self._file = self._reader = None
+    
+    @classmethod
+    def prune(cls, max_age_days: float = 7, log_dir: Optional[Path] = None):
+        """Delete session logs older than ``max_age_days``."""
+        log_dir = Path(log_dir or cls.LOG_DIR)
+        cutoff = time.time() - max_age_days * 86400
+        try:
+            for path in log_dir.glob(cls.PREFIX + "*" + cls.SUFFIX):
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+        except OSError as e:
+            print(f"Failed to clean up session logs: {e}")
@@ -0,0 +1,104 @@
+"""
+Wakes the Tk event loop when background threads post messages.
+"""
+import os
+import tkinter as tk
+from typing import Callable, Optional
+
+
+class UiWakeup:
+    """Runs a callback on the Tk thread as soon as a worker thread calls ``wake``.
+    
+    Where Tk supports file handlers (not on Windows), ``wake`` writes a byte
+    to a pipe that Tk watches, so the loop wakes at once and sleeps while
+    nothing happens. Otherwise the callback is polled, every ``MIN_POLL_MS``
+    while messages arrive and backing off to ``MAX_POLL_MS`` when idle.
+    
+    The callback returns the seconds until it has to run again even if no
+    message arrives (0 to come back at once), or None.
+    """
+    
+    MIN_POLL_MS = 20
+    MAX_POLL_MS = 1000
+    
+    def __init__(self, root: tk.Misc, callback: Callable[[], Optional[float]]):
+        self.root = root
+        self.callback = callback
+        self.event_driven = False
+        self._signalled = False  # A wakeup is pending; set by workers, cleared on the Tk thread
+        self._timer = None
+        self._poll_ms = self.MIN_POLL_MS
+        self._read_fd = self._write_fd = None
+        try:
+            self._read_fd, self._write_fd = os.pipe()
+            os.set_blocking(self._read_fd, False)
+            os.set_blocking(self._write_fd, False)
+            root.tk.createfilehandler(self._read_fd, tk.READABLE, self._on_readable)
+            self.event_driven = True
+        except (AttributeError, tk.TclError, OSError):
+            self._close_pipe()
+    
+    def start(self):
+        self._run()
+    
+    def wake(self):
+        """Ask for the callback to run soon; safe to call from any thread."""
+        if self._signalled:
+            return
+        self._signalled = True
+        if self.event_driven:
+            try:
+                os.write(self._write_fd, b"\0")
+            except (BlockingIOError, OSError, TypeError):
+                pass  # Pipe full (a wakeup is pending anyway) or closed
+    
+    def _on_readable(self, fd, mask):
+        try:
+            while os.read(self._read_fd, 4096):
+                pass
+        except (BlockingIOError, OSError):
+            pass
+        self._run()
+    
+    def _run(self):
+        if self._timer is not None:
+            self.root.after_cancel(self._timer)
+            self._timer = None
+        # Cleared before the callback drains the queue, so a message posted
+        # while it runs wakes the loop again
+        active, self._signalled = self._signalled, False
+        delay = self.callback()
+        
+        if self.event_driven:
+            if delay is None:
+                return
+            delay_ms = int(delay * 1000)
+        else:
+            self._poll_ms = self.MIN_POLL_MS if active else min(self._poll_ms * 2, self.MAX_POLL_MS)
+            delay_ms = self._poll_ms if delay is None else min(self._poll_ms, int(delay * 1000))
+        self._timer = self.root.after(max(1, delay_ms), self._run)
+    
+    def close(self):
+        """Stop waking the Tk loop."""
+        if self._timer is not None:
+            try:
+                self.root.after_cancel(self._timer)
+            except tk.TclError:
+                pass
+            self._timer = None
+        if self.event_driven:
+            try:
+                self.root.tk.deletefilehandler(self._read_fd)
+            except tk.TclError:
+                pass
+            self.event_driven = False
+        self._close_pipe()
+    
+    def _close_pipe(self):
+        for fd in (self._read_fd, self._write_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._read_fd = self._write_fd = None
@@ -0,0 +1,119 @@
+"""
+Streaming import of URL lists for Gallery-DL GUI.
+"""
+import io
+import re
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Set
+from urllib.parse import urlsplit, urlunsplit
+
+
+# gallery-dl URL prefixes that force an extractor, e.g. "ytdl:https://..."
+_PREFIX = re.compile(r"^([a-z][a-z0-9]*:)(?=[a-z][a-z0-9+.-]*://)", re.IGNORECASE)
+# Bare "example.org/..." entries without a scheme
+_BARE_HOST = re.compile(r"^[\w-]+(\.[\w-]+)+(:\d+)?(/|$)")
+
+
+@dataclass
+class ImportStats:
+    """Counters of a URL import."""
+    added: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    options: int = 0  # Per-URL option lines of an --input-file, which are not applied
+
+
+class UrlImporter:
+    """Reads, validates, normalizes and de-duplicates URL lists.
+    
+    Accepts plain lists with one URL per line as well as gallery-dl's
+    ``--input-file`` format, where '#' and ';' start comment lines and lines
+    starting with '-' set options for the following URLs. Everything is a
+    generator, so lists of any size are processed in constant memory apart
+    from the set of URLs already seen.
+    """
+    
+    ENCODING = "utf-8"
+    
+    @staticmethod
+    def read_file(path: str) -> Iterator[str]:
+        """Yield the lines of a text file without loading it at once."""
+        with open(path, encoding=UrlImporter.ENCODING, errors="replace") as fp:
+            yield from fp
+    
+    @staticmethod
+    def read_text(text: str) -> Iterator[str]:
+        """Yield the lines of a pasted block of text."""
+        return iter(io.StringIO(text))
+    
+    @staticmethod
+    def normalize(url: str) -> Optional[str]:
+        """Normalize a URL, or return None if it is not a valid http(s) URL.
+        
+        Adds a missing 'https://', lowercases scheme and host and drops a
+        trailing '/' of an empty path. gallery-dl extractor prefixes such as
+        'ytdl:' are kept.
+        """
+        url = url.strip().strip('"\'<>').strip()
+        if not url or any(c.isspace() for c in url):
+            return None
+        
+        prefix = ""
+        match = _PREFIX.match(url)
+        if match:
+            prefix = match.group(1).lower()
+            url = url[match.end():]
+        elif "://" not in url and _BARE_HOST.match(url):
+            url = "https://" + url
+        
+        try:
+            parts = urlsplit(url)
+        except ValueError:
+            return None
+        if parts.scheme.lower() not in ("http", "https") or not parts.hostname:
+            return None
+        
+        path = "" if parts.path == "/" else parts.path
+        netloc = parts.netloc.rpartition("@")
+        netloc = netloc[0] + netloc[1] + netloc[2].lower()
+        return prefix + urlunsplit((parts.scheme.lower(), netloc, path, parts.query, parts.fragment))
+    
+    @staticmethod
+    def iter_urls(lines: Iterable[str], stats: ImportStats,
+                  seen: Optional[Set[str]] = None) -> Iterator[str]:
+        """Yield new, normalized URLs from input lines, updating ``stats``.
+        
+        ``seen`` holds URLs that count as duplicates (e.g. ones already
+        queued) and is extended with every URL yielded.
+        """
+        if seen is None:
+            seen = set()
+        for line in lines:
+            line = line.strip()
+            if not line or line[0] in "#;":
+                continue
+            if line[0] == "-":
+                stats.options += 1
+                continue
+            
+            url = UrlImporter.normalize(line)
+            if url is None:
+                stats.invalid += 1
+            elif url in seen:
+                stats.duplicates += 1
+            else:
+                seen.add(url)
+                stats.added += 1
+                yield url
+    
+    @staticmethod
+    def chunks(urls: Iterable[str], size: int) -> Iterator[List[str]]:
+        """Group URLs into lists of up to ``size`` entries."""
+        chunk = []
+        for url in urls:
+            chunk.append(url)
+            if len(chunk) >= size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
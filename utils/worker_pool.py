@@ -0,0 +1,243 @@
+"""
+Pool of warm gallery-dl worker processes.
+
+Each worker imports gallery_dl once, then runs one job at a time through the
+in-process engine and streams its output back over a pipe. A crashing job
+only takes down its worker, which the pool replaces.
+"""
+import multiprocessing
+import subprocess
+import threading
+from typing import List, Optional
+from utils.inprocess_engine import InProcessEngine, LineReader
+
+
+def _worker_main(conn):
+    """Entry point of a worker process."""
+    try:
+        available = InProcessEngine.is_available()
+        conn.send(("ready", available))
+        if not available:
+            return
+        
+        while True:
+            try:
+                argv = conn.recv()
+            except EOFError:
+                break
+            if argv is None:
+                break
+            
+            handle = InProcessEngine.start(argv)
+            for line in iter(handle.stdout.readline, ''):
+                conn.send(("line", line.rstrip("\n")))
+            conn.send(("exit", handle.wait()))
+    except (BrokenPipeError, KeyboardInterrupt):
+        pass
+    finally:
+        conn.close()
+
+
+class _Worker:
+    """A worker process and the parent's end of its pipe."""
+    
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs_run = 0
+    
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+    
+    def stop(self):
+        """Ask the worker to exit after its current job."""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.close()
+    
+    def close(self, timeout: float = 1.0):
+        """Close the pipe and reap the process, terminating it if it lingers."""
+        self.conn.close()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout)
+
+
+class PoolHandle:
+    """Popen-like handle for a job running in a pooled worker process."""
+    
+    def __init__(self, pool: "WorkerPool", worker: _Worker, argv: List[str]):
+        self.args = argv
+        self.pid = worker.process.pid
+        self.returncode: Optional[int] = None
+        self.stdout = LineReader()
+        self._pool = pool
+        self._worker = worker
+        self._done = threading.Event()
+        self._terminated = False
+        
+        worker.conn.send(argv)
+        threading.Thread(target=self._relay, daemon=True).start()
+    
+    def poll(self) -> Optional[int]:
+        """Return the exit code, or None while the job is running."""
+        return self.returncode
+    
+    def wait(self, timeout: Optional[float] = None) -> int:
+        """Wait for the job to finish and return its exit code."""
+        if not self._done.wait(timeout):
+            raise subprocess.TimeoutExpired(self.args, timeout)
+        return self.returncode
+    
+    def terminate(self):
+        """Stop the job by terminating its worker process."""
+        self._terminated = True
+        self._worker.process.terminate()
+    
+    kill = terminate
+    
+    def _relay(self):
+        """Forward output from the worker until the job ends or the worker dies."""
+        returncode = None
+        try:
+            while True:
+                kind, value = self._worker.conn.recv()
+                if kind == "line":
+                    self.stdout.write_line(value)
+                elif kind == "exit":
+                    returncode = value
+                    break
+        except (EOFError, OSError):
+            self._worker.process.join(1)
+            returncode = self._worker.process.exitcode
+            if returncode is None or returncode == 0:
+                returncode = 1
+            if not self._terminated:
+                self.stdout.write_line(f"[gallery-dl-gui][error] Worker process exited unexpectedly "
+                                       f"(exit code {self._worker.process.exitcode})")
+        finally:
+            self.returncode = returncode
+            self._done.set()
+            self.stdout.close()
+            self._pool._release(self._worker, crashed=self._terminated or returncode is None
+                                or not self._worker.is_alive())
+
+
+class WorkerPool:
+    """Keeps up to ``size`` warm worker processes (busy or idle) for gallery-dl jobs.
+    
+    Workers are recycled after ``max_jobs`` jobs to bound memory growth in
+    long-lived processes, and replaced when they crash or are terminated.
+    """
+    
+    def __init__(self, size: int = 2, max_jobs: int = 50):
+        self.size = max(1, size)
+        self.max_jobs = max(1, max_jobs)
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: List[_Worker] = []
+        self._busy = 0
+        self._spawning = 0
+        self._lock = threading.Lock()
+        self._closed = False
+    
+    def start(self, argv: List[str]) -> PoolHandle:
+        """Run a gallery-dl command on an idle worker (spawning one if needed)."""
+        dead = []
+        with self._lock:
+            worker = None
+            while self._idle and worker is None:
+                candidate = self._idle.pop()
+                if candidate.is_alive():
+                    worker = candidate
+                else:
+                    dead.append(candidate)
+            self._busy += 1
+        for candidate in dead:
+            candidate.close()
+        
+        try:
+            if worker is None:
+                worker = _Worker(self._context)
+            worker.jobs_run += 1
+            handle = PoolHandle(self, worker, argv)
+        except Exception:
+            with self._lock:
+                self._busy -= 1
+            if worker is not None:
+                worker.process.terminate()
+                worker.close()
+            self._top_up()
+            raise
+        self._top_up()
+        return handle
+    
+    def warm_up(self):
+        """Start workers in the background until ``size`` are running."""
+        self._top_up()
+    
+    def resize(self, size: int, max_jobs: Optional[int] = None):
+        """Change the number of warm workers and the recycle limit."""
+        self.size = max(1, size)
+        if max_jobs is not None:
+            self.max_jobs = max(1, max_jobs)
+        
+        surplus = []
+        with self._lock:
+            while self._idle and len(self._idle) + self._busy > self.size:
+                surplus.append(self._idle.pop())
+        for worker in surplus:
+            worker.stop()
+        self._top_up()
+    
+    def shutdown(self):
+        """Stop all idle workers; busy workers exit after their job."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+    
+    def _release(self, worker: _Worker, crashed: bool):
+        """Return a worker to the pool after a job, or retire it."""
+        with self._lock:
+            self._busy -= 1
+            keep = (not crashed and not self._closed and worker.jobs_run < self.max_jobs
+                    and len(self._idle) + self._busy < self.size)
+            if keep:
+                self._idle.append(worker)
+        if not keep:
+            if crashed:
+                worker.close()
+            else:
+                worker.stop()
+            self._top_up()
+    
+    def _top_up(self):
+        """Spawn replacement workers without blocking the caller."""
+        def spawn():
+            while True:
+                with self._lock:
+                    if self._closed or len(self._idle) + self._busy + self._spawning >= self.size:
+                        return
+                    self._spawning += 1
+                try:
+                    worker = _Worker(self._context)
+                except Exception:
+                    with self._lock:
+                        self._spawning -= 1
+                    return
+                with self._lock:
+                    self._spawning -= 1
+                    closed = self._closed
+                    if not closed:
+                        self._idle.append(worker)
+                if closed:
+                    worker.stop()
+                    return
+        
+        threading.Thread(target=spawn, daemon=True).start()
@@ -1,11 +1,16 @@
 """
 Advanced settings tab view for Gallery-DL GUI.
 """
+import sqlite3
+import time
 import tkinter as tk
-from tkinter import ttk, filedialog
-from views.base_view import BaseTab
+from tkinter import ttk, filedialog, messagebox, simpledialog
+from typing import Dict, Optional
+from views.base_view import BaseTab, ScrollableFrame
 from models.settings import AppState
 from utils.file_utils import FileUtils
+from utils.download_archive import DownloadArchive
+from utils.rate_limiter import AdaptiveLimit
 
 
 class AdvancedTab(BaseTab):
@@ -19,15 +24,28 @@ class AdvancedTab(BaseTab):
     def setup_tab(self):
         """Setup the advanced tab content."""
         self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(0, weight=1)
+        
+        # The sections scroll; the quick actions below them stay in view
+        scroller = ScrollableFrame(self.frame)
+        scroller.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.sections = scroller.content
+        self.sections.columnconfigure(0, weight=1)
         
         self._create_authentication_section()
         self._create_cookies_section()
         self._create_configuration_section()
+        self._create_execution_section()
+        self._create_host_limits_section()
+        self._create_retry_section()
+        self._create_archive_section()
+        self._create_test_cache_section()
+        self._create_log_display_section()
         self._create_quick_actions()
     
     def _create_authentication_section(self):
         """Create authentication section."""
-        auth_frame = ttk.LabelFrame(self.frame, text="Authentication", padding="10")
+        auth_frame = ttk.LabelFrame(self.sections, text="Authentication", padding="10")
         auth_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=10, pady=10)
         auth_frame.columnconfigure(1, weight=1)
         
@@ -41,7 +59,7 @@ class AdvancedTab(BaseTab):
     
     def _create_cookies_section(self):
         """Create cookies file section."""
-        cookies_frame = ttk.LabelFrame(self.frame, text="Cookies", padding="10")
+        cookies_frame = ttk.LabelFrame(self.sections, text="Cookies", padding="10")
         cookies_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), padx=10, pady=(0, 10))
         cookies_frame.columnconfigure(1, weight=1)
         
@@ -57,7 +75,7 @@ class AdvancedTab(BaseTab):
     
     def _create_configuration_section(self):
         """Create configuration file section."""
-        config_frame = ttk.LabelFrame(self.frame, text="Configuration", padding="10")
+        config_frame = ttk.LabelFrame(self.sections, text="Configuration", padding="10")
         config_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), padx=10, pady=(0, 10))
         config_frame.columnconfigure(1, weight=1)
         
@@ -71,10 +89,202 @@ class AdvancedTab(BaseTab):
         ttk.Button(config_path_frame, text="Browse", command=self._browse_config_file).grid(
             row=0, column=1)
     
+    def _create_execution_section(self):
+        """Create execution engine section."""
+        engine_frame = ttk.LabelFrame(self.sections, text="Execution Engine", padding="10")
+        engine_frame.grid(row=3, column=0, sticky=(tk.W, tk.E), padx=10, pady=(0, 10))
+        
+        ttk.Radiobutton(engine_frame, text="Subprocess per job (most compatible)",
+                       variable=self.app_state.engine_var, value="subprocess").grid(
+            row=0, column=0, sticky=tk.W)
+        ttk.Radiobutton(engine_frame, text="In-process (fast start, needs the gallery_dl Python module)",
+                       variable=self.app_state.engine_var, value="inprocess").grid(
+            row=1, column=0, sticky=tk.W)
+        ttk.Radiobutton(engine_frame, text="Warm worker processes (fast start, crash isolation)",
+                       variable=self.app_state.engine_var, value="pool").grid(
+            row=2, column=0, sticky=tk.W)
+        
+        recycle_frame = ttk.Frame(engine_frame)
+        recycle_frame.grid(row=3, column=0, sticky=tk.W, padx=(20, 0), pady=(5, 0))
+        ttk.Label(recycle_frame, text="Replace each worker after").pack(side=tk.LEFT)
+        ttk.Spinbox(recycle_frame, from_=1, to=1000, width=6,
+                   textvariable=self.app_state.worker_recycle_var).pack(side=tk.LEFT, padx=5)
+        ttk.Label(recycle_frame, text="jobs").pack(side=tk.LEFT)
+        
+        ttk.Label(engine_frame, text="gallery-dl to run (Python interpreter, virtualenv folder or "
+                                     "executable; empty = automatic):").grid(
+            row=4, column=0, sticky=tk.W, pady=(10, 0))
+        path_frame = ttk.Frame(engine_frame)
+        path_frame.grid(row=5, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
+        path_frame.columnconfigure(0, weight=1)
+        ttk.Entry(path_frame, textvariable=self.app_state.gallery_dl_path_var).grid(
+            row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 5))
+        ttk.Button(path_frame, text="Browse", command=self._browse_gallery_dl).grid(row=0, column=1, padx=(0, 5))
+        ttk.Button(path_frame, text="Check", command=self._gallery_dl_path_changed).grid(row=0, column=2)
+    
+    def _create_host_limits_section(self):
+        """Create per-site concurrency and rate limit section."""
+        limits_frame = ttk.LabelFrame(self.sections, text="Per-site Limits", padding="10")
+        limits_frame.grid(row=4, column=0, sticky=(tk.W, tk.E), padx=10, pady=(0, 10))
+        limits_frame.columnconfigure(0, weight=1)
+        
+        columns = ("max_concurrent", "starts_per_minute")
+        self.limits_tree = ttk.Treeview(limits_frame, columns=columns, height=4)
+        self.limits_tree.heading("#0", text="Site")
+        self.limits_tree.heading("max_concurrent", text="Max parallel jobs")
+        self.limits_tree.heading("starts_per_minute", text="Job starts / minute")
+        self.limits_tree.column("#0", width=250)
+        self.limits_tree.column("max_concurrent", width=130, anchor=tk.CENTER)
+        self.limits_tree.column("starts_per_minute", width=130, anchor=tk.CENTER)
+        self.limits_tree.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        self.limits_tree.bind("<<TreeviewSelect>>", self._on_limit_selected)
+        
+        edit_frame = ttk.Frame(limits_frame)
+        edit_frame.grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        
+        self.limit_site_var = tk.StringVar()
+        self.limit_max_var = tk.IntVar(value=1)
+        self.limit_rate_var = tk.DoubleVar(value=0.0)
+        
+        ttk.Label(edit_frame, text="Site:").pack(side=tk.LEFT)
+        ttk.Entry(edit_frame, textvariable=self.limit_site_var, width=25).pack(side=tk.LEFT, padx=(5, 10))
+        ttk.Label(edit_frame, text="Max parallel:").pack(side=tk.LEFT)
+        ttk.Spinbox(edit_frame, from_=0, to=16, width=5,
+                   textvariable=self.limit_max_var).pack(side=tk.LEFT, padx=(5, 10))
+        ttk.Label(edit_frame, text="Starts/min:").pack(side=tk.LEFT)
+        ttk.Entry(edit_frame, textvariable=self.limit_rate_var, width=7).pack(side=tk.LEFT, padx=(5, 10))
+        ttk.Button(edit_frame, text="Add / Update", command=self._save_host_limit).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(edit_frame, text="Remove", command=self._remove_host_limit).pack(side=tk.LEFT)
+        
+        default_frame = ttk.Frame(limits_frame)
+        default_frame.grid(row=2, column=0, sticky=tk.W, pady=(5, 0))
+        
+        ttk.Label(default_frame, text="Other sites - max parallel:").pack(side=tk.LEFT)
+        ttk.Spinbox(default_frame, from_=0, to=16, width=5,
+                   textvariable=self.app_state.default_host_max_var).pack(side=tk.LEFT, padx=(5, 10))
+        ttk.Label(default_frame, text="Starts/min:").pack(side=tk.LEFT)
+        ttk.Entry(default_frame, textvariable=self.app_state.default_host_rate_var,
+                 width=7).pack(side=tk.LEFT, padx=(5, 10))
+        ttk.Label(default_frame, text="(0 = unlimited)").pack(side=tk.LEFT)
+        
+        # Adaptive (AIMD) limits
+        ttk.Checkbutton(limits_frame,
+                       text="Adapt parallel jobs per site: grow after successful jobs, "
+                            "halve on throttling (HTTP 429, timeouts, network errors)",
+                       variable=self.app_state.adaptive_limits_var).grid(
+            row=3, column=0, sticky=tk.W, pady=(10, 0))
+        
+        columns = ("limit", "reason", "changed")
+        self.adaptive_tree = ttk.Treeview(limits_frame, columns=columns, height=3)
+        self.adaptive_tree.heading("#0", text="Site")
+        self.adaptive_tree.heading("limit", text="Current limit")
+        self.adaptive_tree.heading("reason", text="Last change")
+        self.adaptive_tree.heading("changed", text="At")
+        self.adaptive_tree.column("#0", width=250)
+        self.adaptive_tree.column("limit", width=100, anchor=tk.CENTER)
+        self.adaptive_tree.column("reason", width=350)
+        self.adaptive_tree.column("changed", width=80, anchor=tk.CENTER)
+        self.adaptive_tree.grid(row=4, column=0, sticky=(tk.W, tk.E), pady=(5, 0))
+        
+        self.update_host_limits()
+    
+    def _create_retry_section(self):
+        """Create automatic retry section."""
+        retry_frame = ttk.LabelFrame(self.sections, text="Automatic Retries", padding="10")
+        retry_frame.grid(row=5, column=0, sticky=(tk.W, tk.E), padx=10, pady=(0, 10))
+        
+        ttk.Label(retry_frame, text="Attempts per job:").pack(side=tk.LEFT)
+        ttk.Spinbox(retry_frame, from_=1, to=20, width=5,
+                   textvariable=self.app_state.retry_attempts_var).pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Label(retry_frame, text="First retry after").pack(side=tk.LEFT)
+        ttk.Spinbox(retry_frame, from_=1, to=3600, width=6,
+                   textvariable=self.app_state.retry_delay_var).pack(side=tk.LEFT, padx=5)
+        ttk.Label(retry_frame, text="s (doubling, with jitter)").pack(side=tk.LEFT, padx=(0, 15))
+        ttk.Label(retry_frame, text="Give up after").pack(side=tk.LEFT)
+        ttk.Spinbox(retry_frame, from_=1, to=1440, width=6,
+                   textvariable=self.app_state.retry_minutes_var).pack(side=tk.LEFT, padx=5)
+        ttk.Label(retry_frame, text="min").pack(side=tk.LEFT)
+        ttk.Label(retry_frame, text="Only network, I/O and throttling errors are retried",
+                 foreground="gray").pack(side=tk.LEFT, padx=(15, 0))
+    
+    def _create_archive_section(self):
+        """Create download archive section."""
+        archive_frame = ttk.LabelFrame(self.sections, text="Download Archive", padding="10")
+        archive_frame.grid(row=6, column=0, sticky=(tk.W, tk.E), padx=10, pady=(0, 10))
+        archive_frame.columnconfigure(1, weight=1)
+        
+        mode_frame = ttk.Frame(archive_frame)
+        mode_frame.grid(row=0, column=0, columnspan=2, sticky=tk.W)
+        ttk.Label(mode_frame, text="Skip files already downloaded using:").pack(side=tk.LEFT)
+        for text, value in (("One archive per download folder", "folder"),
+                            ("One global archive", "global"),
+                            ("No archive", "off")):
+            ttk.Radiobutton(mode_frame, text=text, variable=self.app_state.archive_mode_var,
+                           value=value).pack(side=tk.LEFT, padx=(10, 0))
+        
+        self.archive_info_var = tk.StringVar()
+        ttk.Label(archive_frame, text="Archive:").grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        ttk.Label(archive_frame, textvariable=self.archive_info_var).grid(
+            row=1, column=1, sticky=tk.W, pady=(5, 0))
+        
+        buttons_frame = ttk.Frame(archive_frame)
+        buttons_frame.grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        ttk.Button(buttons_frame, text="Refresh", command=self.update_archive_info).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(buttons_frame, text="Prune site...", command=self._prune_archive).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(buttons_frame, text="Clear", command=self._clear_archive).pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Button(buttons_frame, text="Compact", command=self._compact_archive).pack(side=tk.LEFT)
+        
+        self.app_state.archive_mode_var.trace_add("write", lambda *args: self.update_archive_info())
+        self.update_archive_info()
+    
+    def _create_test_cache_section(self):
+        """Create URL test cache section."""
+        tests_frame = ttk.LabelFrame(self.sections, text="URL Tests", padding="10")
+        tests_frame.grid(row=7, column=0, sticky=(tk.W, tk.E), padx=10, pady=(0, 10))
+        
+        ttk.Label(tests_frame, text="Reuse test results for").pack(side=tk.LEFT)
+        ttk.Spinbox(tests_frame, from_=0, to=10080, width=6,
+                   textvariable=self.app_state.test_cache_minutes_var).pack(side=tk.LEFT, padx=5)
+        ttk.Label(tests_frame, text="min (0 = always test)").pack(side=tk.LEFT, padx=(0, 15))
+        ttk.Label(tests_frame, text="Parallel tests:").pack(side=tk.LEFT)
+        ttk.Spinbox(tests_frame, from_=1, to=32, width=4,
+                   textvariable=self.app_state.test_workers_var).pack(side=tk.LEFT, padx=(5, 15))
+        ttk.Checkbutton(tests_frame, text="Quick probe (stop after the first items)",
+                       variable=self.app_state.test_probe_var).pack(side=tk.LEFT, padx=(0, 15))
+        ttk.Button(tests_frame, text="Forget current URL",
+                  command=lambda: self._clear_test_cache(self.app_state.url_var.get().strip())).pack(
+            side=tk.LEFT, padx=(0, 5))
+        ttk.Button(tests_frame, text="Forget all",
+                  command=lambda: self._clear_test_cache(None)).pack(side=tk.LEFT)
+        ttk.Label(tests_frame, text="Results also change with the config file, cookies and login",
+                 foreground="gray").pack(side=tk.LEFT, padx=(15, 0))
+    
+    def _create_log_display_section(self):
+        """Create log display section."""
+        display_frame = ttk.LabelFrame(self.sections, text="Log Display", padding="10")
+        display_frame.grid(row=8, column=0, sticky=(tk.W, tk.E), padx=10, pady=(0, 10))
+        
+        ttk.Label(display_frame, text="Keep").pack(side=tk.LEFT)
+        ttk.Spinbox(display_frame, from_=100, to=1000000, increment=1000, width=8,
+                   textvariable=self.app_state.log_view_lines_var).pack(side=tk.LEFT, padx=5)
+        ttk.Label(display_frame, text="lines on screen (Full Log shows everything)").pack(
+            side=tk.LEFT, padx=(0, 15))
+        ttk.Label(display_frame, text="Spend at most").pack(side=tk.LEFT)
+        ttk.Spinbox(display_frame, from_=5, to=1000, width=6,
+                   textvariable=self.app_state.frame_budget_var).pack(side=tk.LEFT, padx=5)
+        ttk.Label(display_frame, text="ms per screen update on new messages").pack(side=tk.LEFT)
+    
+    def _clear_test_cache(self, url: Optional[str]):
+        """Forget cached test results of a URL, or of all URLs."""
+        if url == "":
+            return
+        if 'clear_test_cache' in self.callbacks:
+            self.callbacks['clear_test_cache'](url)
+    
     def _create_quick_actions(self):
         """Create quick actions section."""
         actions_frame = ttk.LabelFrame(self.frame, text="Quick Actions", padding="10")
-        actions_frame.grid(row=3, column=0, sticky=(tk.W, tk.E), padx=10, pady=(0, 10))
+        actions_frame.grid(row=1, column=0, sticky=(tk.W, tk.E), padx=10, pady=10)
         
         ttk.Button(actions_frame, text="Open gallery-dl documentation", 
                   command=self._open_docs).pack(side=tk.LEFT, padx=(0, 10))
@@ -92,6 +302,18 @@ class AdvancedTab(BaseTab):
         if file_path:
             self.app_state.cookies_file_var.set(file_path)
     
+    def _browse_gallery_dl(self):
+        """Browse for a Python interpreter or gallery-dl executable."""
+        file_path = filedialog.askopenfilename(title="Select Python interpreter or gallery-dl executable")
+        if file_path:
+            self.app_state.gallery_dl_path_var.set(file_path)
+            self._gallery_dl_path_changed()
+    
+    def _gallery_dl_path_changed(self):
+        """Look for gallery-dl again, at the pinned path if one is set."""
+        if 'gallery_dl_path_changed' in self.callbacks:
+            self.callbacks['gallery_dl_path_changed']()
+    
     def _browse_config_file(self):
         """Browse for config file."""
         file_path = filedialog.askopenfilename(
@@ -101,6 +323,132 @@ class AdvancedTab(BaseTab):
         if file_path:
             self.app_state.config_file_var.set(file_path)
     
+    def _on_limit_selected(self, event=None):
+        """Load the selected site limit into the edit fields."""
+        selection = self.limits_tree.selection()
+        if not selection:
+            return
+        site = selection[0]
+        values = self.app_state.host_limits.get(site, {})
+        self.limit_site_var.set(site)
+        self.limit_max_var.set(int(values.get("max_concurrent", 0)))
+        self.limit_rate_var.set(float(values.get("starts_per_minute", 0)))
+    
+    def _save_host_limit(self):
+        """Add or update the limit for the site in the edit fields."""
+        site = self.limit_site_var.get().strip().lower()
+        if "://" in site:
+            site = site.split("://", 1)[1]
+        site = site.split("/")[0]
+        if site.startswith("www."):
+            site = site[4:]
+        if not site:
+            messagebox.showerror("Error", "Please enter a site, e.g. twitter.com")
+            return
+        try:
+            max_concurrent = max(0, int(self.limit_max_var.get()))
+            starts_per_minute = max(0.0, float(self.limit_rate_var.get()))
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Error", "Limits must be numbers")
+            return
+        
+        self.app_state.host_limits[site] = {
+            "max_concurrent": max_concurrent,
+            "starts_per_minute": starts_per_minute,
+        }
+        self.update_host_limits()
+        self._host_limits_changed()
+    
+    def _remove_host_limit(self):
+        """Remove the selected site limits."""
+        for site in self.limits_tree.selection():
+            self.app_state.host_limits.pop(site, None)
+        self.update_host_limits()
+        self._host_limits_changed()
+    
+    def _host_limits_changed(self):
+        """Notify the controller that site limits changed."""
+        if 'host_limits_changed' in self.callbacks:
+            self.callbacks['host_limits_changed']()
+    
+    def update_host_limits(self):
+        """Refresh the site limits list from the application state."""
+        self.limits_tree.delete(*self.limits_tree.get_children())
+        for site in sorted(self.app_state.host_limits):
+            values = self.app_state.host_limits[site]
+            max_concurrent = int(values.get("max_concurrent", 0))
+            starts_per_minute = float(values.get("starts_per_minute", 0))
+            self.limits_tree.insert("", tk.END, iid=site, text=site, values=(
+                max_concurrent or "unlimited",
+                f"{starts_per_minute:g}" if starts_per_minute else "unlimited",
+            ))
+    
+    def update_adaptive_limits(self, limits: Dict[str, AdaptiveLimit]):
+        """Show the current adaptive limit of each site and why it last changed."""
+        self.adaptive_tree.delete(*self.adaptive_tree.get_children())
+        for site in sorted(limits):
+            state = limits[site]
+            self.adaptive_tree.insert("", tk.END, iid=site, text=site, values=(
+                state.limit, state.reason, time.strftime('%H:%M:%S', time.localtime(state.changed_at)),
+            ))
+    
+    def update_archive_info(self):
+        """Show path, entry count and size of the current download archive."""
+        path = self.app_state.get_archive_path()
+        if not path:
+            self.archive_info_var.set("disabled")
+            return
+        try:
+            entries, size = DownloadArchive.get_stats(path)
+        except sqlite3.Error as e:
+            self.archive_info_var.set(f"{path} (unreadable: {e})")
+            return
+        self.archive_info_var.set(f"{path} - {entries:,} entries, {size / 1024 / 1024:.1f} MB")
+    
+    def _prune_archive(self):
+        """Remove the archive entries of one site."""
+        path = self.app_state.get_archive_path()
+        if not path:
+            return
+        prefix = simpledialog.askstring(
+            "Prune Archive",
+            "Remove entries starting with (gallery-dl category, e.g. 'twitter'):",
+            parent=self.frame)
+        if not prefix:
+            return
+        try:
+            removed = DownloadArchive.prune(path, prefix.strip())
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Failed to prune archive: {e}")
+            return
+        messagebox.showinfo("Prune Archive", f"Removed {removed:,} entries")
+        self.update_archive_info()
+    
+    def _clear_archive(self):
+        """Remove all archive entries."""
+        path = self.app_state.get_archive_path()
+        if not path or not messagebox.askyesno(
+                "Clear Archive", "Remove all entries? Files will be checked or downloaded again."):
+            return
+        try:
+            DownloadArchive.clear(path)
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Failed to clear archive: {e}")
+            return
+        self.update_archive_info()
+    
+    def _compact_archive(self):
+        """Reclaim unused space in the archive file."""
+        path = self.app_state.get_archive_path()
+        if not path:
+            return
+        try:
+            DownloadArchive.compact(path)
+        except sqlite3.Error as e:
+            messagebox.showerror("Error", f"Failed to compact archive: {e}")
+            return
+        self.update_archive_info()
+    
     def _open_docs(self):
         """Open gallery-dl documentation."""
         FileUtils.open_url("https://gdl-org.github.io/docs/")
@@ -42,3 +42,61 @@ class BaseTab(BaseView):
     def setup_tab(self):
         """Setup the tab content."""
         pass
+
+
+class ScrollableFrame:
+    """Frame whose content scrolls vertically when it is taller than the space available.
+    
+    Put widgets into ``content`` and place ``frame``. The mouse wheel
+    scrolls the content while the pointer is over it, except over widgets
+    that scroll themselves (lists, trees and text).
+    """
+    
+    SELF_SCROLLING = ("Treeview", "Listbox", "Text")
+    
+    def __init__(self, parent):
+        self.frame = ttk.Frame(parent)
+        self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(0, weight=1)
+        
+        background = ttk.Style().lookup("TFrame", "background") or None
+        self.canvas = tk.Canvas(self.frame, highlightthickness=0, borderwidth=0, background=background)
+        self.canvas.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.canvas.yview)
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        
+        self.content = ttk.Frame(self.canvas)
+        self._window = self.canvas.create_window(0, 0, window=self.content, anchor=tk.NW)
+        self.content.bind("<Configure>", self._on_content_configure)
+        self.canvas.bind("<Configure>", self._on_canvas_configure)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.canvas.bind_all(sequence, self._on_wheel, add="+")
+    
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+    
+    def _on_content_configure(self, event=None):
+        self.canvas.configure(scrollregion=self.canvas.bbox("all"))
+    
+    def _on_canvas_configure(self, event):
+        """Make the content as wide as the canvas."""
+        self.canvas.itemconfigure(self._window, width=event.width)
+    
+    def _on_wheel(self, event):
+        """Scroll when the wheel turns over the content (wheel events go to the focus on some platforms)."""
+        try:
+            widget = self.frame.winfo_containing(event.x_root, event.y_root)
+        except (KeyError, tk.TclError):
+            return
+        path = str(self.frame)
+        if widget is None or not (str(widget) == path or str(widget).startswith(path + ".")):
+            return
+        if widget.winfo_class() in self.SELF_SCROLLING:
+            return
+        if self.content.winfo_height() <= self.canvas.winfo_height():
+            return
+        if event.num == 4 or event.delta > 0:
+            self.canvas.yview_scroll(-1, "units")
+        elif event.num == 5 or event.delta < 0:
+            self.canvas.yview_scroll(1, "units")
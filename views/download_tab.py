@@ -1,33 +1,53 @@
 """
 Main download tab view for Gallery-DL GUI.
 """
+import time
 import tkinter as tk
 from tkinter import ttk, scrolledtext
-from typing import Callable, Optional
+from typing import Callable, Dict, List, Optional, Set
 from views.base_view import BaseTab
 from models.settings import AppState
+from models.job import DownloadJob, JobState, JobPriority, QueuePolicy
 from utils.file_utils import ClipboardUtils, FileUtils
+from utils.session_log import SessionLog
+from views.log_viewer import LogViewer
 
 
 class DownloadTab(BaseTab):
     """Main download tab with URL input, settings, and progress display."""
     
+    STALL_SECONDS = 30  # Running jobs without output for this long are shown as idle
+    QUEUE_ROWS = 5  # Rows of the queue view until its size is known
+    
     def __init__(self, notebook: ttk.Notebook, app_state: AppState, callbacks: dict):
         self.app_state = app_state
         self.callbacks = callbacks
+        self._pending_log: List[str] = []  # Lines waiting to be added to the log
+        self._log_flush_scheduled = False
+        self._timestamp = (0, "")  # (second, formatted time) of the last log line
+        self._view_lines = 0  # Lines in the log widget
+        self.session_log = SessionLog()
+        self.log_viewer: Optional[LogViewer] = None
+        self.job_viewers: Dict[int, LogViewer] = {}
+        self.queue_top = 0  # Queue position of the first row shown
+        self._queue_rows: List[int] = []  # IDs of the jobs in the rows shown
+        self._queue_selection: Set[int] = set()  # Selected job IDs, including rows scrolled away
+        self._queue_render_scheduled = False
         super().__init__(notebook, "Download")
     
     def setup_tab(self):
         """Setup the download tab content."""
         # Configure grid weights
         self.frame.columnconfigure(0, weight=1)
-        self.frame.rowconfigure(5, weight=1)  # Log area expands
+        self.frame.rowconfigure(5, weight=1)  # Queue area expands
+        self.frame.rowconfigure(6, weight=2)  # Log area expands
         
         self._create_title()
         self._create_url_section()
         self._create_settings_section()
         self._create_control_buttons()
         self._create_progress_section()
+        self._create_queue_section()
         self._create_log_section()
     
     def _create_title(self):
@@ -52,6 +72,9 @@ class DownloadTab(BaseTab):
         paste_btn = ttk.Button(url_buttons_frame, text="Paste", command=self._paste_url)
         paste_btn.pack(side=tk.LEFT, padx=(0, 5))
         
+        import_btn = ttk.Button(url_buttons_frame, text="Import List...", command=self._import_file)
+        import_btn.pack(side=tk.LEFT, padx=(0, 5))
+        
         self.test_btn = ttk.Button(url_buttons_frame, text="Test URL", command=self._test_url)
         self.test_btn.pack(side=tk.LEFT)
     
@@ -86,6 +109,39 @@ class DownloadTab(BaseTab):
         ttk.Checkbutton(options_frame, text="Write metadata", 
                        variable=self.app_state.write_metadata_var).grid(row=1, column=1, sticky=tk.W, padx=(20, 0))
     
+        # Parallel downloads
+        workers_frame = ttk.Frame(settings_frame)
+        workers_frame.grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+        
+        ttk.Label(workers_frame, text="Parallel downloads:").pack(side=tk.LEFT)
+        ttk.Spinbox(workers_frame, from_=1, to=16, width=5,
+                   textvariable=self.app_state.max_workers_var).pack(side=tk.LEFT, padx=(5, 0))
+    
+        ttk.Label(workers_frame, text="Priority:").pack(side=tk.LEFT, padx=(20, 0))
+        ttk.Combobox(workers_frame, textvariable=self.app_state.priority_var, state="readonly", width=8,
+                    values=list(JobPriority.NAMES.values())).pack(side=tk.LEFT, padx=(5, 0))
+        
+        # Queue policy, shown by name
+        ttk.Label(workers_frame, text="Queue order:").pack(side=tk.LEFT, padx=(20, 0))
+        self.policy_combo = ttk.Combobox(workers_frame, state="readonly", width=24,
+                                         values=list(QueuePolicy.NAMES.values()))
+        self.policy_combo.pack(side=tk.LEFT, padx=(5, 0))
+        self.policy_combo.bind("<<ComboboxSelected>>", self._on_policy_selected)
+        self.app_state.queue_policy_var.trace_add("write", lambda *args: self._show_policy())
+        self._show_policy()
+        
+        ttk.Checkbutton(workers_frame, text="Pause lower-priority jobs when all slots are busy",
+                       variable=self.app_state.preempt_var).pack(side=tk.LEFT, padx=(20, 0))
+        
+        # Total bandwidth budget
+        bandwidth_frame = ttk.Frame(settings_frame)
+        bandwidth_frame.grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        
+        ttk.Label(bandwidth_frame, text="Total bandwidth limit:").pack(side=tk.LEFT)
+        ttk.Spinbox(bandwidth_frame, from_=0, to=10000000, increment=100, width=9,
+                   textvariable=self.app_state.bandwidth_limit_var).pack(side=tk.LEFT, padx=(5, 5))
+        ttk.Label(bandwidth_frame, text="KB/s, shared by all running downloads (0 = unlimited)").pack(side=tk.LEFT)
+    
     def _create_control_buttons(self):
         """Create control buttons."""
         button_frame = ttk.Frame(self.frame)
@@ -95,13 +151,16 @@ class DownloadTab(BaseTab):
                                      command=self._start_download, style="Accent.TButton")
         self.download_btn.pack(side=tk.LEFT, padx=(0, 10))
         
-        self.stop_btn = ttk.Button(button_frame, text="Stop", 
+        self.stop_btn = ttk.Button(button_frame, text="Stop All", 
                                  command=self._stop_download, state=tk.DISABLED)
         self.stop_btn.pack(side=tk.LEFT, padx=(0, 10))
         
         clear_btn = ttk.Button(button_frame, text="Clear Log", command=self._clear_log)
         clear_btn.pack(side=tk.LEFT, padx=(0, 10))
         
+        full_log_btn = ttk.Button(button_frame, text="Full Log...", command=self._show_full_log)
+        full_log_btn.pack(side=tk.LEFT, padx=(0, 10))
+        
         open_folder_btn = ttk.Button(button_frame, text="Open Folder", command=self._open_folder)
         open_folder_btn.pack(side=tk.LEFT)
     
@@ -111,16 +170,70 @@ class DownloadTab(BaseTab):
         progress_frame.grid(row=4, column=0, sticky=(tk.W, tk.E), padx=10, pady=(0, 10))
         progress_frame.columnconfigure(0, weight=1)
         
-        self.progress_bar = ttk.Progressbar(progress_frame, mode='indeterminate')
+        self.progress_bar = ttk.Progressbar(progress_frame, mode='determinate')
         self.progress_bar.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 10))
         
         self.status_label = ttk.Label(progress_frame, textvariable=self.app_state.status_var)
         self.status_label.grid(row=0, column=1)
+        
+        self.counters_var = tk.StringVar()
+        ttk.Label(progress_frame, textvariable=self.counters_var).grid(row=1, column=0, columnspan=2, sticky=tk.W)
+    
+    def _create_queue_section(self):
+        """Create download queue section.
+        
+        The tree only holds the rows that fit the view; they are built from
+        the download queue when it changes or is scrolled, so the view stays
+        fast with hundreds of thousands of queued jobs.
+        """
+        queue_frame = ttk.LabelFrame(self.frame, text="Download Queue", padding="5")
+        queue_frame.grid(row=5, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=10, pady=(0, 10))
+        queue_frame.columnconfigure(0, weight=1)
+        queue_frame.rowconfigure(0, weight=1)
+        
+        columns = ("state", "priority", "url", "info")
+        self.queue_tree = ttk.Treeview(queue_frame, columns=columns, height=5)
+        self.queue_tree.heading("#0", text="#")
+        self.queue_tree.heading("state", text="State")
+        self.queue_tree.heading("priority", text="Priority")
+        self.queue_tree.heading("url", text="URL")
+        self.queue_tree.heading("info", text="Info")
+        self.queue_tree.column("#0", width=50, stretch=False)
+        self.queue_tree.column("state", width=90, stretch=False)
+        self.queue_tree.column("priority", width=70, stretch=False)
+        self.queue_tree.column("url", width=450)
+        self.queue_tree.column("info", width=300)
+        self.queue_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        self.queue_scrollbar = ttk.Scrollbar(queue_frame, orient=tk.VERTICAL, command=self._on_queue_scroll)
+        self.queue_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.queue_tree.bind("<MouseWheel>", lambda e: self._scroll_queue(-3 if e.delta > 0 else 3))
+        self.queue_tree.bind("<Button-4>", lambda e: self._scroll_queue(-3))
+        self.queue_tree.bind("<Button-5>", lambda e: self._scroll_queue(3))
+        self.queue_tree.bind("<Prior>", lambda e: self._scroll_queue(-self._queue_visible_rows()))
+        self.queue_tree.bind("<Next>", lambda e: self._scroll_queue(self._queue_visible_rows()))
+        self.queue_tree.bind("<Configure>", lambda e: self.refresh_queue())
+        self.queue_tree.bind("<<TreeviewSelect>>", self._on_queue_select)
+        
+        queue_buttons = ttk.Frame(queue_frame)
+        queue_buttons.grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        
+        ttk.Button(queue_buttons, text="Cancel Selected", 
+                  command=self._cancel_selected).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(queue_buttons, text="Raise Priority", 
+                  command=lambda: self._change_priority(1)).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(queue_buttons, text="Lower Priority", 
+                  command=lambda: self._change_priority(-1)).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(queue_buttons, text="Clear Finished", 
+                  command=self._clear_finished).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(queue_buttons, text="Job Log...", 
+                  command=self._show_selected_job_log).pack(side=tk.LEFT)
+        self.queue_tree.bind("<Double-1>", lambda e: self._show_selected_job_log())
     
     def _create_log_section(self):
         """Create log output section."""
         log_frame = ttk.LabelFrame(self.frame, text="Output Log", padding="5")
-        log_frame.grid(row=5, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=10, pady=(0, 10))
+        log_frame.grid(row=6, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=10, pady=(0, 10))
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
         
@@ -128,10 +241,20 @@ class DownloadTab(BaseTab):
         self.log_text.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
     
     def _paste_url(self):
-        """Paste URL from clipboard."""
+        """Paste URL from clipboard; a block of several lines is imported as a URL list."""
         content = ClipboardUtils.get_clipboard_content(self.frame)
-        if content:
-            self.app_state.url_var.set(content)
+        if not content:
+            return
+        if "\n" in content.strip():
+            if 'import_text' in self.callbacks:
+                self.callbacks['import_text'](content)
+        else:
+            self.app_state.url_var.set(content.strip())
+    
+    def _import_file(self):
+        """Import a URL list from a file."""
+        if 'import_file' in self.callbacks:
+            self.callbacks['import_file']()
     
     def _test_url(self):
         """Test URL without downloading."""
@@ -153,11 +276,68 @@ class DownloadTab(BaseTab):
         if 'stop_download' in self.callbacks:
             self.callbacks['stop_download']()
     
+    def _cancel_selected(self):
+        """Cancel the jobs selected in the queue view."""
+        if 'cancel_job' in self.callbacks:
+            for job_id in sorted(self._queue_selection):
+                self.callbacks['cancel_job'](job_id)
+    
+    def _change_priority(self, delta: int):
+        """Raise or lower the priority of the jobs selected in the queue view."""
+        if 'change_priority' in self.callbacks:
+            for job_id in sorted(self._queue_selection):
+                self.callbacks['change_priority'](job_id, delta)
+    
+    def _on_policy_selected(self, event=None):
+        """Store the queue policy picked by name."""
+        name = self.policy_combo.get()
+        for policy, policy_name in QueuePolicy.NAMES.items():
+            if policy_name == name:
+                self.app_state.queue_policy_var.set(policy)
+    
+    def _show_policy(self):
+        """Show the name of the current queue policy."""
+        policy = self.app_state.queue_policy_var.get()
+        self.policy_combo.set(QueuePolicy.NAMES.get(policy, policy))
+    
+    def _clear_finished(self):
+        """Remove finished jobs from the queue view."""
+        if 'clear_finished' in self.callbacks:
+            self.callbacks['clear_finished']()
+    
     def _clear_log(self):
         """Clear the log."""
         self.log_text.config(state=tk.NORMAL)
         self.log_text.delete(1.0, tk.END)
         self.log_text.config(state=tk.DISABLED)
+        self._view_lines = 0
+    
+    def _show_full_log(self):
+        """Open the viewer of the whole session log."""
+        if self.log_viewer and self.log_viewer.exists():
+            self.log_viewer.show()
+        else:
+            note = str(self.session_log.path or "(nothing logged yet)")
+            self.log_viewer = LogViewer(self.frame, self.session_log, "Session Log", note)
+    
+    def _show_selected_job_log(self):
+        """Open the output of the jobs selected in the queue view."""
+        if 'show_job_log' in self.callbacks:
+            for job_id in sorted(self._queue_selection):
+                self.callbacks['show_job_log'](job_id)
+    
+    def show_job_log(self, job: DownloadJob):
+        """Open a viewer of the output of a job."""
+        viewer = self.job_viewers.get(job.id)
+        if viewer and viewer.exists() and viewer.log is job.output:
+            viewer.show()
+            return
+        self.job_viewers = {job_id: viewer for job_id, viewer in self.job_viewers.items() if viewer.exists()}
+        self.job_viewers[job.id] = LogViewer(self.frame, job.output, f"Job #{job.id} Output", job.url)
+    
+    def cleanup(self):
+        """Close the session log file."""
+        self.session_log.close()
     
     def _open_folder(self):
         """Open download folder."""
@@ -170,23 +350,188 @@ class DownloadTab(BaseTab):
     
     def log_message(self, message: str):
         """Add message to log with timestamp."""
-        import time
-        timestamp = time.strftime('%H:%M:%S')
+        self.log_messages([message])
+    
+    def log_messages(self, messages: List[str]):
+        """Add messages to the log with timestamp.
+        
+        Lines are collected and shown with a single insert and scroll once
+        Tk is idle, however many arrive in between.
+        """
+        timestamp = self._current_timestamp()
+        self._pending_log.extend(f"[{timestamp}] {message}\n" for message in messages)
+        if not self._log_flush_scheduled:
+            self._log_flush_scheduled = True
+            self.frame.after_idle(self._flush_log)
+    
+    def _current_timestamp(self) -> str:
+        now = int(time.time())
+        if self._timestamp[0] != now:
+            self._timestamp = (now, time.strftime('%H:%M:%S', time.localtime(now)))
+        return self._timestamp[1]
+    
+    def _flush_log(self):
+        """Show the collected log lines and write them to the session log.
+        
+        The widget keeps only the most recent lines (Advanced > Log
+        Display); it is trimmed once it grows a tenth past that limit, so
+        most updates do not delete anything. Older lines stay available
+        in the session log viewer.
+        """
+        self._log_flush_scheduled = False
+        if not self._pending_log:
+            return
+        text = "".join(self._pending_log)
+        self._pending_log.clear()
+        self.session_log.write(text)
+        
+        max_lines = self.app_state.get_log_view_lines()
+        count = text.count("\n")
         self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
+        if count >= max_lines:
+            text = "\n".join(text.split("\n")[-max_lines - 1:])
+            self.log_text.delete(1.0, tk.END)
+            self._view_lines = max_lines
+        else:
+            self._view_lines += count
+        self.log_text.insert(tk.END, text)
+        excess = self._view_lines - max_lines
+        if excess > max_lines // 10:
+            self.log_text.delete(1.0, f"{excess + 1}.0")
+            self._view_lines = max_lines
         self.log_text.config(state=tk.DISABLED)
         self.log_text.see(tk.END)
     
+    def update_progress(self, progress: Dict[str, float]):
+        """Show overall queue progress and file counters."""
+        self.progress_bar.config(maximum=max(1, progress["jobs"]), value=progress["progress"])
+        self.counters_var.set(
+            f"Files: {progress['files']}  ({progress['files_per_second']:.1f}/s)   "
+            f"Skipped: {progress['skipped']}   Failed: {progress['failed']}")
+    
+    @staticmethod
+    def _format_counters(job: DownloadJob) -> str:
+        """Format the file counters of a job for the queue view."""
+        files = f"{job.files_done}/{job.files_total}" if job.files_total else str(job.files_done)
+        text = f"{files} files, {job.files_skipped} skipped, {job.files_failed} failed"
+        if job.duration:
+            text += f", {job.files_per_second:.1f}/s"
+        if job.rate_limit and job.state == JobState.RUNNING:
+            text += f", max {job.rate_limit / 1024:.0f} KB/s"
+        return text
+    
+    def refresh_queue(self):
+        """Rebuild the queue view from the download queue once the UI is idle."""
+        if not self._queue_render_scheduled:
+            self._queue_render_scheduled = True
+            self.frame.after_idle(self._render_queue)
+    
+    def _render_queue(self):
+        """Show the jobs from position ``queue_top`` on that fit the view."""
+        self._queue_render_scheduled = False
+        if 'queue_size' not in self.callbacks:
+            return
+        total = self.callbacks['queue_size']()
+        rows = self._queue_visible_rows()
+        self.queue_top = min(max(0, self.queue_top), max(0, total - rows))
+        jobs = self.callbacks['queue_jobs'](self.queue_top, rows)
+        
+        job_ids = [job.id for job in jobs]
+        if job_ids == self._queue_rows:
+            for job in jobs:
+                self.queue_tree.item(str(job.id), values=self._job_values(job))
+        else:
+            self.queue_tree.delete(*self.queue_tree.get_children())
+            for job in jobs:
+                self.queue_tree.insert("", tk.END, iid=str(job.id), text=str(job.id), values=self._job_values(job))
+            self._queue_rows = job_ids
+            self.queue_tree.selection_set([str(job_id) for job_id in job_ids if job_id in self._queue_selection])
+        
+        if total:
+            self.queue_scrollbar.set(self.queue_top / total, min(1.0, (self.queue_top + rows) / total))
+        else:
+            self.queue_scrollbar.set(0.0, 1.0)
+    
+    def _queue_visible_rows(self) -> int:
+        """Get the number of rows that fit the queue view."""
+        height = self.queue_tree.winfo_height()
+        if height <= 1:
+            return self.QUEUE_ROWS
+        children = self.queue_tree.get_children()
+        bbox = self.queue_tree.bbox(children[0]) if children else ""
+        if bbox:
+            header, row_height = bbox[1], bbox[3]
+        else:
+            # Nothing drawn yet; estimate from the style like Tk does
+            linespace = self.queue_tree.tk.call("font", "metrics", "TkDefaultFont", "-linespace")
+            row_height = int(ttk.Style().lookup("Treeview", "rowheight") or int(linespace) + 4)
+            header = row_height + 4
+        return max(1, (height - header) // max(1, row_height))
+    
+    def _on_queue_scroll(self, *args):
+        """Handle the vertical scrollbar, which spans the whole queue."""
+        if args[0] == "moveto":
+            self.queue_top = int(float(args[1]) * self.callbacks['queue_size']())
+            self._render_queue()
+        elif args[0] == "scroll":
+            step = self._queue_visible_rows() if args[2] == "pages" else 1
+            self._scroll_queue(int(args[1]) * step)
+    
+    def _scroll_queue(self, rows: int) -> str:
+        self.queue_top += rows
+        self._render_queue()
+        return "break"
+    
+    def _on_queue_select(self, event=None):
+        """Remember the selected jobs by ID, so the selection survives scrolling."""
+        shown = set(self._queue_rows)
+        selected = {int(item) for item in self.queue_tree.selection()}
+        if (self._queue_selection & shown) <= selected:
+            # Rows were added to the selection; keep the ones scrolled away
+            self._queue_selection = (self._queue_selection - shown) | selected
+        else:
+            self._queue_selection = selected
+    
+    def update_job(self, job: DownloadJob):
+        """Refresh the row of a job if it is shown in the queue view."""
+        item = str(job.id)
+        if self.queue_tree.exists(item):
+            self.queue_tree.item(item, values=self._job_values(job))
+    
+    def _job_values(self, job: DownloadJob) -> tuple:
+        """Get the column values of a job row."""
+        if job.error:
+            info = job.error
+        elif job.exit_code is not None:
+            info = f"exit code {job.exit_code}"
+        else:
+            info = ""
+        if job.state == JobState.RUNNING:
+            info = self._format_counters(job)
+            if job.error:
+                info += f" - {job.error}"
+            idle = time.time() - (job.last_output_at or job.started_at or time.time())
+            if idle >= self.STALL_SECONDS:
+                info += f" - no output for {idle:.0f}s"
+        elif job.state == JobState.QUEUED and job.retry_at is not None:
+            retry_time = time.strftime('%H:%M:%S', time.localtime(job.retry_at))
+            info = f"retry {job.attempts + 1} at {retry_time}: {info}"
+        elif job.files_done or job.files_skipped or job.files_failed:
+            info = f"{info} - {self._format_counters(job)}" if info else self._format_counters(job)
+        if job.duration is not None and job.is_finished:
+            info = f"{info} ({job.duration:.0f}s)".strip()
+        
+        return (job.state, JobPriority.NAMES.get(job.priority, job.priority), job.url, info)
+    
     def set_download_state(self, downloading: bool):
-        """Update UI based on download state."""
+        """Update UI based on download state.
+        
+        The Download button stays enabled so more URLs can be queued.
+        """
         if downloading:
-            self.download_btn.config(state=tk.DISABLED)
             self.stop_btn.config(state=tk.NORMAL)
-            self.progress_bar.start(10)
         else:
-            self.download_btn.config(state=tk.NORMAL)
             self.stop_btn.config(state=tk.DISABLED)
-            self.progress_bar.stop()
     
     def set_test_state(self, testing: bool):
         """Update UI based on test state."""
@@ -0,0 +1,266 @@
+"""
+Log viewer window for Gallery-DL GUI.
+"""
+import threading
+import tkinter as tk
+from tkinter import ttk
+from typing import List, Optional, Tuple
+from utils.output_parser import EventKind
+
+
+class LogViewer:
+    """Window that pages through a log kept outside the widget.
+    
+    ``log`` is a SessionLog or JobOutputLog (anything with ``lines`` and
+    ``read(start, count)``). Only the lines that fit the window are read
+    and shown, so scrolling through millions of lines costs the same as
+    through a hundred. While "Follow new lines" is on, the view keeps
+    showing the end of the log. Logs with a ``search`` method get a
+    search bar with kind filters; searching runs on a background thread,
+    and a query that extends the previous one only re-checks its matches.
+    """
+    
+    REFRESH_MS = 1000
+    DEFAULT_ROWS = 40
+    SEARCH_DELAY_MS = 300  # Pause in typing before the search runs
+    SEARCH_POLL_MS = 50
+    SEARCH_LIMIT = 10000
+    FILTERS = (
+        ("All lines", ()),
+        ("Errors", (EventKind.ERROR,)),
+        ("Warnings", (EventKind.WARNING,)),
+        ("Errors and warnings", (EventKind.ERROR, EventKind.WARNING)),
+        ("Downloaded files", (EventKind.FILE_DONE,)),
+        ("Skipped files", (EventKind.FILE_SKIPPED,)),
+    )
+    
+    def __init__(self, parent, log, title: str, note: str = ""):
+        self.log = log
+        self.top = 0  # First line shown
+        self.highlight: Optional[int] = None  # Line of the selected search result
+        self.searchable = hasattr(log, "search")
+        self._search_after = None
+        self._search_thread: Optional[threading.Thread] = None
+        self._search_result = None
+        self._search_again = False
+        self._last_search = None  # (text, kinds, lines searched, matches, truncated)
+        self._matches: List[Tuple[int, str]] = []
+        
+        self.window = tk.Toplevel(parent)
+        self.window.title(title)
+        self.window.geometry("1000x600")
+        self.window.columnconfigure(0, weight=1)
+        self.window.rowconfigure(2, weight=1)
+        
+        self._create_toolbar(note)
+        if self.searchable:
+            self._create_search_bar()
+        self._create_text()
+        if self.searchable:
+            self._create_results()
+        self._render(follow=True)
+        self._schedule_refresh()
+    
+    def _create_toolbar(self, note: str):
+        toolbar = ttk.Frame(self.window, padding="5")
+        toolbar.grid(row=0, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        
+        self.follow_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(toolbar, text="Follow new lines", variable=self.follow_var,
+                       command=lambda: self._render(follow=self.follow_var.get())).pack(side=tk.LEFT)
+        self.position_var = tk.StringVar()
+        ttk.Label(toolbar, textvariable=self.position_var).pack(side=tk.LEFT, padx=(15, 0))
+        ttk.Label(toolbar, text=note, foreground="gray").pack(side=tk.RIGHT)
+    
+    def _create_search_bar(self):
+        search_frame = ttk.Frame(self.window, padding=(5, 0, 5, 5))
+        search_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        search_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(search_frame, text="Find:").grid(row=0, column=0, padx=(0, 5))
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.grid(row=0, column=1, sticky=(tk.W, tk.E), padx=(0, 5))
+        search_entry.bind("<Return>", lambda e: self._start_search())
+        self.search_var.trace_add("write", lambda *args: self._schedule_search())
+        
+        self.filter_combo = ttk.Combobox(search_frame, state="readonly", width=22,
+                                         values=[name for name, _ in self.FILTERS])
+        self.filter_combo.current(0)
+        self.filter_combo.grid(row=0, column=2, padx=(0, 5))
+        self.filter_combo.bind("<<ComboboxSelected>>", lambda e: self._start_search())
+        
+        self.matches_var = tk.StringVar()
+        ttk.Label(search_frame, textvariable=self.matches_var, width=24).grid(row=0, column=3)
+    
+    def _create_text(self):
+        self.text = tk.Text(self.window, wrap=tk.NONE, state=tk.DISABLED)
+        self.text.grid(row=2, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.text.tag_configure("match", background="yellow")
+        self.scrollbar = ttk.Scrollbar(self.window, orient=tk.VERTICAL, command=self._on_scroll)
+        self.scrollbar.grid(row=2, column=1, sticky=(tk.N, tk.S))
+        xscrollbar = ttk.Scrollbar(self.window, orient=tk.HORIZONTAL, command=self.text.xview)
+        xscrollbar.grid(row=3, column=0, sticky=(tk.W, tk.E))
+        self.text.configure(xscrollcommand=xscrollbar.set)
+        
+        # The Text widget only holds the visible page; scrolling loads another page
+        self.text.bind("<MouseWheel>", lambda e: self._scroll_lines(-3 if e.delta > 0 else 3))
+        self.text.bind("<Button-4>", lambda e: self._scroll_lines(-3))
+        self.text.bind("<Button-5>", lambda e: self._scroll_lines(3))
+        self.text.bind("<Prior>", lambda e: self._scroll_lines(-self._rows()))
+        self.text.bind("<Next>", lambda e: self._scroll_lines(self._rows()))
+        self.text.bind("<Control-Home>", lambda e: self._scroll_to(0))
+        self.text.bind("<Control-End>", lambda e: self._render(follow=True) or "break")
+        self.text.bind("<Configure>", lambda e: self._render(follow=self.follow_var.get()))
+    
+    def _create_results(self):
+        results_frame = ttk.Frame(self.window, padding=(5, 5, 5, 5))
+        results_frame.grid(row=4, column=0, columnspan=2, sticky=(tk.W, tk.E))
+        results_frame.columnconfigure(0, weight=1)
+        
+        self.results_list = tk.Listbox(results_frame, height=8, activestyle="none")
+        self.results_list.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.results_list.yview)
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.results_list.configure(yscrollcommand=scrollbar.set)
+        self.results_list.bind("<<ListboxSelect>>", self._on_result_selected)
+    
+    def _rows(self) -> int:
+        """Get the number of lines that fit the window."""
+        height = self.text.winfo_height()
+        if height <= 1:
+            return self.DEFAULT_ROWS
+        linespace = self.text.tk.call("font", "metrics", self.text.cget("font"), "-linespace")
+        return max(1, height // max(1, int(linespace)))
+    
+    def _on_scroll(self, *args):
+        """Handle the vertical scrollbar, which spans the whole log."""
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * self.log.lines))
+        elif args[0] == "scroll":
+            step = self._rows() if args[2] == "pages" else 1
+            self._scroll_lines(int(args[1]) * step)
+    
+    def _scroll_lines(self, lines: int) -> str:
+        return self._scroll_to(self.top + lines)
+    
+    def _scroll_to(self, line: int) -> str:
+        self.top = line
+        self._render(follow=False)
+        return "break"
+    
+    def _render(self, follow: bool):
+        """Show the page starting at ``self.top`` (or the last page when following)."""
+        total = self.log.lines
+        rows = self._rows()
+        last_top = max(0, total - rows)
+        self.top = last_top if follow else min(max(0, self.top), last_top)
+        self.follow_var.set(self.top >= last_top)
+        
+        lines = self.log.read(self.top, rows)
+        self.text.config(state=tk.NORMAL)
+        self.text.delete(1.0, tk.END)
+        self.text.insert(tk.END, "\n".join(lines))
+        if self.highlight is not None and self.top <= self.highlight < self.top + len(lines):
+            row = self.highlight - self.top + 1
+            self.text.tag_add("match", f"{row}.0", f"{row}.end")
+        self.text.config(state=tk.DISABLED)
+        
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + rows) / total))
+            self.position_var.set(f"Lines {self.top + 1:,}-{self.top + len(lines):,} of {total:,}")
+        else:
+            self.scrollbar.set(0.0, 1.0)
+            self.position_var.set("No lines yet")
+    
+    def _schedule_search(self):
+        """Search once typing pauses."""
+        if self._search_after is not None:
+            self.window.after_cancel(self._search_after)
+        self._search_after = self.window.after(self.SEARCH_DELAY_MS, self._start_search)
+    
+    def _start_search(self):
+        """Search the log on a background thread for the current query and filter."""
+        self._search_after = None
+        if self._search_thread is not None:
+            self._search_again = True  # Runs when the current search is done
+            return
+        text = self.search_var.get().strip()
+        kinds = self.FILTERS[max(0, self.filter_combo.current())][1]
+        if not text and not kinds:
+            self._last_search = None
+            self._show_matches([], False)
+            self.matches_var.set("")
+            return
+        
+        lines = self.log.lines
+        previous = self._last_search
+        if not (previous and previous[1] == kinds and not previous[4]
+                and previous[0].lower() in text.lower()):
+            previous = None
+        
+        def search_worker():
+            candidates = None
+            if previous:
+                # Only the matches of the shorter query and the lines added since can match
+                candidates = [number for number, _ in previous[3]]
+                candidates.extend(self.log.line_numbers(kinds, start=previous[2]))
+            self._search_result = (text, kinds, lines) + self.log.search(
+                text, kinds, self.SEARCH_LIMIT, candidates)
+        
+        self.matches_var.set("Searching...")
+        self._search_thread = threading.Thread(target=search_worker, daemon=True)
+        self._search_thread.start()
+        self.window.after(self.SEARCH_POLL_MS, self._poll_search)
+    
+    def _poll_search(self):
+        if not self.exists():
+            return
+        if self._search_thread.is_alive():
+            self.window.after(self.SEARCH_POLL_MS, self._poll_search)
+            return
+        self._search_thread = None
+        result, self._search_result = self._search_result, None
+        if result is not None:
+            self._last_search = result
+            self._show_matches(result[3], result[4])
+        if self._search_again:
+            self._search_again = False
+            self._start_search()
+    
+    def _show_matches(self, matches: List[Tuple[int, str]], truncated: bool):
+        self._matches = matches
+        self.results_list.delete(0, tk.END)
+        if matches:
+            self.results_list.insert(tk.END, *(f"{number + 1:>9}: {line}" for number, line in matches))
+        count = f"first {len(matches):,}" if truncated else f"{len(matches):,}"
+        self.matches_var.set(f"{count} matching line(s)")
+    
+    def _on_result_selected(self, event=None):
+        """Show the line of the selected search result."""
+        selection = self.results_list.curselection()
+        if not selection:
+            return
+        self.highlight = self._matches[selection[0]][0]
+        self._scroll_to(self.highlight - self._rows() // 3)
+    
+    def _schedule_refresh(self):
+        self.window.after(self.REFRESH_MS, self._refresh)
+    
+    def _refresh(self):
+        """Show new lines while following the end of the log."""
+        if not self.exists():
+            return
+        self._render(follow=self.follow_var.get())
+        self._schedule_refresh()
+    
+    def show(self):
+        """Bring the window to the front."""
+        self.window.deiconify()
+        self.window.lift()
+    
+    def exists(self) -> bool:
+        try:
+            return bool(self.window.winfo_exists())
+        except tk.TclError:
+            return False
@@ -0,0 +1,153 @@
+"""
+Batch URL test tab view for Gallery-DL GUI.
+"""
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict
+from views.base_view import BaseTab
+from models.settings import AppState
+from utils.gallery_dl_service import UrlTestResult
+
+
+class UrlTestTab(BaseTab):
+    """Tab for testing whole URL lists, with a sortable table of results."""
+    
+    COLUMNS = ("verdict", "exit_code", "reason", "time")
+    
+    def __init__(self, notebook: ttk.Notebook, app_state: AppState, callbacks: dict):
+        self.app_state = app_state
+        self.callbacks = callbacks
+        self.results: Dict[str, UrlTestResult] = {}  # Tree item -> result
+        self.counts: Dict[str, int] = {}  # Verdict -> number of results
+        self._sort_column = None
+        self._sort_reverse = False
+        super().__init__(notebook, "URL Tests")
+    
+    def setup_tab(self):
+        """Setup the URL test tab content."""
+        self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(1, weight=1)
+        
+        self._create_control_section()
+        self._create_results_section()
+    
+    def _create_control_section(self):
+        """Create the buttons and summary line."""
+        control_frame = ttk.Frame(self.frame, padding="10")
+        control_frame.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        
+        self.history_btn = ttk.Button(control_frame, text="Test URL History",
+                                     command=lambda: self._call('test_history'))
+        self.history_btn.pack(side=tk.LEFT, padx=(0, 5))
+        self.list_btn = ttk.Button(control_frame, text="Test List...",
+                                  command=lambda: self._call('test_list'))
+        self.list_btn.pack(side=tk.LEFT, padx=(0, 5))
+        self.stop_btn = ttk.Button(control_frame, text="Stop", state=tk.DISABLED,
+                                  command=lambda: self._call('stop_batch_test'))
+        self.stop_btn.pack(side=tk.LEFT, padx=(0, 15))
+        
+        self.summary_var = tk.StringVar(value="Test the URL history or a list of URLs to find dead "
+                                              "or unsupported ones")
+        ttk.Label(control_frame, textvariable=self.summary_var).pack(side=tk.LEFT)
+    
+    def _create_results_section(self):
+        """Create the results table."""
+        results_frame = ttk.LabelFrame(self.frame, text="Results", padding="5")
+        results_frame.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), padx=10, pady=(0, 10))
+        results_frame.columnconfigure(0, weight=1)
+        results_frame.rowconfigure(0, weight=1)
+        
+        self.results_tree = ttk.Treeview(results_frame, columns=self.COLUMNS)
+        for column, text in (("#0", "URL"), ("verdict", "Verdict"), ("exit_code", "Exit code"),
+                             ("reason", "Reason"), ("time", "Time (s)")):
+            self.results_tree.heading(column, text=text, command=lambda c=column: self._sort_by(c))
+        self.results_tree.column("#0", width=450)
+        self.results_tree.column("verdict", width=90, stretch=False)
+        self.results_tree.column("exit_code", width=70, stretch=False, anchor=tk.CENTER)
+        self.results_tree.column("reason", width=350)
+        self.results_tree.column("time", width=70, stretch=False, anchor=tk.E)
+        self.results_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        scrollbar = ttk.Scrollbar(results_frame, orient=tk.VERTICAL, command=self.results_tree.yview)
+        scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.results_tree.configure(yscrollcommand=scrollbar.set)
+        
+        buttons_frame = ttk.Frame(results_frame)
+        buttons_frame.grid(row=1, column=0, columnspan=2, sticky=tk.W, pady=(5, 0))
+        ttk.Button(buttons_frame, text="Download Selected",
+                  command=self._download_selected).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(buttons_frame, text="Select Working",
+                  command=lambda: self._select_verdict("OK")).pack(side=tk.LEFT, padx=(0, 10))
+        ttk.Button(buttons_frame, text="Clear Results",
+                  command=self.clear_results).pack(side=tk.LEFT)
+    
+    def _call(self, name: str):
+        if name in self.callbacks:
+            self.callbacks[name]()
+    
+    def set_running(self, running: bool):
+        """Update the buttons while a batch test runs."""
+        self.history_btn.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.list_btn.config(state=tk.DISABLED if running else tk.NORMAL)
+        self.stop_btn.config(state=tk.NORMAL if running else tk.DISABLED)
+        if running:
+            self.clear_results()
+    
+    def add_result(self, result: UrlTestResult):
+        """Add the result of one URL test to the table."""
+        exit_code = "" if result.exit_code is None else result.exit_code
+        duration = "cached" if result.cached else f"{result.duration:.1f}"
+        values = (result.verdict, exit_code, result.reason, duration)
+        item = self.results_tree.insert("", tk.END, text=result.url, values=values)
+        self.results[item] = result
+        self.counts[result.verdict] = self.counts.get(result.verdict, 0) + 1
+        self._update_summary()
+    
+    def clear_results(self):
+        """Remove all results from the table."""
+        self.results_tree.delete(*self.results_tree.get_children())
+        self.results.clear()
+        self.counts.clear()
+        self._update_summary()
+    
+    def _update_summary(self):
+        total = len(self.results)
+        if not total:
+            self.summary_var.set("")
+            return
+        parts = ", ".join(f"{count} {verdict}" for verdict, count in sorted(self.counts.items()))
+        self.summary_var.set(f"{total} URL(s) tested: {parts}")
+    
+    def _sort_key(self, item: str, column: str):
+        result = self.results[item]
+        if column == "#0":
+            return result.url
+        if column == "verdict":
+            return result.verdict
+        if column == "exit_code":
+            return -1 if result.exit_code is None else result.exit_code
+        if column == "reason":
+            return result.reason
+        return 0.0 if result.cached else result.duration
+    
+    def _sort_by(self, column: str):
+        """Sort the table by a column; sorting by it again reverses the order."""
+        if self._sort_column == column:
+            self._sort_reverse = not self._sort_reverse
+        else:
+            self._sort_column, self._sort_reverse = column, False
+        items = sorted(self.results_tree.get_children(), key=lambda item: self._sort_key(item, column),
+                       reverse=self._sort_reverse)
+        for index, item in enumerate(items):
+            self.results_tree.move(item, "", index)
+    
+    def _select_verdict(self, verdict: str):
+        """Select all results with a verdict."""
+        self.results_tree.selection_set([item for item, result in self.results.items()
+                                         if result.verdict == verdict])
+    
+    def _download_selected(self):
+        """Queue the URLs of the selected results."""
+        urls = [self.results[item].url for item in self.results_tree.selection()]
+        if urls and 'download_urls' in self.callbacks:
+            self.callbacks['download_urls'](urls)